@@ -0,0 +1,160 @@
+import json
+import zipfile
+from collections import OrderedDict
+
+from np_cats_qa.catalog.external_sort import ExternalSorter, merge_join
+from np_cats_qa.catalog.json_stream import iter_json_array
+from np_cats_qa.constants import EntityType
+
+CATALOG_FILE_KEYS = OrderedDict([
+    ('currencies.json', 'currency_code'),
+    ('entitlements.json', 'entitlement_code'),
+    ('products.json', 'code'),
+    ('storefronts.json', 'code'),
+    ('overrides.json', 'code'),
+    ('promotions.json', 'code'),
+    ('filter_properties.json', 'code'),
+    ('coupons.json', 'code'),
+])
+
+ENTITY_TYPE_FILES = OrderedDict([
+    (EntityType.CURRENCY, 'currencies.json'),
+    (EntityType.ENTITLEMENT, 'entitlements.json'),
+    (EntityType.PRODUCT, 'products.json'),
+    (EntityType.STOREFRONT, 'storefronts.json'),
+    (EntityType.OVERRIDE, 'overrides.json'),
+    (EntityType.PROMOTION, 'promotions.json'),
+    (EntityType.FILTER_PROPERTY, 'filter_properties.json'),
+    (EntityType.COUPON, 'coupons.json'),
+])
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+class FileComparison(object):
+    """
+    Differences of one catalog file; only the first `max_details` differences of each kind are kept
+    """
+
+    def __init__(self, file_name, max_details=20):
+        self.file_name = file_name
+        self.max_details = max_details
+        self.compared = 0
+        self.missing = []
+        self.extra = []
+        self.changed = []
+        self.missing_count = 0
+        self.extra_count = 0
+        self.changed_count = 0
+
+    def _keep(self, details, item):
+        if len(details) < self.max_details:
+            details.append(item)
+
+    def add_missing(self, key):
+        self.missing_count += 1
+        self._keep(self.missing, key)
+
+    def add_extra(self, key):
+        self.extra_count += 1
+        self._keep(self.extra, key)
+
+    def add_changed(self, key, fields):
+        self.changed_count += 1
+        self._keep(self.changed, {'key': key, 'fields': fields})
+
+    @property
+    def equal(self):
+        return not (self.missing_count or self.extra_count or self.changed_count)
+
+    def as_dict(self):
+        return OrderedDict([
+            ('file', self.file_name),
+            ('compared', self.compared),
+            ('missing_count', self.missing_count),
+            ('extra_count', self.extra_count),
+            ('changed_count', self.changed_count),
+            ('missing', self.missing),
+            ('extra', self.extra),
+            ('changed', self.changed),
+        ])
+
+
+class CatalogComparison(object):
+    def __init__(self, files):
+        self.files = files
+
+    @property
+    def equal(self):
+        return all(f.equal for f in self.files)
+
+    def differences(self):
+        return [f.as_dict() for f in self.files if not f.equal]
+
+    def as_dict(self):
+        return [f.as_dict() for f in self.files]
+
+
+def changed_fields(expected, actual, strict):
+    """
+    Top-level fields which differ; unless strict, fields absent in `actual` are not compared
+    """
+    keys = set(expected) | set(actual) if strict else set(actual)
+    return sorted(key for key in keys if key not in expected or key not in actual or expected[key] != actual[key])
+
+
+def keyed_entities(f, key):
+    for entity in iter_json_array(f):
+        yield entity[key], canonical_json(entity)
+
+
+def compare_catalog_file(expected_file, actual_file, file_name, key, strict=False, sorter=None, max_details=20):
+    """
+    Compares two JSON arrays of entities by `key` in bounded memory.
+
+    Both sides are externally sorted by key and merge-joined, so every entity is compared
+    and only one entity per side is decoded at a time.
+    """
+    sorter = sorter or ExternalSorter()
+    result = FileComparison(file_name, max_details=max_details)
+    expected = sorter.sorted(keyed_entities(expected_file, key))
+    actual = sorter.sorted(keyed_entities(actual_file, key))
+    for entity_key, expected_json, actual_json in merge_join(expected, actual):
+        result.compared += 1
+        if actual_json is None:
+            result.add_missing(entity_key)
+        elif expected_json is None:
+            result.add_extra(entity_key)
+        elif expected_json != actual_json:
+            fields = changed_fields(json.loads(expected_json), json.loads(actual_json), strict)
+            if fields:
+                result.add_changed(entity_key, fields)
+    return result
+
+
+def compare_catalog_zips(expected_zip, actual_zip, file_keys=CATALOG_FILE_KEYS, strict=False, sorter=None,
+                         max_details=20):
+    """
+    :param expected_zip: path or binary file object of the original catalog
+    :param actual_zip: path or binary file object of the catalog returned by the service
+    """
+    files = []
+    with zipfile.ZipFile(expected_zip) as expected, zipfile.ZipFile(actual_zip) as actual:
+        expected_names, actual_names = set(expected.namelist()), set(actual.namelist())
+        for file_name, key in file_keys.items():
+            if file_name not in expected_names and file_name not in actual_names:
+                continue
+            if file_name not in actual_names or file_name not in expected_names:
+                result = FileComparison(file_name, max_details=max_details)
+                if file_name not in actual_names:
+                    result.add_missing('<file>')
+                else:
+                    result.add_extra('<file>')
+                files.append(result)
+                continue
+            with expected.open(file_name) as expected_file, actual.open(file_name) as actual_file:
+                files.append(compare_catalog_file(expected_file, actual_file, file_name, key, strict=strict,
+                                                  sorter=sorter, max_details=max_details))
+    return CatalogComparison(files)
@@ -0,0 +1,110 @@
+import json
+
+from np_cats_qa.catalog.compare import CATALOG_FILE_KEYS, ENTITY_TYPE_FILES, FileComparison, canonical_json, \
+    changed_fields
+from np_cats_qa.catalog.external_sort import ExternalSorter, merge_join
+from np_cats_qa.constants import ChangeType, EntityType
+
+# catalog ids are generated by publishers and are not a part of entity content, cats ignores them in diffs
+ENTITY_ID_FIELDS = {
+    EntityType.CURRENCY: 'currency_id',
+    EntityType.ENTITLEMENT: 'entitlement_id',
+    EntityType.STOREFRONT: 'storefront_id',
+}
+
+
+def parse_fields(fields):
+    """
+    `fields` query parameter ("active,metadata") to a set of field names, None means all fields
+    """
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+def entity_key(entity_type):
+    return CATALOG_FILE_KEYS[ENTITY_TYPE_FILES[entity_type]]
+
+
+def entity_fields(entity, entity_type, fields=None):
+    """
+    Diff `fields` of a catalog entity: content without the code and the catalog id, projected to `fields`
+    """
+    skipped = {entity_key(entity_type), ENTITY_ID_FIELDS.get(entity_type, 'id')}
+    return {name: value for name, value in entity.items()
+            if name not in skipped and (fields is None or name in fields)}
+
+
+def projected_entities(entities, entity_type, fields=None):
+    key = entity_key(entity_type)
+    for entity in entities:
+        yield entity[key], canonical_json(entity_fields(entity, entity_type, fields))
+
+
+def expected_diff(source_entities, destination_entities, entity_type, fields=None, sorter=None):
+    """
+    Expected diff between two catalogs as key-sorted (code, change type, fields or None) in bounded memory.
+
+    An entity missing in the source is CREATE, missing in the destination is DELETE. An entity present in
+    both is UPDATE only if its projected content changed, so with `fields` only changes of those fields count.
+
+    :param source_entities: entities of the source catalog, None for the initial diff
+    :param fields: `fields` query parameter
+    """
+    sorter = sorter or ExternalSorter()
+    fields = parse_fields(fields)
+    source = sorter.sorted(projected_entities(source_entities or [], entity_type, fields))
+    destination = sorter.sorted(projected_entities(destination_entities, entity_type, fields))
+    for code, source_json, destination_json in merge_join(source, destination):
+        if source_json is None:
+            yield code, ChangeType.CREATE, json.loads(destination_json)
+        elif destination_json is None:
+            yield code, ChangeType.DELETE, None
+        elif source_json != destination_json:
+            yield code, ChangeType.UPDATE, json.loads(destination_json)
+
+
+def iter_diff_items(get_page, limit=None):
+    """
+    Pages through a diff endpoint by `last_id`
+
+    :param get_page: callable(last_id, limit) returning the response of one page
+    """
+    last_id = None
+    while True:
+        response = get_page(last_id, limit)
+        assert response.status_code == 200, 'diff page after {} is not returned: {}'.format(last_id, response.text)
+        items = response.json()
+        yield from items
+        if not items:
+            return
+        last_id = items[-1]['id']
+
+
+def compare_diff(expected, actual_items, entity_type, sorter=None, max_details=20):
+    """
+    Compares a diff returned by cats with `expected_diff`.
+
+    Items of the response are externally sorted by code, so responses of any size are compared item by item.
+    Fields of CREATE and UPDATE items are compared only if returned, like in `compare_catalog_zips`.
+    """
+    sorter = sorter or ExternalSorter()
+    skipped = {entity_key(entity_type), ENTITY_ID_FIELDS.get(entity_type, 'id')}
+    actual = sorter.sorted((item['code'], [item['change_type'], item.get('fields')]) for item in actual_items)
+    expected = ((code, [change_type, fields]) for code, change_type, fields in expected)
+
+    result = FileComparison(entity_type, max_details=max_details)
+    for code, expected_item, actual_item in merge_join(expected, actual):
+        result.compared += 1
+        if actual_item is None:
+            result.add_missing({'code': code, 'change_type': expected_item[0]})
+        elif expected_item is None:
+            result.add_extra({'code': code, 'change_type': actual_item[0]})
+        elif expected_item[0] != actual_item[0]:
+            result.add_changed(code, ['change_type'])
+        elif expected_item[0] != ChangeType.DELETE and actual_item[1] is not None:
+            actual_fields = {name: value for name, value in actual_item[1].items() if name not in skipped}
+            different = changed_fields(expected_item[1], actual_fields, strict=False)
+            if different:
+                result.add_changed(code, different)
+    return result
@@ -0,0 +1,81 @@
+import heapq
+import json
+import shutil
+import tempfile
+from os import path
+
+DEFAULT_RUN_SIZE = 50000
+
+
+class ExternalSorter(object):
+    """
+    Sorts (key, value) pairs of any count in bounded memory.
+
+    Pairs are sorted in runs of `run_size`, every run is spilled to a temporary file as JSON lines
+    and the runs are lazily merged back. Keys and values must be JSON serializable, keys comparable.
+    """
+
+    def __init__(self, run_size=DEFAULT_RUN_SIZE, tmp_dir=None):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+
+    def sorted(self, pairs):
+        work_dir = tempfile.mkdtemp(prefix='external_sort_', dir=self.tmp_dir)
+        try:
+            runs = []
+            run = []
+            for pair in pairs:
+                run.append(pair)
+                if len(run) >= self.run_size:
+                    runs.append(self._spill(work_dir, len(runs), run))
+                    run = []
+            if not runs:
+                # everything fits into one run, no need to touch disk
+                yield from sorted(run, key=lambda pair: pair[0])
+                return
+            if run:
+                runs.append(self._spill(work_dir, len(runs), run))
+            files = [open(run_path, encoding='utf-8') for run_path in runs]
+            try:
+                yield from heapq.merge(*[self._read(f) for f in files], key=lambda pair: pair[0])
+            finally:
+                for f in files:
+                    f.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _spill(work_dir, index, run):
+        run.sort(key=lambda pair: pair[0])
+        run_path = path.join(work_dir, 'run_{}.jsonl'.format(index))
+        with open(run_path, 'w', encoding='utf-8') as f:
+            for key, value in run:
+                f.write(json.dumps([key, value], ensure_ascii=False))
+                f.write('\n')
+        return run_path
+
+    @staticmethod
+    def _read(f):
+        for line in f:
+            key, value = json.loads(line)
+            yield key, value
+
+
+def merge_join(left, right):
+    """
+    Joins two key-sorted (key, value) streams, yields (key, left value or None, right value or None).
+    Duplicate keys are paired in order of appearance.
+    """
+    left, right = iter(left), iter(right)
+    sentinel = object()
+    l_item, r_item = next(left, sentinel), next(right, sentinel)
+    while l_item is not sentinel or r_item is not sentinel:
+        if r_item is sentinel or (l_item is not sentinel and l_item[0] < r_item[0]):
+            yield l_item[0], l_item[1], None
+            l_item = next(left, sentinel)
+        elif l_item is sentinel or r_item[0] < l_item[0]:
+            yield r_item[0], None, r_item[1]
+            r_item = next(right, sentinel)
+        else:
+            yield l_item[0], l_item[1], r_item[1]
+            l_item, r_item = next(left, sentinel), next(right, sentinel)
@@ -0,0 +1,382 @@
+import io
+import json
+import os
+import random
+import uuid
+import zipfile
+from collections import OrderedDict
+
+CATALOG_FILES = OrderedDict([
+    ('currencies.json', 'currencies'),
+    ('entitlements.json', 'entitlements'),
+    ('filter_properties.json', 'filter_properties'),
+    ('products.json', 'products'),
+    ('storefronts.json', 'storefronts'),
+    ('overrides.json', 'overrides'),
+    ('promotions.json', 'promotions'),
+    ('coupons.json', 'coupons'),
+])
+
+# shares of entity types in a generated catalog, taken from test_catalog
+ENTITY_SHARES = OrderedDict([
+    ('products', 0.4),
+    ('entitlements', 0.25),
+    ('storefronts', 0.1),
+    ('overrides', 0.1),
+    ('promotions', 0.15),
+])
+
+
+class CatalogSpec(object):
+    """
+    Shape of a generated catalog: entity counts and how rich every entity is
+    """
+
+    def __init__(self, title_code, catalog_code=None, products=1000, entitlements=500, currencies=10,
+                 storefronts=100, overrides=100, promotions=100, filter_properties=10, coupons=0,
+                 languages=('en', 'ru'), tags=20, tags_per_entity=3, category_depth=2, categories_per_level=4,
+                 seed=0):
+        self.title_code = title_code
+        self.catalog_code = catalog_code or '{}-MAIN-1'.format(title_code)
+        self.products = products
+        self.entitlements = entitlements
+        self.currencies = currencies
+        self.storefronts = storefronts
+        self.overrides = overrides
+        self.promotions = promotions
+        self.filter_properties = filter_properties
+        self.coupons = coupons
+        self.languages = tuple(languages)
+        self.tags = tags
+        self.tags_per_entity = tags_per_entity
+        self.category_depth = category_depth
+        self.categories_per_level = categories_per_level
+        self.seed = seed
+
+    @classmethod
+    def with_total_entities(cls, title_code, total, **kwargs):
+        counts = {name: max(1, int(total * share)) for name, share in ENTITY_SHARES.items()}
+        counts.update(kwargs)
+        return cls(title_code, **counts)
+
+    @property
+    def total_entities(self):
+        return sum(getattr(self, name) for name in CATALOG_FILES.values())
+
+
+class CatalogGenerator(object):
+    """
+    Yields catalog entities one by one, so a catalog of any size is never held in memory.
+
+    Entities reference each other only by generated codes (`product_0000042`), which are
+    computed from indexes instead of being looked up.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def _random(self, entity_type):
+        return random.Random('{}:{}'.format(self.spec.seed, entity_type))
+
+    @staticmethod
+    def _uuid(rnd):
+        return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+    @staticmethod
+    def code(entity_type, index):
+        return '{}_{:07d}'.format(entity_type, index)
+
+    def currency_code(self, index):
+        return self.code('currency', index % self.spec.currencies)
+
+    def _tags(self, rnd):
+        if not self.spec.tags:
+            return []
+        count = min(self.spec.tags_per_entity, self.spec.tags)
+        return ['tag_{}'.format(i) for i in sorted(rnd.sample(range(self.spec.tags), count))]
+
+    def _loc_string(self, text):
+        return {
+            '@type': 'LocString',
+            'data': OrderedDict((language, '{} {}'.format(text, language)) for language in self.spec.languages)
+        }
+
+    def _metadata(self, text):
+        return {
+            'wot': {
+                'name': self._loc_string(text),
+                'description': self._loc_string('Description of ' + text)
+            }
+        }
+
+    def categories(self):
+        """
+        Returns {code: {"parent": parent_code}} of the category tree, leaves are listed last
+        """
+        categories = OrderedDict()
+        level = [None]
+        for depth in range(self.spec.category_depth):
+            next_level = []
+            for parent in level:
+                for i in range(self.spec.categories_per_level):
+                    code = '{}_{}'.format(parent, i) if parent else 'category_{}'.format(i)
+                    category = OrderedDict([('activate_at', '1520174000'), ('deactivate_at', '1893456000')])
+                    if parent:
+                        category['parent'] = parent
+                    categories[code] = category
+                    next_level.append(code)
+            level = next_level
+        return categories
+
+    def leaf_categories(self):
+        return [code for code in self.categories() if code.count('_') == self.spec.category_depth]
+
+    def currencies(self):
+        rnd = self._random('currency')
+        for i in range(self.spec.currencies):
+            yield OrderedDict([
+                ('currency_id', self._uuid(rnd)),
+                ('metadata', self._metadata('Currency {}'.format(i))),
+                ('currency_code', self.code('currency', i)),
+                ('type', 'VIRTUAL'),
+                ('friendly_name', 'Currency {}'.format(i)),
+                ('fraction_digit_count', 0),
+                ('active', True),
+                ('reported', True),
+                ('exchange', {}),
+            ])
+
+    def entitlements(self):
+        rnd = self._random('entitlement')
+        for i in range(self.spec.entitlements):
+            yield OrderedDict([
+                ('entitlement_id', self._uuid(rnd)),
+                ('entitlement_code', self.code('entitlement', i)),
+                ('type', 'OWNERSHIP'),
+                ('tags', self._tags(rnd)),
+                ('friendly_name', 'Entitlement {}'.format(i)),
+                ('max_amount', 0),
+                ('relationships', []),
+                ('title_code', self.spec.title_code),
+                ('catalog', self.spec.catalog_code),
+                ('version', 1),
+                ('reported', False),
+                ('metadata', self._metadata('Entitlement {}'.format(i))),
+                ('active', True),
+                ('compensation', {'type': 'NONE', 'amount': 0}),
+                ('max_amount_global', 0),
+            ])
+
+    def filter_properties(self):
+        rnd = self._random('filter_property')
+        entities = ('entitlement', 'product')
+        for i in range(self.spec.filter_properties):
+            yield OrderedDict([
+                ('id', self._uuid(rnd)),
+                ('code', self.code('filter_property', i)),
+                ('entity', entities[i % len(entities)]),
+                ('value_type', 'string'),
+                ('metadata', {'name': self._loc_string('Filter property {}'.format(i))}),
+            ])
+
+    def products(self):
+        rnd = self._random('product')
+        leaves = self.leaf_categories()
+        for i in range(self.spec.products):
+            entitlements = []
+            if self.spec.entitlements:
+                entitlements.append(OrderedDict([
+                    ('code', self.code('entitlement', i % self.spec.entitlements)),
+                    ('amount', 1),
+                    ('expiration_type', 'NONE'),
+                    ('expiration_seconds', '0'),
+                    ('compensation', {'type': 'NONE', 'amount': 0}),
+                    ('metadata', {}),
+                ]))
+            virtual_prices = []
+            if self.spec.currencies:
+                virtual_prices.append(OrderedDict([
+                    ('code', self.currency_code(i)),
+                    ('amount', str(rnd.randint(1, 100000))),
+                    ('expiration_seconds', '0'),
+                ]))
+            product = OrderedDict([
+                ('id', self._uuid(rnd)),
+                ('title_code', self.spec.title_code),
+                ('catalog', self.spec.catalog_code),
+                ('type', 'PLACEHOLDER'),
+                ('tags', self._tags(rnd)),
+                ('code', self.code('product', i)),
+                ('friendly_name', 'Product {}'.format(i)),
+                ('currencies', []),
+                ('entitlements', entitlements),
+                ('prices', OrderedDict([
+                    ('virtual_currency_price', virtual_prices),
+                    ('base_real_money_prices', {}),
+                    ('real_money_overrides', {}),
+                    ('variable_price', {}),
+                ])),
+                ('prerequisites', []),
+                ('giftable', False),
+                ('actions', []),
+                ('bonus_sets', []),
+                ('spa_access', []),
+                ('restricted', []),
+                ('payment_group', []),
+                ('notification_single_purchase', {}),
+                ('metadata', self._metadata('Product {}'.format(i))),
+                ('fulfillment_type', 'COMPENSATION'),
+                ('merge_quantity', True),
+                ('rewards', []),
+                ('visible', True),
+                ('purchasable', True),
+            ])
+            if leaves:
+                product['categories'] = [leaves[i % len(leaves)]]
+            yield product
+
+    def storefront_products(self, index):
+        # products are split between storefronts in contiguous chunks
+        if not self.spec.storefronts:
+            return range(0)
+        chunk = -(-self.spec.products // self.spec.storefronts)
+        return range(index * chunk, min((index + 1) * chunk, self.spec.products))
+
+    def storefronts(self):
+        rnd = self._random('storefront')
+        categories = self.categories()
+        for i in range(self.spec.storefronts):
+            storefront = OrderedDict([
+                ('storefront_id', self._uuid(rnd)),
+                ('metadata', self._metadata('Storefront {}'.format(i))),
+                ('title_code', self.spec.title_code),
+                ('code', self.code('storefront', i)),
+                ('friendly_name', 'Storefront {}'.format(i)),
+                ('catalog', self.spec.catalog_code),
+                ('version', 1),
+                ('product_references', [{'code': self.code('product', p)} for p in self.storefront_products(i)]),
+                ('tags_query', []),
+                ('metadata_query', []),
+                ('metadata_namespace_filter', []),
+            ])
+            if categories:
+                storefront['categories'] = categories
+            yield storefront
+
+    def overrides(self):
+        rnd = self._random('override')
+        for i in range(self.spec.overrides):
+            product_code = self.code('product', i % self.spec.products) if self.spec.products else '*'
+            yield OrderedDict([
+                ('overrides', {
+                    product_code: {
+                        'discounts': [OrderedDict([
+                            ('type', 'PCT_PRO'),
+                            ('value', str(rnd.randint(1, 90))),
+                            ('vc_currency', self.currency_code(i) if self.spec.currencies else ''),
+                            ('rm_zone', ''),
+                            ('rm_country', ''),
+                        ])],
+                        'fields': {'metadata': {}}
+                    }
+                }),
+                ('id', self._uuid(rnd)),
+                ('metadata', {}),
+                ('title_code', self.spec.title_code),
+                ('code', self.code('override', i)),
+                ('friendly_name', 'Override {}'.format(i)),
+            ])
+
+    def promotions(self):
+        rnd = self._random('promotion')
+        for i in range(self.spec.promotions):
+            refs = OrderedDict()
+            for name, entity_type, count in (('override_refs', 'override', self.spec.overrides),
+                                             ('product_refs', 'product', self.spec.products),
+                                             ('storefront_refs', 'storefront', self.spec.storefronts)):
+                refs[name] = [{'title_code': self.spec.title_code, 'code': self.code(entity_type, i % count)}] \
+                    if count else []
+            yield OrderedDict([
+                ('id', self._uuid(rnd)),
+                ('metadata', self._metadata('Promotion {}'.format(i))),
+                ('title_code', self.spec.title_code),
+                ('code', self.code('promotion', i)),
+                ('start_time', '500'),
+                ('end_time', '4676462000'),
+                ('friendly_name', 'Promotion {}'.format(i)),
+                ('override_refs', refs['override_refs']),
+                ('product_refs', refs['product_refs']),
+                ('storefront_refs', refs['storefront_refs']),
+                ('friendly_description', 'Generated promotion {}'.format(i)),
+            ])
+
+    def coupons(self):
+        rnd = self._random('coupon')
+        for i in range(self.spec.coupons):
+            yield OrderedDict([
+                ('id', self._uuid(rnd)),
+                ('metadata', {}),
+                ('code', self.code('coupon', i)),
+            ])
+
+
+def write_json_array(binary_file, entities, buffer_size=1024 * 1024):
+    count = 0
+    with io.TextIOWrapper(io.BufferedWriter(binary_file, buffer_size), encoding='utf-8') as text_file:
+        text_file.write('[')
+        for entity in entities:
+            if count:
+                text_file.write(',\n')
+            text_file.write(json.dumps(entity, ensure_ascii=False))
+            count += 1
+        text_file.write(']')
+    return count
+
+
+def write_catalog_zip(target, spec):
+    """
+    Streams a generated catalog into a ZIP archive entity by entity.
+
+    :param target: path or writable binary file object
+    :return: {file name: number of entities written}
+    """
+    generator = CatalogGenerator(spec)
+    written = OrderedDict()
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as catalog_zip:
+        for file_name, entity_type in CATALOG_FILES.items():
+            if entity_type == 'coupons' and not spec.coupons:
+                continue
+            with catalog_zip.open(file_name, 'w', force_zip64=True) as catalog_file:
+                written[file_name] = write_json_array(catalog_file, getattr(generator, entity_type)())
+    return written
+
+
+def wiremock_mapping(catalog_file):
+    return OrderedDict([
+        ('request', OrderedDict([
+            ('method', 'GET'),
+            ('url', '/' + catalog_file),
+        ])),
+        ('response', OrderedDict([
+            ('status', 200),
+            ('headers', {'Content-Type': 'application/octet-stream'}),
+            ('bodyFileName', 'catalogs/' + catalog_file),
+        ])),
+    ])
+
+
+def write_wiremock_mapping(mappings_path, catalog_file):
+    mapping_path = os.path.join(mappings_path, os.path.splitext(catalog_file)[0] + '.json')
+    with open(mapping_path, 'w') as f:
+        json.dump(wiremock_mapping(catalog_file), f, indent=2)
+    return mapping_path
+
+
+def generate_catalog(files_path, catalog_file, spec, mappings_path=None):
+    """
+    Writes `catalogs/<catalog_file>` under wiremock `__files` and, optionally, a mapping serving it
+    """
+    written = write_catalog_zip(os.path.join(files_path, 'catalogs', catalog_file), spec)
+    if mappings_path is not None:
+        write_wiremock_mapping(mappings_path, catalog_file)
+    return written
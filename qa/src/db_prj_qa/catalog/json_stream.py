@@ -0,0 +1,67 @@
+import io
+import json
+
+WHITESPACE = ' \t\n\r'
+
+
+def text_stream(f):
+    return io.TextIOWrapper(f, encoding='utf-8') if not isinstance(f, io.TextIOBase) else f
+
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """
+    Yields elements of a top-level JSON array one by one.
+
+    Only the element being decoded is kept in memory, so arrays of any size can be read
+    from a file or a zip member.
+
+    :param f: text or binary file object
+    """
+    f = text_stream(f)
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    read_size = chunk_size
+    started = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and (buffer[pos] in WHITESPACE or (started and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of JSON array')
+            read_more()
+            continue
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError('JSON array expected, got {!r}'.format(buffer[pos:pos + 20]))
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            # element is split between chunks, read bigger chunks for big elements
+            read_more()
+            read_size *= 2
+            continue
+        if end == len(buffer) and not eof:
+            # a number could continue in the next chunk
+            read_more()
+            continue
+        read_size = chunk_size
+        pos = end
+        yield element
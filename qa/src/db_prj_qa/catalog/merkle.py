@@ -0,0 +1,167 @@
+import hashlib
+import io
+import zipfile
+from collections import OrderedDict
+
+from np_cats_qa.catalog.compare import CATALOG_FILE_KEYS, ENTITY_TYPE_FILES, canonical_json
+from np_cats_qa.catalog.external_sort import merge_join
+from np_cats_qa.catalog.json_stream import iter_json_array
+
+DEFAULT_BUCKET_BITS = 8
+HASH_MODULUS = 2 ** 256
+
+
+def sha256(data):
+    return hashlib.sha256(data.encode('utf-8') if isinstance(data, str) else data).digest()
+
+
+def entity_hash(entity, ignore_fields=()):
+    if ignore_fields:
+        entity = {key: value for key, value in entity.items() if key not in ignore_fields}
+    return sha256(canonical_json(entity))
+
+
+class TypeDigest(object):
+    """
+    Hash tree of one entity type: root <- 2 ** bucket_bits buckets <- entities.
+
+    An entity goes to the bucket selected by the hash of its key; a bucket hash is the sum of
+    hashes of its (key, entity hash) leaves modulo 2 ** 256, so the digest does not depend on the
+    order entities come in and is built in one pass with memory for the buckets only.
+    """
+
+    def __init__(self, entity_type, key, bucket_bits=DEFAULT_BUCKET_BITS):
+        self.entity_type = entity_type
+        self.key = key
+        self.bucket_bits = bucket_bits
+        self.buckets = [0] * (2 ** bucket_bits)
+        self.counts = [0] * (2 ** bucket_bits)
+
+    def bucket(self, key):
+        return int.from_bytes(sha256(str(key))[:4], 'big') >> (32 - self.bucket_bits)
+
+    def add(self, entity, ignore_fields=()):
+        key = entity[self.key]
+        leaf = sha256(sha256(str(key)) + entity_hash(entity, ignore_fields))
+        index = self.bucket(key)
+        self.buckets[index] = (self.buckets[index] + int.from_bytes(leaf, 'big')) % HASH_MODULUS
+        self.counts[index] += 1
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def bucket_hash(self, index):
+        return sha256(self.counts[index].to_bytes(8, 'big') + self.buckets[index].to_bytes(32, 'big'))
+
+    @property
+    def root(self):
+        return sha256(b''.join(self.bucket_hash(index) for index in range(len(self.buckets)))).hex()
+
+    def different_buckets(self, other):
+        assert self.bucket_bits == other.bucket_bits, 'digests are built with different bucket_bits'
+        return [index for index in range(len(self.buckets))
+                if (self.buckets[index], self.counts[index]) != (other.buckets[index], other.counts[index])]
+
+
+class CatalogDigest(object):
+    def __init__(self, types):
+        self.types = types
+
+    @property
+    def root(self):
+        return sha256(''.join('{}:{}'.format(entity_type, digest.root)
+                              for entity_type, digest in sorted(self.types.items()))).hex()
+
+    def different_types(self, other):
+        entity_types = sorted(set(self.types) | set(other.types))
+        return [entity_type for entity_type in entity_types
+                if entity_type not in self.types or entity_type not in other.types or
+                self.types[entity_type].root != other.types[entity_type].root]
+
+    def as_dict(self):
+        return OrderedDict([
+            ('root', self.root),
+            ('types', OrderedDict((entity_type, {'root': digest.root, 'count': digest.count})
+                                  for entity_type, digest in self.types.items())),
+        ])
+
+
+def digest_entities(entities, entity_type, bucket_bits=DEFAULT_BUCKET_BITS, ignore_fields=()):
+    digest = TypeDigest(entity_type, CATALOG_FILE_KEYS[ENTITY_TYPE_FILES[entity_type]], bucket_bits)
+    for entity in entities:
+        digest.add(entity, ignore_fields)
+    return digest
+
+
+def catalog_zip_entities(catalog_zip, entity_type):
+    """
+    Streams entities of one type from a catalog zip (path, bytes or binary file object)
+    """
+    if isinstance(catalog_zip, bytes):
+        catalog_zip = io.BytesIO(catalog_zip)
+    with zipfile.ZipFile(catalog_zip) as archive:
+        file_name = ENTITY_TYPE_FILES[entity_type]
+        if file_name not in archive.namelist():
+            return
+        with archive.open(file_name) as f:
+            yield from iter_json_array(f)
+
+
+def digest_catalog_zip(catalog_zip, entity_types=None, bucket_bits=DEFAULT_BUCKET_BITS, ignore_fields=()):
+    """
+    Digest of a catalog zip: the source served by wiremock or the one downloaded from cats.
+    A type without its file in the zip gets the digest of no entities.
+    """
+    if isinstance(catalog_zip, bytes):
+        catalog_zip = io.BytesIO(catalog_zip)
+    return CatalogDigest(OrderedDict(
+        (entity_type, digest_entities(catalog_zip_entities(catalog_zip, entity_type), entity_type, bucket_bits,
+                                      ignore_fields))
+        for entity_type in entity_types or ENTITY_TYPE_FILES))
+
+
+def api_entities(is_http, catalog_code, entity_type):
+    response = is_http.cats.get_entities_by_type_and_catalog_code(catalog_code, entity_type)
+    assert response.status_code == 200, 'entities of {} are not returned: {}'.format(entity_type, response.text)
+    return response.json()
+
+
+def digest_catalog_api(is_http, catalog_code, entity_types, bucket_bits=DEFAULT_BUCKET_BITS, ignore_fields=()):
+    """
+    Digest of a published catalog built from `get_entities_by_type_and_catalog_code` responses
+    """
+    return CatalogDigest(OrderedDict(
+        (entity_type, digest_entities(api_entities(is_http, catalog_code, entity_type), entity_type, bucket_bits,
+                                      ignore_fields))
+        for entity_type in entity_types))
+
+
+def bucket_entities(entities, digest, buckets, ignore_fields=()):
+    """
+    Key-sorted (key, entity hash) of entities falling into `buckets` only
+    """
+    buckets = set(buckets)
+    leaves = [(entity[digest.key], entity_hash(entity, ignore_fields)) for entity in entities
+              if digest.bucket(entity[digest.key]) in buckets]
+    return sorted(leaves, key=lambda leaf: leaf[0])
+
+
+def drill_down(expected_entities, actual_entities, expected_digest, actual_digest, ignore_fields=()):
+    """
+    Re-reads both sides but keeps only entities of differing buckets, returns missing, extra and changed keys
+    """
+    buckets = expected_digest.different_buckets(actual_digest)
+    result = OrderedDict([('missing', []), ('extra', []), ('changed', [])])
+    if not buckets:
+        return result
+    expected = bucket_entities(expected_entities, expected_digest, buckets, ignore_fields)
+    actual = bucket_entities(actual_entities, actual_digest, buckets, ignore_fields)
+    for key, expected_hash, actual_hash in merge_join(expected, actual):
+        if actual_hash is None:
+            result['missing'].append(key)
+        elif expected_hash is None:
+            result['extra'].append(key)
+        elif expected_hash != actual_hash:
+            result['changed'].append(key)
+    return result
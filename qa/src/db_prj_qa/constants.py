@@ -84,6 +84,7 @@ class TitleCode(object):
     PUBLISH_NEW_CATALOG = 'ru.publish_new_catalog'
     CATALOG_PUBLICATIONS = 'ru.catalog_publications'
     CATALOG_MIGRATION = 'ru.migration'
+    PERF = 'ru.perf'
 
 class Currency(object):
     SACOIN = 'sacoin'
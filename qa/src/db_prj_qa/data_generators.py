@@ -1,27 +1,43 @@
 import random
 import string
-import time
 from datetime import datetime
 
+from np_cats_qa.sequences import catalog_versions, timestamps, worker_index
+
+# TCS mock has `<title>_1` ... `<title>_15` titles for xdist workers besides the first one
+WORKER_TITLES = 15
+
 
 def generate_title_code():
     return 'ru.' + ''.join(random.choices(string.ascii_lowercase, k=5))
 
 
+def generate_worker_title_code(title_code):
+    """
+    Title of the current xdist worker: the first worker (and a run without xdist) keeps `title_code`
+    """
+    index = worker_index()
+    if not index:
+        return title_code
+    assert index <= WORKER_TITLES, 'TCS mock has titles for {} xdist workers only'.format(WORKER_TITLES + 1)
+    return '{}_{}'.format(title_code, index)
+
+
 def generate_catalog_code(title_code):
-    return title_code + '-MAIN-' + str(round(time.time()))
+    return title_code + '-MAIN-' + str(catalog_versions.next())
 
 
 def generate_catalog_code_next(title_code):
-    return title_code + '-MAIN-' + str(round(time.time()) + 1)
+    # leaves a version for a code generated now, as the version of the current second + 1 did
+    return title_code + '-MAIN-' + str(catalog_versions.next(skip=1))
 
 
 def generate_coupon_catalog_code(title_code):
-    return title_code + '-COUPON-' + str(round(time.time()))
+    return title_code + '-COUPON-' + str(catalog_versions.next())
 
 
 def generate_coupon_catalog_code_next(title_code):
-    return title_code + '-COUPON-' + str(round(time.time()) + 1)
+    return title_code + '-COUPON-' + str(catalog_versions.next(skip=1))
 
 
 def generate_catalog_url(yaml_config, catalog_zip):
@@ -33,5 +49,6 @@ def generate_catalog_code_with_random_title_code(title_code=generate_title_code(
 
 
 def generate_string_datetime():
-    time.sleep(0.002)
-    return "{}Z".format(datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3])
+    # every call returns a later millisecond than the previous one
+    moment = datetime.utcfromtimestamp(timestamps.next() / 1000.0)
+    return "{}Z".format(moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3])
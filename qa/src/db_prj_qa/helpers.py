@@ -1,15 +1,36 @@
 import os
 import random
 import time
-from collections import MutableMapping
-from contextlib import suppress
+from contextlib import contextmanager
 
-from ulid2 import generate_ulid_as_base32
 from waiting import wait as wait_lib
 
+from np_cats_qa.sequences import ulids
+
 WAIT_TIMEOUT = int(os.environ.setdefault('TIMEOUT', '60'))
 
 
+class WaitTimer(object):
+    """
+    Total seconds the process spent waiting: inside `wait()`, task status listener and batch waiter waits.
+    Read by the durations plugin
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+wait_timer = WaitTimer()
+
+
 def wait(*args, **kwargs):
     """
     Wrapping 'wait()' method of 'waiting' library with default parameter values
@@ -17,7 +38,8 @@ def wait(*args, **kwargs):
     params = {'timeout_seconds': WAIT_TIMEOUT,
               'sleep_seconds': (1, None)}
     params.update(kwargs)
-    return wait_lib(*args, **params)
+    with wait_timer.measure():
+        return wait_lib(*args, **params)
 
 
 def random_id():
@@ -25,18 +47,8 @@ def random_id():
 
 
 def ulid():
-    # to exclude the same time ulid generation
-    time.sleep(0.1)
-    return generate_ulid_as_base32()
-
-
-def delete_keys_from_dict(dictionary, keys):
-    for key in keys:
-        with suppress(KeyError):
-            del dictionary[key]
-    for value in dictionary.values():
-        if isinstance(value, MutableMapping):
-            delete_keys_from_dict(value, keys)
+    # monotonic within the process and unique across xdist workers, no need to wait for the next millisecond
+    return ulids.next()
 
 
 def remove_nested_element(element, fields_to_remove):
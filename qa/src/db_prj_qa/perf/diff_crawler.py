@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from np_cats_qa.perf.histogram import LatencyHistogram, DEFAULT_PERCENTILES
+
+
+class PageStat(object):
+    def __init__(self, index, last_id, items, seconds, status_code):
+        self.index = index
+        self.last_id = last_id
+        self.items = items
+        self.seconds = seconds
+        self.status_code = status_code
+
+    def as_dict(self):
+        return OrderedDict([
+            ('page', self.index),
+            ('last_id', self.last_id),
+            ('items', self.items),
+            ('seconds', self.seconds),
+            ('status_code', self.status_code),
+        ])
+
+
+class CrawlResult(object):
+    """
+    Change stream of one entity type assembled from all its pages.
+
+    Ids of keyset pages must strictly increase: an id seen twice is a duplicate and an id not greater
+    than the previous one means a page overlapped or skipped a window of the stream.
+    """
+
+    def __init__(self, entity_type, limit, keep_items=True):
+        self.entity_type = entity_type
+        self.limit = limit
+        self.keep_items = keep_items
+        self.items = []
+        self.pages = []
+        self.latency = LatencyHistogram()
+        self.ids = set()
+        self.codes = set()
+        self.duplicates = []
+        self.out_of_order = []
+        self.errors = 0
+        self.seconds = 0.0
+        self._previous_id = None
+
+    def add_page(self, last_id, items, seconds, status_code):
+        self.pages.append(PageStat(len(self.pages), last_id, len(items), seconds, status_code))
+        self.latency.record(seconds)
+        if status_code != 200:
+            self.errors += 1
+            return
+        for item in items:
+            if item['id'] in self.ids:
+                self.duplicates.append(item['id'])
+            elif self._previous_id is not None and item['id'] <= self._previous_id:
+                self.out_of_order.append(item['id'])
+            self.ids.add(item['id'])
+            self.codes.add(item['code'])
+            self._previous_id = item['id']
+            if self.keep_items:
+                self.items.append(item)
+
+    @property
+    def count(self):
+        return len(self.ids)
+
+    def gaps(self, expected_codes):
+        """
+        Codes of the expected change stream (e.g. computed by the diff oracle) which no page returned
+        """
+        return sorted(code for code in expected_codes if code not in self.codes)
+
+    def late_page_growth(self):
+        """
+        Mean latency of the last quarter of full pages divided by the one of the first quarter
+        """
+        seconds = [page.seconds for page in self.pages if page.items == self.limit]
+        quarter = len(seconds) // 4
+        if not quarter:
+            return 1.0
+        first = sum(seconds[:quarter]) / quarter
+        last = sum(seconds[-quarter:]) / quarter
+        return last / first if first else 1.0
+
+    def as_dict(self, percentiles=DEFAULT_PERCENTILES):
+        return OrderedDict([
+            ('entity_type', self.entity_type),
+            ('limit', self.limit),
+            ('items', self.count),
+            ('pages', len(self.pages)),
+            ('errors', self.errors),
+            ('seconds', self.seconds),
+            ('duplicates', self.duplicates[:20]),
+            ('out_of_order', self.out_of_order[:20]),
+            ('late_page_growth', self.late_page_growth()),
+            ('page_latency', self.latency.percentiles(percentiles)),
+        ])
+
+
+class DiffCrawler(object):
+    """
+    Walks diff endpoints of several entity types concurrently with `last_id`/`limit` paging.
+
+    Pages of one type are requested one after another, as `last_id` of a page is the last id of the
+    previous one; up to `concurrency` types are crawled at once over the async client.
+
+    :type cats: np_cats_qa.steps.http.cats_async.AsyncCatalogServiceSteps
+    """
+
+    def __init__(self, cats, destination_catalog_code, source_catalog_code=None, limit=1000, concurrency=8,
+                 fields=None, keep_items=True):
+        self.cats = cats
+        self.destination_catalog_code = destination_catalog_code
+        self.source_catalog_code = source_catalog_code
+        self.limit = limit
+        self.concurrency = concurrency
+        self.fields = fields
+        self.keep_items = keep_items
+
+    async def _page(self, entity_type, last_id):
+        if self.source_catalog_code is None:
+            return await self.cats.get_initial_diff_by_type_and_catalog_code(
+                self.destination_catalog_code, entity_type, fields=self.fields, last_id=last_id, limit=self.limit)
+        return await self.cats.get_diff_by_type_and_catalog_code(
+            self.destination_catalog_code, entity_type, self.source_catalog_code, fields=self.fields,
+            last_id=last_id, limit=self.limit)
+
+    async def crawl_type(self, entity_type, semaphore):
+        result = CrawlResult(entity_type, self.limit, keep_items=self.keep_items)
+        async with semaphore:
+            started = time.perf_counter()
+            last_id = None
+            while True:
+                page_started = time.perf_counter()
+                response = await self._page(entity_type, last_id)
+                items = response.json() if response.status_code == 200 else []
+                result.add_page(last_id, items, time.perf_counter() - page_started, response.status_code)
+                if not items:
+                    break
+                last_id = items[-1]['id']
+            result.seconds = time.perf_counter() - started
+        return result
+
+    async def crawl(self, entity_types):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*[self.crawl_type(entity_type, semaphore) for entity_type in entity_types])
+        return OrderedDict(zip(entity_types, results))
+
+
+def limit_sweep_row(limit, results, seconds):
+    latency = LatencyHistogram()
+    for result in results.values():
+        latency.add(result.latency)
+    items = sum(result.count for result in results.values())
+    return OrderedDict([
+        ('limit', limit),
+        ('items', items),
+        ('pages', sum(len(result.pages) for result in results.values())),
+        ('seconds', seconds),
+        ('items_per_second', items / seconds if seconds else 0.0),
+        ('page_p50', latency.value_at_percentile(50)),
+        ('page_p99', latency.value_at_percentile(99)),
+        ('late_page_growth', max([result.late_page_growth() for result in results.values()] or [1.0])),
+    ])
+
+
+async def sweep_limits(cats, destination_catalog_code, entity_types, limits, source_catalog_code=None,
+                       concurrency=8, fields=None):
+    """
+    Crawls the same diff with every page size in `limits`, returns one summary row per limit
+    """
+    rows = []
+    for limit in limits:
+        crawler = DiffCrawler(cats, destination_catalog_code, source_catalog_code, limit=limit,
+                              concurrency=concurrency, fields=fields, keep_items=False)
+        started = time.perf_counter()
+        results = await crawler.crawl(entity_types)
+        rows.append(limit_sweep_row(limit, results, time.perf_counter() - started))
+    return rows
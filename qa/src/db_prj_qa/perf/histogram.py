@@ -0,0 +1,71 @@
+import math
+from collections import defaultdict
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9, 99.99, 100)
+
+
+class LatencyHistogram(object):
+    """
+    HDR-style histogram of latencies in microseconds.
+
+    Values are grouped into log-linear buckets: every power of two is split into
+    2 ** sub_bucket_bits equal buckets, so the relative error of a reported value
+    never exceeds 2 ** (1 - sub_bucket_bits) (~0.1% with the default 11 bits)
+    while memory stays proportional to the number of distinct buckets used.
+    """
+
+    def __init__(self, sub_bucket_bits=11):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = defaultdict(int)
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self._sum = 0
+
+    def _bucket(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (value >> shift) << shift, shift
+
+    def record(self, seconds, count=1):
+        value = max(0, int(round(seconds * 1000000)))
+        lowest, _ = self._bucket(value)
+        self.counts[lowest] += count
+        self.total_count += count
+        self._sum += value * count
+        self.max_value = max(self.max_value, value)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+
+    def add(self, other):
+        for lowest, count in other.counts.items():
+            self.counts[lowest] += count
+        self.total_count += other.total_count
+        self._sum += other._sum
+        self.max_value = max(self.max_value, other.max_value)
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+
+    def mean(self):
+        if not self.total_count:
+            return 0.0
+        return self._sum / self.total_count / 1000000
+
+    def value_at_percentile(self, percentile):
+        """
+        Returns the latency in seconds below which `percentile` percent of the recorded values fall
+        """
+        if not self.total_count:
+            return 0.0
+        if percentile >= 100:
+            return self.max_value / 1000000
+        target = max(1, int(math.ceil(percentile / 100.0 * self.total_count)))
+        seen = 0
+        for lowest in sorted(self.counts):
+            seen += self.counts[lowest]
+            if seen >= target:
+                _, shift = self._bucket(lowest)
+                highest = lowest + (1 << shift) - 1
+                return min(highest, self.max_value) / 1000000
+        return self.max_value / 1000000
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        return {p: self.value_at_percentile(p) for p in percentiles}
@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from np_cats_qa.constants import CatalogTypes, EntityType
+from np_cats_qa.data_generators import generate_catalog_code
+from np_cats_qa.helpers import ulid
+from np_cats_qa.perf.histogram import LatencyHistogram, DEFAULT_PERCENTILES
+
+
+class Operation(object):
+    def __init__(self, name, func, weight=1, is_error=None):
+        self.name = name
+        self.func = func
+        self.weight = weight
+        self.is_error = is_error or response_is_error
+
+
+def response_is_error(response):
+    return getattr(response, 'status_code', 200) >= 400
+
+
+class EndpointStats(object):
+    """
+    Per-endpoint results of a load run.
+
+    `latency` is measured from the moment the request was scheduled to be sent, so time spent
+    queued behind slow requests is accounted for (coordinated omission correction).
+    `service_time` is measured from the moment the request was actually sent.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.errors = 0
+        self.statuses = Counter()
+
+    @property
+    def count(self):
+        return self.latency.total_count
+
+    def as_dict(self, duration_seconds, percentiles=DEFAULT_PERCENTILES):
+        return OrderedDict([
+            ('endpoint', self.name),
+            ('count', self.count),
+            ('errors', self.errors),
+            ('rps', self.count / duration_seconds if duration_seconds else 0.0),
+            ('statuses', dict(self.statuses)),
+            ('latency', self.latency.percentiles(percentiles)),
+            ('service_time', self.service_time.percentiles(percentiles)),
+        ])
+
+
+class LoadReport(object):
+    def __init__(self, target_rate, duration_seconds, endpoints, max_backlog):
+        self.target_rate = target_rate
+        self.duration_seconds = duration_seconds
+        self.endpoints = endpoints
+        self.max_backlog = max_backlog
+
+    @property
+    def total(self):
+        total = EndpointStats('total')
+        for stats in self.endpoints.values():
+            total.latency.add(stats.latency)
+            total.service_time.add(stats.service_time)
+            total.errors += stats.errors
+            total.statuses.update(stats.statuses)
+        return total
+
+    @property
+    def error_rate(self):
+        total = self.total
+        return total.errors / total.count if total.count else 0.0
+
+    def as_dict(self):
+        return OrderedDict([
+            ('target_rate', self.target_rate),
+            ('duration_seconds', self.duration_seconds),
+            ('max_backlog', self.max_backlog),
+            ('endpoints', [stats.as_dict(self.duration_seconds) for stats in self.endpoints.values()]),
+            ('total', self.total.as_dict(self.duration_seconds)),
+        ])
+
+    def format_table(self, percentiles=DEFAULT_PERCENTILES):
+        header = ['endpoint', 'count', 'errors', 'rps'] + ['p{}'.format(p) for p in percentiles]
+        rows = [header]
+        for stats in list(self.endpoints.values()) + [self.total]:
+            latency = stats.latency.percentiles(percentiles)
+            rows.append([stats.name, str(stats.count), str(stats.errors),
+                         '{:.1f}'.format(stats.count / self.duration_seconds if self.duration_seconds else 0.0)] +
+                        ['{:.1f}ms'.format(latency[p] * 1000) for p in percentiles])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+class OpenLoopLoadGenerator(object):
+    """
+    Sends requests at a fixed arrival rate regardless of how fast the service answers.
+
+    Request `i` is scheduled at `start + i / rate`; if all workers are busy it waits in the
+    executor queue and that waiting time is included into its latency.
+    """
+
+    def __init__(self, rate, duration_seconds, max_workers=64, warmup_seconds=0, seed=None):
+        self.rate = rate
+        self.duration_seconds = duration_seconds
+        self.max_workers = max_workers
+        self.warmup_seconds = warmup_seconds
+        self.operations = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def add_operation(self, name, func, weight=1, is_error=None):
+        self.operations.append(Operation(name, func, weight, is_error))
+        return self
+
+    def _call(self, operation, intended_start, measure_from, stats, started):
+        actual_start = time.perf_counter()
+        with self._lock:
+            started[0] += 1
+        response = None
+        failed = False
+        try:
+            response = operation.func()
+            failed = operation.is_error(response)
+        except Exception:
+            failed = True
+        finished = time.perf_counter()
+        if intended_start < measure_from:
+            return
+        with self._lock:
+            stats.latency.record(finished - intended_start)
+            stats.service_time.record(finished - actual_start)
+            stats.statuses[getattr(response, 'status_code', 'exception')] += 1
+            if failed:
+                stats.errors += 1
+
+    def run(self):
+        assert self.operations, 'no operations to run'
+        endpoints = OrderedDict((op.name, EndpointStats(op.name)) for op in self.operations)
+        weights = [op.weight for op in self.operations]
+        total_requests = int((self.warmup_seconds + self.duration_seconds) * self.rate)
+        interval = 1.0 / self.rate
+        started = [0]
+        max_backlog = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            start = time.perf_counter()
+            measure_from = start + self.warmup_seconds
+            for i in range(total_requests):
+                intended_start = start + i * interval
+                delay = intended_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                operation = self._random.choices(self.operations, weights)[0]
+                executor.submit(self._call, operation, intended_start, measure_from, endpoints[operation.name],
+                                started)
+                max_backlog = max(max_backlog, i + 1 - started[0])
+
+        return LoadReport(self.rate, self.duration_seconds, endpoints, max_backlog)
+
+
+def catalog_read_operations(cats, title_code, catalog_code, catalog_type=CatalogTypes.MAIN_TYPE,
+                            entity_types=(EntityType.PRODUCT, EntityType.STOREFRONT, EntityType.CURRENCY)):
+    """
+    Read-only endpoint mix of :class:`np_cats_qa.steps.http.cats.CatalogServiceSteps`
+    """
+    operations = [
+        ('get_active_catalog_by_title_code', lambda: cats.get_active_catalog_by_title_code(title_code, catalog_type)),
+        ('get_active_catalogs_by_title_code', lambda: cats.get_active_catalogs_by_title_code(title_code)),
+        ('get_catalog_publications', lambda: cats.get_catalog_publications(title_code)),
+    ]
+    for entity_type in entity_types:
+        operations.extend([
+            ('get_entities_by_type_and_title_code[{}]'.format(entity_type),
+             lambda entity_type=entity_type: cats.get_entities_by_type_and_title_code(title_code, entity_type)),
+            ('get_entities_by_type_and_catalog_code[{}]'.format(entity_type),
+             lambda entity_type=entity_type: cats.get_entities_by_type_and_catalog_code(catalog_code, entity_type)),
+            ('get_initial_diff_by_type_and_catalog_code[{}]'.format(entity_type),
+             lambda entity_type=entity_type: cats.get_initial_diff_by_type_and_catalog_code(catalog_code,
+                                                                                            entity_type)),
+        ])
+    return operations
+
+
+def publish_operation(cats, catalog_url, title_code):
+    def publish():
+        return cats.publish(catalog_url, generate_catalog_code(title_code), ulid())
+
+    return 'publish', publish
@@ -0,0 +1,45 @@
+import re
+from collections import OrderedDict, defaultdict
+
+PIPELINE_STAGES = ('pulling', 'parsing', 'saving', 'composing', 'publishing')
+
+SAMPLE_PATTERN = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?P<labels>\{[^}]*\})?\s+(?P<value>\S+)')
+
+
+def parse_samples(text):
+    """
+    Parses prometheus text exposition into {metric name: [(labels, value)]}
+    """
+    samples = defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        if match:
+            samples[match.group('name')].append((match.group('labels') or '', float(match.group('value'))))
+    return samples
+
+
+def metric_total(samples, name):
+    return sum(value for _, value in samples.get(name, []))
+
+
+def flow_durations(text, stages=PIPELINE_STAGES):
+    """
+    Returns {stage: {'seconds': ..., 'count': ...}} of `catalog_<stage>_flow_duration_seconds`
+    summed over all nodes
+    """
+    samples = parse_samples(text)
+    result = OrderedDict()
+    for stage in stages:
+        metric = 'catalog_{}_flow_duration_seconds'.format(stage)
+        result[stage] = {'seconds': metric_total(samples, metric + '_sum'),
+                         'count': metric_total(samples, metric + '_count')}
+    return result
+
+
+def flow_duration_deltas(before, after):
+    return OrderedDict(
+        (stage, {key: after[stage][key] - before[stage][key] for key in ('seconds', 'count')})
+        for stage in after
+    )
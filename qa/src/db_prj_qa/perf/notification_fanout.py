@@ -0,0 +1,255 @@
+import asyncio
+import csv
+import json
+import math
+import time
+from collections import OrderedDict
+from datetime import timezone
+
+from np_cats_qa.constants import CatalogStatus, SERVICE_REALM
+from np_cats_qa.data_generators import generate_catalog_code, generate_coupon_catalog_code
+from np_cats_qa.helpers import ulid
+from np_cats_qa.steps.db.waiter import BatchTaskStatusWaiter
+from np_cats_qa.steps.mock.journal import received_at
+
+FANOUT_PERCENTILES = (50, 90, 99, 100)
+
+
+class Channel(object):
+    """
+    Call cats makes to a consumer for every publish: `tools` limits it to publishes of these tools,
+    `status` picks the set_status call of that status; channels not `required` are reported only
+    """
+
+    def __init__(self, name, method, url, tools=None, status=None, required=True):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.tools = tools
+        self.status = status
+        self.required = required
+
+    def expected_for(self, publish):
+        return self.tools is None or publish.tool in self.tools
+
+    def find(self, journal, publish):
+        requests = journal.find(method=self.method,
+                                url=self.url.format(publish_id=publish.publish_id, realm=SERVICE_REALM),
+                                catalog_code=publish.catalog_code, sync=False)
+        if self.status is not None:
+            requests = [request for request in requests
+                        if isinstance(request['body'], dict) and request['body'].get('status') == self.status]
+        return requests[0] if requests else None
+
+
+SET_STATUS_URL = '/api/v1/catalog_publish/{publish_id}/set_status/'
+
+# `catalog-critical-service-hosts`, `catalog-other-service-hosts` and `catalog-status-consumer-hosts`
+# of cats point at wiremock, so every consumer call lands in its journal
+CHANNELS = [
+    Channel('prodo_prepare', 'POST', '/catalog/api/v1/prepare'),
+    Channel('other_activated', 'POST', '/catalog/api/v1/activated'),
+    Channel('catool_set_status', 'PUT', SET_STATUS_URL, tools=('catool',), status=CatalogStatus.ACTIVATED),
+    Channel('coupons_set_status', 'PUT', SET_STATUS_URL, tools=('coupons',), status=CatalogStatus.ACTIVATED),
+    Channel('franz_push_event', 'POST', '/streams/api/v1/pushEvent/{realm}.np.catalogs.catalog_publish_v1',
+            required=False),
+]
+
+
+def _epoch(moment):
+    # task timestamps are stored without a time zone, in UTC
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _percentile(values, percentile):
+    # nearest rank, values may be negative (calls made before the task is finished)
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(percentile / 100.0 * len(ordered))) - 1)]
+
+
+class FanoutPublish(object):
+    def __init__(self, title_code, tool, catalog_url, catalog_code, publish_id):
+        self.title_code = title_code
+        self.tool = tool
+        self.catalog_url = catalog_url
+        self.catalog_code = catalog_code
+        self.publish_id = publish_id
+        self.sent_at = None
+        self.response_status = None
+        self.status = None
+        self.finished_at = None
+        self.received = OrderedDict()
+
+    def since_publish(self, channel):
+        at = self.received.get(channel)
+        return None if at is None else at - self.sent_at
+
+    def since_finished(self, channel):
+        at = self.received.get(channel)
+        return None if at is None or self.finished_at is None else at - self.finished_at
+
+    def as_dict(self):
+        return OrderedDict([
+            ('title_code', self.title_code),
+            ('tool', self.tool),
+            ('catalog_code', self.catalog_code),
+            ('publish_id', self.publish_id),
+            ('response_status', self.response_status),
+            ('status', self.status),
+            ('task_seconds', None if self.finished_at is None else self.finished_at - self.sent_at),
+            ('since_publish', OrderedDict((channel, self.since_publish(channel)) for channel in self.received)),
+            ('since_finished', OrderedDict((channel, self.since_finished(channel)) for channel in self.received)),
+        ])
+
+
+class FanoutReport(object):
+    """
+    Per notification channel: seconds from the publish request and from the task `finished_at`
+    until the consumer received its call
+    """
+
+    def __init__(self, publishes, channels=CHANNELS):
+        self.publishes = publishes
+        self.channels = channels
+
+    def missing(self, channel):
+        return [publish.publish_id for publish in self.publishes
+                if channel.expected_for(publish) and channel.name not in publish.received]
+
+    def missing_required(self):
+        return OrderedDict((channel.name, missing) for channel, missing in
+                           ((channel, self.missing(channel)) for channel in self.channels if channel.required)
+                           if missing)
+
+    def breakdown(self, percentiles=FANOUT_PERCENTILES):
+        breakdown = OrderedDict()
+        for channel in self.channels:
+            expected = [publish for publish in self.publishes if channel.expected_for(publish)]
+            if not expected:
+                continue
+            since_publish = [publish.since_publish(channel.name) for publish in expected
+                             if channel.name in publish.received]
+            since_finished = [value for value in (publish.since_finished(channel.name) for publish in expected)
+                              if value is not None]
+            breakdown[channel.name] = OrderedDict([
+                ('expected', len(expected)),
+                ('received', len(since_publish)),
+                ('since_publish', OrderedDict(('p{}'.format(p), _percentile(since_publish, p)) for p in percentiles)),
+                ('since_finished', OrderedDict([('min', _percentile(since_finished, 0))] +
+                                               [('p{}'.format(p), _percentile(since_finished, p))
+                                                for p in percentiles])),
+            ])
+        return breakdown
+
+    def rows(self):
+        header = ['channel', 'expected', 'received']
+        breakdown = self.breakdown()
+        for channel in breakdown.values():
+            header += ['since_publish_' + key for key in channel['since_publish']]
+            header += ['since_finished_' + key for key in channel['since_finished']]
+            break
+        yield header
+        for name, channel in breakdown.items():
+            yield [name, channel['expected'], channel['received']] + \
+                  [None if value is None else round(value, 3) for value in
+                   list(channel['since_publish'].values()) + list(channel['since_finished'].values())]
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerows(self.rows())
+
+    def as_dict(self):
+        return OrderedDict([
+            ('publishes', [publish.as_dict() for publish in self.publishes]),
+            ('channels', self.breakdown()),
+        ])
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class NotificationFanoutBenchmark(object):
+    """
+    Publishes catalogs of several titles at once and records when every consumer got its call.
+
+    Publishes of one title are processed one after another, so concurrency comes from the number of
+    titles; every title gets a publish of each tool per round. Receive times are wiremock `loggedDate`s,
+    wiremock and the tests are expected to share the host clock.
+
+    :type is_db: np_cats_qa.steps.db.cats.CatalogServiceDBSteps
+    :type cats: np_cats_qa.steps.http.cats_async.AsyncCatalogServiceSteps
+    :type journal: np_cats_qa.steps.mock.journal.IndexedJournal
+    """
+
+    def __init__(self, is_db, cats, journal, catalog_url, coupon_catalog_url, channels=CHANNELS,
+                 timeout_seconds=300, sleep_seconds=0.1):
+        self.is_db = is_db
+        self.cats = cats
+        self.journal = journal
+        self.catalog_url = catalog_url
+        self.coupon_catalog_url = coupon_catalog_url
+        self.channels = channels
+        self.timeout_seconds = timeout_seconds
+        self.sleep_seconds = sleep_seconds
+
+    def plan(self, title_codes, tools, rounds=1):
+        publishes = []
+        for _ in range(rounds):
+            for title_code in title_codes:
+                for tool in tools:
+                    if tool == 'coupons':
+                        publishes.append(FanoutPublish(title_code, tool, self.coupon_catalog_url,
+                                                       generate_coupon_catalog_code(title_code), ulid()))
+                    else:
+                        publishes.append(FanoutPublish(title_code, tool, self.catalog_url,
+                                                       generate_catalog_code(title_code), ulid()))
+        return publishes
+
+    async def _publish(self, publish):
+        publish.sent_at = time.time()
+        response = await self.cats.publisher_catalog_publish(publish.catalog_url, publish.tool,
+                                                             publish.catalog_code, publish.publish_id)
+        publish.response_status = response.status_code
+
+    def _wait_finished(self, publishes):
+        timings = BatchTaskStatusWaiter(self.is_db, timeout_seconds=self.timeout_seconds).wait(
+            [publish.publish_id for publish in publishes])
+        for publish in publishes:
+            publish.status = timings[publish.publish_id].status
+            publish.finished_at = _epoch(self.is_db.get_task_processing_time(publish.publish_id)['finished_at'])
+
+    def _collect(self, publishes):
+        # one journal pull per tick, lookups of all publishes go to the local index
+        pending = [(publish, channel) for publish in publishes for channel in self.channels
+                   if channel.expected_for(publish)]
+        deadline = time.monotonic() + self.timeout_seconds
+        while pending:
+            self.journal.sync()
+            still_pending = []
+            for publish, channel in pending:
+                request = channel.find(self.journal, publish)
+                if request is None:
+                    still_pending.append((publish, channel))
+                else:
+                    publish.received[channel.name] = received_at(request)
+            pending = still_pending
+            # optional channels do not hold the run once the required ones are in
+            if not any(channel.required for _, channel in pending) or time.monotonic() >= deadline:
+                break
+            time.sleep(self.sleep_seconds)
+
+    async def run(self, title_codes, tools, rounds=1):
+        publishes = self.plan(title_codes, tools, rounds)
+        self.journal.sync()
+        await asyncio.gather(*[self._publish(publish) for publish in publishes])
+        accepted = [publish for publish in publishes if publish.response_status == 201]
+        self._wait_finished(accepted)
+        self._collect(accepted)
+        return FanoutReport(publishes, self.channels)
@@ -0,0 +1,146 @@
+import csv
+import json
+import time
+from collections import OrderedDict
+
+from np_cats_qa.perf.histogram import LatencyHistogram
+from np_cats_qa.steps.db.seeder import publication_history_rows, title_rows
+
+HISTORY_TITLE_PREFIX = 'ru.history'
+# p50 latency with the deepest history divided by the one with the shallowest above which
+# the endpoint is reported as scanning the whole history
+HISTORY_MAX_GROWTH = 3.0
+
+
+def history_title_code(depth):
+    return '{}_{}'.format(HISTORY_TITLE_PREFIX, depth)
+
+
+class HistoryPoint(object):
+    def __init__(self, depth, limit, latency, returned, errors):
+        self.depth = depth
+        self.limit = limit
+        self.latency = latency
+        self.returned = returned
+        self.errors = errors
+
+    def as_dict(self):
+        return OrderedDict([
+            ('depth', self.depth),
+            ('limit', self.limit),
+            ('requests', self.latency.total_count),
+            ('errors', self.errors),
+            ('returned', self.returned),
+            ('mean', self.latency.mean()),
+            ('p50', self.latency.value_at_percentile(50)),
+            ('p90', self.latency.value_at_percentile(90)),
+            ('p99', self.latency.value_at_percentile(99)),
+            ('max', self.latency.value_at_percentile(100)),
+        ])
+
+
+class HistoryCurve(object):
+    """
+    Latency of `get_catalog_publications` per publication history depth and limit
+    """
+
+    def __init__(self, points):
+        self.points = points
+
+    def growth(self, limit, percentile=50):
+        """
+        Latency with the deepest history divided by the one with the shallowest, for one limit
+        """
+        points = sorted((point for point in self.points if point.limit == limit), key=lambda p: p.depth)
+        if len(points) < 2:
+            return 1.0
+        first = points[0].latency.value_at_percentile(percentile)
+        last = points[-1].latency.value_at_percentile(percentile)
+        return last / first if first else 1.0
+
+    def limits(self):
+        return list(OrderedDict.fromkeys(point.limit for point in self.points))
+
+    def growing_limits(self, threshold=HISTORY_MAX_GROWTH):
+        return OrderedDict((limit, growth) for limit, growth in
+                           ((limit, self.growth(limit)) for limit in self.limits()) if growth > threshold)
+
+    def write_csv(self, path):
+        rows = [point.as_dict() for point in self.points]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def as_dict(self):
+        return OrderedDict([
+            ('points', [point.as_dict() for point in self.points]),
+            ('growth', OrderedDict((str(limit), self.growth(limit)) for limit in self.limits())),
+        ])
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class PublicationHistoryBenchmark(object):
+    """
+    Seeds titles with 10^3..10^6 finished publications straight into `title`, `catalog` and `task`
+    (a title per depth, kept between runs) and measures `get_catalog_publications` on each of them.
+
+    Requests are sent one after another, so latencies are not inflated by queueing.
+
+    :type is_db: np_cats_qa.steps.db.cats.CatalogServiceDBSteps
+    :type cats: np_cats_qa.steps.http.cats_async.AsyncCatalogServiceSteps
+    """
+
+    def __init__(self, is_db, cats, requests=200, warmup=20):
+        self.is_db = is_db
+        self.cats = cats
+        self.requests = requests
+        self.warmup = warmup
+
+    def seed(self, depth):
+        """
+        Makes sure the title of the depth has its history, returns the title code and seeding report
+        """
+        title_code = history_title_code(depth)
+        title_id = self.is_db.get_title_id_by_code(title_code)
+        seeded = self.is_db.count_publish_tasks(title_id) if title_id is not None else 0
+        if seeded >= depth:
+            return title_code, None
+        assert not seeded, '{} has {} of {} publications seeded, restore the database snapshot'.format(
+            title_code, seeded, depth)
+        seeder = self.is_db.seeder()
+        if title_id is None:
+            title_id = next(seeder.ids('title'))
+            seeder.copy('title', title_rows([title_code], [title_id], seeder.ids('title', 'full_title_id')))
+        reports = seeder.copy_related(['catalog', 'task'], publication_history_rows(
+            title_id, title_code.replace('.', '_'), depth, seeder.ids('catalog')))
+        return title_code, reports
+
+    async def _measure(self, title_code, limit):
+        latency = LatencyHistogram()
+        returned = None
+        errors = 0
+        for index in range(self.warmup + self.requests):
+            started = time.perf_counter()
+            response = await self.cats.get_catalog_publications(title_code, limit)
+            elapsed = time.perf_counter() - started
+            if index < self.warmup:
+                continue
+            latency.record(elapsed)
+            if response.status_code != 200:
+                errors += 1
+            elif returned is None:
+                returned = len(response.json())
+        return latency, returned, errors
+
+    async def run(self, depths, limits):
+        points = []
+        for depth in depths:
+            title_code, _ = self.seed(depth)
+            for limit in limits:
+                latency, returned, errors = await self._measure(title_code, limit)
+                points.append(HistoryPoint(depth, limit, latency, returned, errors))
+        return HistoryCurve(points)
@@ -0,0 +1,150 @@
+import csv
+import json
+import math
+import time
+from collections import OrderedDict
+
+from np_cats_qa.catalog.generator import CatalogSpec
+from np_cats_qa.data_generators import generate_catalog_code
+from np_cats_qa.helpers import ulid
+from np_cats_qa.perf.metrics import PIPELINE_STAGES, flow_durations, flow_duration_deltas
+from np_cats_qa.verifications import wait_until_task_finished_in_db
+
+# log-log slope between two sizes above which a stage is reported as superlinear
+SUPERLINEAR_SLOPE = 1.2
+
+
+class PublishRun(object):
+    def __init__(self, entities, publish_id, catalog_code, status, stages, task_times, wall_seconds):
+        self.entities = entities
+        self.publish_id = publish_id
+        self.catalog_code = catalog_code
+        self.status = status
+        self.stages = stages
+        self.task_times = task_times
+        self.wall_seconds = wall_seconds
+
+    @property
+    def task_seconds(self):
+        started_at, finished_at = self.task_times['started_at'], self.task_times['finished_at']
+        if started_at is None or finished_at is None:
+            return None
+        return (finished_at - started_at).total_seconds()
+
+    def as_dict(self):
+        return OrderedDict([
+            ('entities', self.entities),
+            ('publish_id', self.publish_id),
+            ('catalog_code', self.catalog_code),
+            ('status', self.status),
+            ('wall_seconds', self.wall_seconds),
+            ('task_seconds', self.task_seconds),
+            ('started_at', str(self.task_times['started_at'])),
+            ('finished_at', str(self.task_times['finished_at'])),
+            ('stages', self.stages),
+        ])
+
+
+class ScalingCurve(object):
+    """
+    Seconds spent in every pipeline stage per catalog size
+    """
+
+    def __init__(self, runs):
+        self.runs = runs
+
+    def points(self, stage):
+        # the fastest repetition of every size
+        best = OrderedDict()
+        for run in sorted(self.runs, key=lambda r: r.entities):
+            if stage == 'task':
+                seconds = run.task_seconds
+            else:
+                seconds = run.stages[stage]['seconds']
+            if seconds is not None:
+                best[run.entities] = min(best.get(run.entities, seconds), seconds)
+        return list(best.items())
+
+    def slopes(self, stage):
+        """
+        Log-log slopes between neighbouring sizes: 1 is linear growth, 2 is quadratic
+        """
+        points = [(size, seconds) for size, seconds in self.points(stage) if seconds > 0]
+        return [(size_b, math.log(seconds_b / seconds_a) / math.log(size_b / size_a))
+                for (size_a, seconds_a), (size_b, seconds_b) in zip(points, points[1:])]
+
+    def superlinear_stages(self, threshold=SUPERLINEAR_SLOPE):
+        return OrderedDict((stage, slopes) for stage, slopes in
+                           ((stage, [(size, slope) for size, slope in self.slopes(stage) if slope > threshold])
+                            for stage in PIPELINE_STAGES + ('task',))
+                           if slopes)
+
+    def rows(self):
+        header = ['entities', 'status', 'wall_seconds', 'task_seconds'] + list(PIPELINE_STAGES)
+        yield header
+        for run in self.runs:
+            yield [run.entities, run.status, round(run.wall_seconds, 3),
+                   None if run.task_seconds is None else round(run.task_seconds, 3)] + \
+                  [round(run.stages[stage]['seconds'], 3) for stage in PIPELINE_STAGES]
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerows(self.rows())
+
+    def as_dict(self):
+        return OrderedDict([
+            ('runs', [run.as_dict() for run in self.runs]),
+            ('slopes', OrderedDict((stage, self.slopes(stage)) for stage in PIPELINE_STAGES + ('task',))),
+        ])
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class PublishScalingBenchmark(object):
+    """
+    Publishes generated catalogs of growing size one at a time and records per-stage durations
+    from `/metrics` deltas and task timings from DB. With `restore` every publish but the first
+    is preceded by it, so each one starts from the same data
+    """
+
+    def __init__(self, is_http, is_db, generated_catalog, title_code, timeout_seconds=1800, spec_options=None,
+                 restore=None):
+        self.is_http = is_http
+        self.is_db = is_db
+        self.generated_catalog = generated_catalog
+        self.title_code = title_code
+        self.timeout_seconds = timeout_seconds
+        self.spec_options = spec_options or {}
+        self.restore = restore
+
+    def _flow_durations(self):
+        return flow_durations(self.is_http.cats.metrics().text)
+
+    def publish(self, entities):
+        catalog_code = generate_catalog_code(self.title_code)
+        spec = CatalogSpec.with_total_entities(self.title_code, entities, catalog_code=catalog_code,
+                                               **self.spec_options)
+        catalog_url = self.generated_catalog('generated_{}_{}.zip'.format(self.title_code, entities), spec)
+        publish_id = ulid()
+
+        before = self._flow_durations()
+        started = time.perf_counter()
+        response = self.is_http.cats.publish(catalog_url, catalog_code, publish_id)
+        assert response.status_code == 201, 'publish failed with {}: {}'.format(response.status_code, response.text)
+        status = wait_until_task_finished_in_db(self.is_db, publish_id, timeout_seconds=self.timeout_seconds)
+        wall_seconds = time.perf_counter() - started
+        stages = flow_duration_deltas(before, self._flow_durations())
+
+        return PublishRun(entities, publish_id, catalog_code, status, stages,
+                          self.is_db.get_task_processing_time(publish_id), wall_seconds)
+
+    def run(self, sizes, repeat=1):
+        runs = []
+        for entities in sizes:
+            for _ in range(repeat):
+                if runs and self.restore is not None:
+                    self.restore()
+                runs.append(self.publish(entities))
+        return ScalingCurve(runs)
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from np_cats_qa.catalog.merkle import entity_hash
+from np_cats_qa.constants import ChangeType
+from np_cats_qa.helpers import wait
+from np_cats_qa.perf.diff_crawler import DiffCrawler
+from np_cats_qa.steps.mock.journal import received_at
+
+PREPARE_URL = '/catalog/api/v1/prepare'
+ACTIVATED_URL = '/catalog/api/v1/activated'
+
+
+class CatalogReplica(object):
+    """
+    What a downstream service keeps of a catalog: {entity type: {code: hash of diff fields}}
+    """
+
+    def __init__(self, entity_types):
+        self.entities = OrderedDict((entity_type, {}) for entity_type in entity_types)
+        self.catalog_code = None
+
+    def apply(self, entity_type, items):
+        entities = self.entities[entity_type]
+        for item in items:
+            if item['change_type'] == ChangeType.DELETE:
+                entities.pop(item['code'], None)
+            else:
+                entities[item['code']] = entity_hash(item.get('fields') or {})
+
+    def copy(self):
+        replica = CatalogReplica(self.entities)
+        replica.entities = OrderedDict((entity_type, dict(entities)) for entity_type, entities in self.entities.items())
+        replica.catalog_code = self.catalog_code
+        return replica
+
+    def codes(self, entity_type):
+        return set(self.entities[entity_type])
+
+    def counts(self):
+        return OrderedDict((entity_type, len(entities)) for entity_type, entities in self.entities.items())
+
+
+class SyncRun(object):
+    """
+    Timeline of one catalog from the `publish` call to the replica switched to it.
+    Offsets are seconds since `publish`; callbacks also have the time wiremock received them.
+    """
+
+    def __init__(self, catalog_code, source_catalog_code, published_at):
+        self.catalog_code = catalog_code
+        self.source_catalog_code = source_catalog_code
+        self.published_at = published_at
+        self.prepare_received_at = None
+        self.prepare_seen = None
+        self.diff_pulled = None
+        self.activated_received_at = None
+        self.activated_seen = None
+        self.synced = None
+        self.items = 0
+        self.pages = 0
+        self.crawl = OrderedDict()
+
+    @property
+    def end_to_end_seconds(self):
+        return self.synced
+
+    def as_dict(self):
+        return OrderedDict([
+            ('catalog_code', self.catalog_code),
+            ('source_catalog_code', self.source_catalog_code),
+            ('prepare_received', self._received(self.prepare_received_at)),
+            ('prepare_seen', self.prepare_seen),
+            ('diff_pulled', self.diff_pulled),
+            ('activated_received', self._received(self.activated_received_at)),
+            ('activated_seen', self.activated_seen),
+            ('synced', self.synced),
+            ('items', self.items),
+            ('pages', self.pages),
+            ('crawl', self.crawl),
+        ])
+
+    def _received(self, at):
+        return None if at is None else at - self.published_at
+
+
+def find_callback(mock_steps, url, catalog_code):
+    # correlated lookup, only requests logged since the previous poll are pulled from wiremock
+    requests = mock_steps.journal_find(method='POST', url=url, catalog_code=catalog_code)
+    return requests[0] if requests else None
+
+
+def wait_for_callback(mock_steps, url, catalog_code, timeout_seconds=600, sleep_seconds=0.1):
+    """
+    Waits until cats calls `url` of the mocked downstream service for `catalog_code`, returns the journal request
+    """
+    return wait(lambda: find_callback(mock_steps, url, catalog_code),
+                waiting_for='{} callback for {}'.format(url, catalog_code),
+                timeout_seconds=timeout_seconds, sleep_seconds=sleep_seconds)
+
+
+class SyncConsumer(object):
+    """
+    Reference downstream consumer of cats.
+
+    Like storefront services it pulls the diff from the replica's catalog (the initial diff for the
+    first one) when `prepare` is called for a catalog of its title, and switches the replica to the
+    pulled catalog when `activated` is called. Callbacks are read from the wiremock journal,
+    diffs are crawled by :class:`np_cats_qa.perf.diff_crawler.DiffCrawler`.
+
+    :type is_http: np_cats_qa.steps.http.CatalogServiceHttpSteps
+    :type cats: np_cats_qa.steps.http.cats_async.AsyncCatalogServiceSteps
+    :type mock_steps: np_cats_qa.steps.mock.steps.CatalogServiceMockSteps
+    """
+
+    def __init__(self, is_http, cats, mock_steps, entity_types, limit=1000, concurrency=8,
+                 timeout_seconds=600, sleep_seconds=0.1):
+        self.is_http = is_http
+        self.cats = cats
+        self.mock_steps = mock_steps
+        self.entity_types = list(entity_types)
+        self.limit = limit
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self.sleep_seconds = sleep_seconds
+        self.replica = CatalogReplica(self.entity_types)
+        self.runs = []
+
+    def wait_for_callback(self, url, catalog_code):
+        return wait_for_callback(self.mock_steps, url, catalog_code, timeout_seconds=self.timeout_seconds,
+                                 sleep_seconds=self.sleep_seconds)
+
+    def pull(self, catalog_code):
+        """
+        Pulls the diff from the replica catalog to `catalog_code` into a copy of the replica
+        """
+        crawler = DiffCrawler(self.cats, catalog_code, self.replica.catalog_code, limit=self.limit,
+                              concurrency=self.concurrency)
+        results = asyncio.get_event_loop().run_until_complete(crawler.crawl(self.entity_types))
+        staged = self.replica.copy()
+        for entity_type, result in results.items():
+            assert not result.errors, 'diff of {} to {} is not returned'.format(entity_type, catalog_code)
+            staged.apply(entity_type, result.items)
+        staged.catalog_code = catalog_code
+        return staged, results
+
+    def sync(self, catalog_url, catalog_code, publish_id):
+        """
+        Publishes a catalog and follows it as a consumer until the replica is switched to it
+        """
+        published_at = time.time()
+        started = time.perf_counter()
+        response = self.is_http.cats.publish(catalog_url, catalog_code, publish_id)
+        assert response.status_code == 201, 'publish failed with {}: {}'.format(response.status_code, response.text)
+        run = SyncRun(catalog_code, self.replica.catalog_code, published_at)
+
+        run.prepare_received_at = received_at(self.wait_for_callback(PREPARE_URL, catalog_code))
+        run.prepare_seen = time.perf_counter() - started
+        staged, results = self.pull(catalog_code)
+        run.diff_pulled = time.perf_counter() - started
+        run.items = sum(result.count for result in results.values())
+        run.pages = sum(len(result.pages) for result in results.values())
+        run.crawl = OrderedDict((entity_type, result.as_dict()) for entity_type, result in results.items())
+
+        run.activated_received_at = received_at(self.wait_for_callback(ACTIVATED_URL, catalog_code))
+        run.activated_seen = time.perf_counter() - started
+        self.replica = staged
+        run.synced = time.perf_counter() - started
+
+        self.runs.append(run)
+        return run
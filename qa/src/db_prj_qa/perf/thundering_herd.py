@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+import yaml
+
+from np_cats_qa.constants import CatalogTypes
+from np_cats_qa.perf.histogram import DEFAULT_PERCENTILES
+from np_cats_qa.perf.load import EndpointStats, LoadReport, response_is_error
+from np_cats_qa.perf.sync_consumer import wait_for_callback
+from np_cats_qa.steps.mock.journal import received_at
+
+ACTIVE_CACHE_ENV = 'CATS_ACTIVE_CACHE'
+
+
+def active_cache_enabled(config_path):
+    """
+    `catalog.cache-for-active-enabled` cats runs with: CATS_ACTIVE_CACHE if set
+    (`invoke up --active-cache`), otherwise the value in qa-config.yaml
+    """
+    if os.environ.get(ACTIVE_CACHE_ENV):
+        return os.environ[ACTIVE_CACHE_ENV].lower() == 'true'
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    return str(config['app_env']['cats']['catalog']['cache-for-active-enabled']).lower() == 'true'
+
+
+class HerdReport(LoadReport):
+    def __init__(self, consumers, trigger, cache_enabled, duration_seconds, endpoints, callback_lag_seconds=None):
+        super(HerdReport, self).__init__(None, duration_seconds, endpoints, max_backlog=0)
+        self.consumers = consumers
+        self.trigger = trigger
+        self.cache_enabled = cache_enabled
+        self.callback_lag_seconds = callback_lag_seconds
+
+    def as_dict(self):
+        report = OrderedDict([
+            ('consumers', self.consumers),
+            ('trigger', self.trigger),
+            ('cache_for_active_enabled', self.cache_enabled),
+            ('callback_lag_seconds', self.callback_lag_seconds),
+        ])
+        report.update(super(HerdReport, self).as_dict())
+        del report['target_rate']
+        del report['max_backlog']
+        return report
+
+
+class ThunderingHerd(object):
+    """
+    N downstream consumers which all read the same catalog the moment cats notifies them.
+
+    Every consumer requests the active catalog of the title, the catalog itself (`catalog_uri`) and
+    entities of every type, sequentially as a real service would; all consumers start at once.
+
+    :type cats: np_cats_qa.steps.http.cats_async.AsyncCatalogServiceSteps
+    """
+
+    def __init__(self, cats, consumers, entity_types, catalog_type=CatalogTypes.MAIN_TYPE):
+        self.cats = cats
+        self.consumers = consumers
+        self.entity_types = list(entity_types)
+        self.catalog_type = catalog_type
+
+    def _requests(self, title_code, catalog_code):
+        requests = [
+            ('get_active_catalog_by_title_code',
+             lambda: self.cats.get_active_catalog_by_title_code(title_code, self.catalog_type)),
+            ('get_catalog_by_code', lambda: self.cats.get_catalog_by_code(catalog_code)),
+        ]
+        for entity_type in self.entity_types:
+            requests.append(('get_entities_by_type_and_catalog_code:{}'.format(entity_type),
+                             lambda entity_type=entity_type:
+                             self.cats.get_entities_by_type_and_catalog_code(catalog_code, entity_type)))
+        return requests
+
+    async def _consumer(self, requests, endpoints):
+        for name, request in requests:
+            stats = endpoints[name]
+            started = time.perf_counter()
+            try:
+                response = await request()
+                failed = response_is_error(response)
+                stats.statuses[response.status_code] += 1
+            except Exception as e:
+                failed = True
+                stats.statuses[type(e).__name__] += 1
+            elapsed = time.perf_counter() - started
+            stats.latency.record(elapsed)
+            stats.service_time.record(elapsed)
+            if failed:
+                stats.errors += 1
+
+    async def burst(self, title_code, catalog_code):
+        requests = self._requests(title_code, catalog_code)
+        endpoints = OrderedDict((name, EndpointStats(name)) for name, _ in requests)
+        started = time.perf_counter()
+        await asyncio.gather(*[self._consumer(requests, endpoints) for _ in range(self.consumers)])
+        return endpoints, time.perf_counter() - started
+
+    def on_callback(self, mock_steps, url, title_code, catalog_code, cache_enabled, timeout_seconds=600):
+        """
+        Waits for cats to call `url` of downstream services for `catalog_code` and releases the herd
+        """
+        callback = wait_for_callback(mock_steps, url, catalog_code, timeout_seconds=timeout_seconds)
+        callback_lag = time.time() - received_at(callback)
+        endpoints, duration = asyncio.get_event_loop().run_until_complete(self.burst(title_code, catalog_code))
+        return HerdReport(self.consumers, url, cache_enabled, duration, endpoints, callback_lag)
+
+
+def compare_herd_reports(cache_on, cache_off, percentiles=DEFAULT_PERCENTILES):
+    """
+    Per endpoint latency percentiles and error rates of the two cache configurations side by side;
+    reports are `HerdReport.as_dict()` results, e.g. read from files of two runs
+    """
+    off_endpoints = {endpoint['endpoint']: endpoint for endpoint in cache_off['endpoints'] + [cache_off['total']]}
+    rows = []
+    for on in cache_on['endpoints'] + [cache_on['total']]:
+        off = off_endpoints.get(on['endpoint'])
+        if off is None:
+            continue
+        row = OrderedDict([('endpoint', on['endpoint'])])
+        for percentile in percentiles:
+            on_value = on['latency'][_percentile_key(on['latency'], percentile)]
+            off_value = off['latency'][_percentile_key(off['latency'], percentile)]
+            row['p{}_on'.format(percentile)] = on_value
+            row['p{}_off'.format(percentile)] = off_value
+            row['p{}_ratio'.format(percentile)] = off_value / on_value if on_value else None
+        row['error_rate_on'] = on['errors'] / on['count'] if on['count'] else 0.0
+        row['error_rate_off'] = off['errors'] / off['count'] if off['count'] else 0.0
+        rows.append(row)
+    return rows
+
+
+def _percentile_key(latency, percentile):
+    # percentiles read back from JSON have string keys
+    return percentile if percentile in latency else str(percentile)
+
+
+def herd_result_path(results_path, trigger, cache_enabled):
+    return os.path.join(results_path, 'thundering_herd_{}_cache_{}.json'.format(
+        trigger.rstrip('/').split('/')[-1], 'on' if cache_enabled else 'off'))
+
+
+def write_herd_report(results_path, report):
+    os.makedirs(results_path, exist_ok=True)
+    path = herd_result_path(results_path, report.trigger, report.cache_enabled)
+    with open(path, 'w') as f:
+        json.dump(report.as_dict(), f, indent=2)
+    return path
+
+
+def read_herd_report(results_path, trigger, cache_enabled):
+    path = herd_result_path(results_path, trigger, cache_enabled)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,177 @@
+"""
+Duration-aware scheduling of tests over pytest-xdist workers.
+
+Every run records how long each test took (setup, call and teardown) and how much of it was spent
+waiting (`helpers.wait`, task status listener and batch waiter waits) to a history file. On the next run
+with `-n` the collected tests are ordered longest first and handed out one by one to whichever worker
+is free (longest processing time first), so slow publish and migration tests start early instead of
+piling up on one worker at the end.
+
+Enable it with `-p np_cats_qa.plugins.durations`.
+"""
+import json
+import os
+from collections import OrderedDict, defaultdict
+
+import pytest
+
+from np_cats_qa.helpers import wait_timer
+
+DEFAULT_HISTORY_PATH = '.test_durations.json'
+# weight of the latest run in the smoothed duration of a test
+SMOOTHING = 0.5
+# tests a worker holds at once: the running one and the next one
+PREFETCH = 2
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('durations history')
+    group.addoption('--durations-history', action='store', default=DEFAULT_HISTORY_PATH,
+                    help='file to keep test durations in, relative to the rootdir (default: {})'.format(
+                        DEFAULT_HISTORY_PATH))
+    group.addoption('--no-lpt', action='store_true', default=False,
+                    help='keep the collection order under xdist instead of the longest tests first')
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(DurationsPlugin(config), 'np_cats_qa_durations')
+
+
+def is_xdist_worker(config):
+    # pytest-xdist 1.x names it `slaveinput`, later versions `workerinput`
+    return hasattr(config, 'slaveinput') or hasattr(config, 'workerinput')
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_history(path, history):
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(OrderedDict(sorted(history.items())), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def merge_durations(history, durations):
+    """
+    Folds durations of this run into the history: {nodeid: {'seconds', 'wait_seconds', 'runs'}}
+    """
+    for nodeid, (seconds, wait_seconds) in durations.items():
+        previous = history.get(nodeid)
+        if previous is None:
+            history[nodeid] = {'seconds': seconds, 'wait_seconds': wait_seconds, 'runs': 1}
+        else:
+            history[nodeid] = {
+                'seconds': SMOOTHING * seconds + (1 - SMOOTHING) * previous['seconds'],
+                'wait_seconds': SMOOTHING * wait_seconds + (1 - SMOOTHING) * previous['wait_seconds'],
+                'runs': previous['runs'] + 1,
+            }
+    return history
+
+
+def expected_seconds(history, nodeids):
+    """
+    Durations of tests from the history; tests never run are expected to take the median known duration
+    """
+    known = sorted(history[nodeid]['seconds'] for nodeid in nodeids if nodeid in history)
+    default = known[len(known) // 2] if known else 0.0
+    return {nodeid: history[nodeid]['seconds'] if nodeid in history else default for nodeid in nodeids}
+
+
+def longest_first(items, history):
+    seconds = expected_seconds(history, [item.nodeid for item in items])
+    # sort is stable, tests of the same duration keep the collection order
+    return sorted(items, key=lambda item: -seconds[item.nodeid])
+
+
+class DurationsPlugin(object):
+    def __init__(self, config):
+        self.config = config
+        self.path = os.path.join(str(config.rootdir), config.getoption('durations_history'))
+        self.lpt = not config.getoption('no_lpt')
+        self.durations = defaultdict(lambda: [0.0, 0.0])
+        self.skipped = set()
+        self._waited = 0.0
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        # every worker collects the same history, so their collections stay identical
+        if self.lpt and is_xdist_worker(config):
+            items[:] = longest_first(items, read_history(self.path))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        # wait time of the phase travels with the report to the xdist controller
+        report.user_properties.append(('wait_seconds', wait_timer.seconds - self._waited))
+        self._waited = wait_timer.seconds
+
+    def pytest_runtest_logreport(self, report):
+        wait_seconds = dict(report.user_properties).get('wait_seconds', 0.0)
+        duration = self.durations[report.nodeid]
+        duration[0] += report.duration
+        duration[1] += wait_seconds
+        if report.skipped:
+            self.skipped.add(report.nodeid)
+
+    def pytest_sessionfinish(self, session):
+        # only the process that saw reports of all workers writes the history
+        if is_xdist_worker(self.config):
+            return
+        durations = {nodeid: duration for nodeid, duration in self.durations.items() if nodeid not in self.skipped}
+        if durations:
+            write_history(self.path, merge_durations(read_history(self.path), durations))
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_make_scheduler(self, config, log):
+        if self.lpt and config.getoption('dist') == 'load':
+            return lpt_scheduling(config, log)
+
+
+def lpt_scheduling(config, log):
+    from xdist.scheduler import LoadScheduling
+
+    class LPTScheduling(LoadScheduling):
+        """
+        Load scheduling which keeps the collection (longest first) order: instead of handing out
+        chunks of pending tests, every worker gets the next test as soon as it has less than two
+        """
+
+        def schedule(self):
+            assert self.collection_is_completed
+            if self.collection is not None:
+                for node in self.nodes:
+                    self.check_schedule(node)
+                return
+            if not self._check_nodes_have_same_collection():
+                self.log('**Different tests collected, aborting run**')
+                return
+            self.collection = list(self.node2collection.values())[0]
+            self.pending[:] = range(len(self.collection))
+            if not self.collection:
+                return
+            for _ in range(PREFETCH):
+                for node in self.nodes:
+                    if self.pending:
+                        self._send_tests(node, 1)
+            if not self.pending:
+                for node in self.nodes:
+                    node.shutdown()
+
+        def check_schedule(self, node, duration=0):
+            if node.shutting_down:
+                return
+            if self.pending:
+                node_pending = self.node2pending[node]
+                if len(node_pending) < PREFETCH:
+                    self._send_tests(node, PREFETCH - len(node_pending))
+            else:
+                node.shutdown()
+            self.log('num items waiting for node:', len(self.pending))
+
+    return LPTScheduling(config, log)
@@ -0,0 +1,136 @@
+import os
+import random
+import threading
+import time
+
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+WORKER_BITS = 8
+RANDOM_BITS = 80 - WORKER_BITS
+# newer pytest-xdist exports it, for 1.x the controller passes it to workers, see tests/conftest.py
+WORKER_COUNT_ENV = 'PYTEST_XDIST_WORKER_COUNT'
+# directory keeping the last catalog version every worker issued, relative to the working directory
+CATALOG_VERSIONS_PATH = os.environ.get('CATALOG_VERSIONS_PATH', '.catalog_versions')
+
+
+def worker_index():
+    """
+    Index of the pytest-xdist worker running the process (`gw3` -> 3), 0 without xdist
+    """
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
+    return int(worker[2:]) if worker.startswith('gw') and worker[2:].isdigit() else 0
+
+
+def worker_count():
+    """
+    Number of pytest-xdist workers, 1 without xdist
+    """
+    return max(1, int(os.environ.get(WORKER_COUNT_ENV, 1)))
+
+
+class InterleavedCounter(object):
+    """
+    Strictly increasing numbers which follow `clock` but never repeat, without sleeping.
+
+    A number is the current clock value or, if it was already issued, the next free one; every worker
+    takes only numbers equal to its index modulo the number of workers, so workers never collide.
+    When more numbers than clock ticks are taken, the counter runs ahead of the clock.
+
+    With `state_path` the last number of every worker is kept in a file of that directory and the first
+    number of a process follows the largest one kept, so a session started while a previous one was
+    ahead of the clock does not issue numbers lower than those already used.
+    """
+
+    def __init__(self, clock, index=None, count=None, state_path=None):
+        self.clock = clock
+        self.index = worker_index() if index is None else index
+        # resolved on first use: workers learn their number after the module is imported
+        self.count = count
+        self.state_path = state_path
+        self.last = None
+        self._lock = threading.Lock()
+
+    def _align(self, value):
+        return value + (self.index - value) % self.count
+
+    def _load(self):
+        if not os.path.isdir(self.state_path):
+            return None
+        values = []
+        for name in os.listdir(self.state_path):
+            with open(os.path.join(self.state_path, name)) as f:
+                text = f.read().strip()
+            if text.isdigit():
+                values.append(int(text))
+        return max(values) if values else None
+
+    def _save(self, value):
+        os.makedirs(self.state_path, exist_ok=True)
+        path = os.path.join(self.state_path, 'gw{}'.format(self.index))
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'w') as f:
+            f.write(str(value))
+        os.replace(tmp_path, path)
+
+    def next(self, skip=0):
+        """
+        :param skip: numbers of this worker to leave unused before the returned one
+        """
+        with self._lock:
+            if self.count is None:
+                self.count = worker_count()
+            if self.last is None and self.state_path is not None:
+                self.last = self._load()
+            value = self.clock()
+            if self.last is not None:
+                value = max(value, self.last + 1)
+            value = self._align(value) + skip * self.count
+            self.last = value
+            if self.state_path is not None:
+                self._save(value)
+            return value
+
+
+def seconds_clock():
+    return int(round(time.time()))
+
+
+def milliseconds_clock():
+    return int(time.time() * 1000)
+
+
+class MonotonicUlid(object):
+    """
+    ULIDs increasing within a process: 48 bits of milliseconds, 8 bits of the xdist worker index and 72 bits
+    starting randomly every millisecond and incremented for ids of the same millisecond.
+    """
+
+    def __init__(self, index=None):
+        self.index = (worker_index() if index is None else index) % (1 << WORKER_BITS)
+        self.last_ms = None
+        self.last_random = None
+        self._random = random.SystemRandom()
+        self._lock = threading.Lock()
+
+    def next_int(self):
+        with self._lock:
+            ms = milliseconds_clock()
+            if self.last_ms is not None and ms <= self.last_ms:
+                ms = self.last_ms
+                value = self.last_random + 1
+                if value >> RANDOM_BITS:
+                    # 2 ** 72 ids within a millisecond, move to the next one
+                    ms, value = ms + 1, self._random.getrandbits(RANDOM_BITS - 1)
+            else:
+                # leave half of the range for increments
+                value = self._random.getrandbits(RANDOM_BITS - 1)
+            self.last_ms, self.last_random = ms, value
+            return (ms << 80) | (self.index << RANDOM_BITS) | value
+
+    def next(self):
+        value = self.next_int()
+        return ''.join(CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+catalog_versions = InterleavedCounter(seconds_clock, state_path=CATALOG_VERSIONS_PATH)
+timestamps = InterleavedCounter(milliseconds_clock)
+ulids = MonotonicUlid()
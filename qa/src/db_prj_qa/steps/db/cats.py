@@ -3,21 +3,81 @@ from datetime import datetime
 from npqa_db import DbClient
 from npqa_report import step
 
+from np_cats_qa.steps.db.listener import TaskStatusListener
+from np_cats_qa.steps.db.pool import PreparedStatementPool, STREAM_FETCH_SIZE
+from np_cats_qa.steps.db.seeder import BulkSeeder
+from np_cats_qa.steps.db.snapshot import DatabaseSnapshot, DEFAULT_SNAPSHOT
+
 
 class CatalogServiceDBSteps(object):
     def __init__(self, db_url):
+        self.db_url = db_url
         self.client = DbClient(db_url)
+        self.pool = PreparedStatementPool(db_url)
+        self.task_listener = None
+
+    def start_task_status_listener(self):
+        self.task_listener = TaskStatusListener(self.db_url)
+        self.task_listener.start()
+        self.task_listener.install()
+        return self.task_listener
+
+    def stop_task_status_listener(self):
+        if self.task_listener is not None:
+            self.task_listener.stop()
+            self.task_listener.uninstall()
+            self.task_listener = None
+
+    def seeder(self):
+        return BulkSeeder(self.db_url)
+
+    @step
+    def take_snapshot(self, snapshot=DEFAULT_SNAPSHOT):
+        self._reconnecting(DatabaseSnapshot(self.db_url, snapshot).take)
+
+    @step
+    def restore_snapshot(self, snapshot=DEFAULT_SNAPSHOT):
+        """
+        Brings the database back to the snapshot, e.g. taken by `invoke snapshot` after preparing data
+        """
+        self._reconnecting(DatabaseSnapshot(self.db_url, snapshot).restore)
+
+    def _reconnecting(self, action):
+        # connections to the database are terminated by snapshot operations
+        listening = self.task_listener is not None
+        self.stop_task_status_listener()
+        self.pool.close()
+        action()
+        self.client = DbClient(self.db_url)
+        self.pool = PreparedStatementPool(self.db_url)
+        if listening:
+            self.start_task_status_listener()
+
+    def query_timings(self):
+        """
+        Latencies of pooled queries by statement name since the last `reset_query_timings`
+        """
+        return self.pool.timings.as_dict()
+
+    def reset_query_timings(self):
+        self.pool.timings.reset()
+
+    def close(self):
+        self.pool.close()
 
     @step
     def get_publish_task_status(self, publish_id):
-        rows = self.client.execute(
-            clause='select status from task where id = :publish_id',
-            params=dict(publish_id=publish_id)).fetchall()
+        rows = self.pool.execute('task_status', publish_id)
         status = None
         if rows:
             status = [row[0] for row in rows][0]
         return status
 
+    @step
+    def get_publish_task_statuses(self, publish_ids):
+        rows = self.pool.execute('task_statuses', list(publish_ids))
+        return {row[0]: row[1] for row in rows}
+
     @step
     def get_task_failure(self, publish_id):
         rows = self.client.execute(
@@ -50,6 +110,19 @@ class CatalogServiceDBSteps(object):
             code = [row[0] for row in rows][0]
         return code
 
+    @step
+    def get_title_id_by_code(self, code):
+        rows = self.client.execute(
+            clause='select id from title where code = :code',
+            params=dict(code=code)).fetchall()
+        return rows[0][0] if rows else None
+
+    @step
+    def count_publish_tasks(self, title_id):
+        return self.client.execute(
+            clause='select count(*) from task where title_id = :title_id',
+            params=dict(title_id=title_id)).fetchall()[0][0]
+
     @step
     def update_publish_status_in_db(self, catalog_publish_id, status):
         self.client.execute(
@@ -107,9 +180,7 @@ class CatalogServiceDBSteps(object):
 
     @step
     def get_active_catalogs(self, catalog_type):
-        catalog_codes = self.client.execute(
-            clause='select code from catalog where terminated_at is NULL AND NOT activated_at '
-                   'is NULL and ctype = :catalog_type', params=dict(catalog_type=catalog_type)).fetchall()
+        catalog_codes = self.pool.execute('active_catalogs', catalog_type)
         result = []
         for i in catalog_codes:
             result.append(i[0])
@@ -118,9 +189,19 @@ class CatalogServiceDBSteps(object):
     @step
     def get_catalog_by_catalog_code(self, catalog_code):
         result = []
-        catalog = self.client.execute(
-            clause='select * from catalog where code =:catalog_code', params=dict(catalog_code=catalog_code)).fetchall()
+        catalog = self.pool.execute('catalog_by_code', catalog_code)
         if catalog:
             result = {'catalog_code': catalog[0][1],
                       'activated_at': catalog[0][2], 'terminated_at':  catalog[0][3]}
         return result
+
+    def iter_active_catalogs(self, catalog_type, fetch_size=STREAM_FETCH_SIZE):
+        """
+        Codes of active catalogs streamed from a server-side cursor, for tables too big for `get_active_catalogs`
+        """
+        rows = self.pool.stream(
+            'iter_active_catalogs',
+            'select code from catalog where terminated_at is NULL AND NOT activated_at '
+            'is NULL and ctype = %(catalog_type)s', dict(catalog_type=catalog_type), fetch_size=fetch_size)
+        for row in rows:
+            yield row[0]
@@ -0,0 +1,177 @@
+import json
+import select
+import threading
+import time
+
+import psycopg2
+from waiting.exceptions import TimeoutExpired
+
+from np_cats_qa.helpers import wait_timer
+
+TASK_STATUS_CHANNEL = 'qa_task_status'
+# advisory lock every running listener holds shared, the last one to stop removes the triggers
+TASK_STATUS_LISTENERS_LOCK = 7161
+# transaction lock serializing installs, concurrent `create or replace function` fails with
+# "tuple concurrently updated"
+TASK_STATUS_INSTALL_LOCK = 7162
+TASK_STATUS_TRIGGERS = ('qa_task_status_insert', 'qa_task_status_update')
+
+INSTALL_TASK_STATUS_TRIGGER = """
+create or replace function qa_notify_task_status() returns trigger as $$
+begin
+    perform pg_notify('{channel}', json_build_object('id', NEW.id, 'status', NEW.status)::text);
+    return NEW;
+end;
+$$ language plpgsql;
+
+drop trigger if exists qa_task_status_insert on task;
+create trigger qa_task_status_insert after insert on task
+    for each row execute procedure qa_notify_task_status();
+
+drop trigger if exists qa_task_status_update on task;
+create trigger qa_task_status_update after update of status on task
+    for each row when (OLD.status is distinct from NEW.status) execute procedure qa_notify_task_status();
+""".format(channel=TASK_STATUS_CHANNEL)
+
+UNINSTALL_TASK_STATUS_TRIGGER = """
+drop trigger if exists qa_task_status_insert on task;
+drop trigger if exists qa_task_status_update on task;
+drop function if exists qa_notify_task_status();
+"""
+
+
+class TaskStatusListener(object):
+    """
+    Receives `task` status transitions pushed by Postgres (trigger + LISTEN/NOTIFY) in a background thread.
+
+    Every transition is remembered with the time it was received, so a waiter started after
+    the transition still sees it. Triggers are installed after `start` and removed by `uninstall`
+    after `stop` of the last listener, so `task` writes do not notify once no session listens.
+    """
+
+    def __init__(self, db_url):
+        self.db_url = db_url
+        self._connection = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._condition = threading.Condition()
+        self._statuses = {}
+        self._seen = {}
+
+    def install(self):
+        """
+        Creates the triggers unless another session (xdist worker) already did
+        """
+        with psycopg2.connect(self.db_url) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute('select pg_advisory_xact_lock(%s)', (TASK_STATUS_INSTALL_LOCK,))
+                cursor.execute("select count(*) from pg_trigger where tgrelid = 'task'::regclass and tgname in %s",
+                               (TASK_STATUS_TRIGGERS,))
+                if cursor.fetchone()[0] < len(TASK_STATUS_TRIGGERS):
+                    cursor.execute(INSTALL_TASK_STATUS_TRIGGER)
+        connection.close()
+
+    def uninstall(self):
+        """
+        Drops the triggers unless listeners of other sessions (xdist workers) still use them
+        """
+        connection = psycopg2.connect(self.db_url)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('select pg_try_advisory_lock(%s)', (TASK_STATUS_LISTENERS_LOCK,))
+                if not cursor.fetchone()[0]:
+                    return False
+                cursor.execute(UNINSTALL_TASK_STATUS_TRIGGER)
+                cursor.execute('select pg_advisory_unlock(%s)', (TASK_STATUS_LISTENERS_LOCK,))
+                return True
+        finally:
+            connection.close()
+
+    def start(self):
+        self._connection = psycopg2.connect(self.db_url)
+        self._connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._connection.cursor() as cursor:
+            # released when the connection is closed; waits while another session uninstalls
+            cursor.execute('select pg_advisory_lock_shared(%s)', (TASK_STATUS_LISTENERS_LOCK,))
+            cursor.execute('LISTEN {}'.format(TASK_STATUS_CHANNEL))
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='task-status-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if select.select([self._connection], [], [], 0.5) == ([], [], []):
+                continue
+            self._connection.poll()
+            while self._connection.notifies:
+                notify = self._connection.notifies.pop(0)
+                payload = json.loads(notify.payload)
+                self._record(payload['id'], payload['status'])
+
+    def _record(self, task_id, status, received_at=None):
+        with self._condition:
+            self._statuses[task_id] = status
+            self._seen.setdefault(task_id, {}).setdefault(status, received_at or time.time())
+            self._condition.notify_all()
+
+    def status(self, task_id):
+        with self._condition:
+            return self._statuses.get(task_id)
+
+    def seen_statuses(self, task_id):
+        """
+        Returns {status: unix time the transition was received} for the task
+        """
+        with self._condition:
+            return dict(self._seen.get(task_id, {}))
+
+    def forget(self, task_id):
+        with self._condition:
+            self._statuses.pop(task_id, None)
+            self._seen.pop(task_id, None)
+
+    def wait_for_status(self, task_id, statuses, timeout_seconds=30, seen=False, current_status=None):
+        """
+        Blocks until the task gets one of `statuses` and returns it.
+
+        :param seen: also accept a status the task has already passed through
+        :param current_status: callable reading the status from DB, used once for tasks
+            which changed their status before the listener was started
+        """
+        if current_status is not None and self.status(task_id) is None:
+            status = current_status()
+            if status is not None:
+                with self._condition:
+                    if task_id not in self._statuses:
+                        self._statuses[task_id] = status
+                        self._seen.setdefault(task_id, {}).setdefault(status, time.time())
+
+        def reached():
+            if self._statuses.get(task_id) in statuses:
+                return self._statuses[task_id]
+            if seen:
+                for status in statuses:
+                    if status in self._seen.get(task_id, {}):
+                        return status
+            return None
+
+        deadline = time.monotonic() + timeout_seconds
+        with wait_timer.measure(), self._condition:
+            result = reached()
+            while result is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutExpired(timeout_seconds, 'Task {} status in {}'.format(task_id, list(statuses)))
+                self._condition.wait(remaining)
+                result = reached()
+            return result
@@ -0,0 +1,193 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import psycopg2
+from psycopg2.errors import InvalidSqlStatementName
+from psycopg2.extensions import connection as Connection
+
+from np_cats_qa.perf.histogram import LatencyHistogram, DEFAULT_PERCENTILES
+
+POOL_MAX_CONNECTIONS = 16
+# the connection cannot be used as it is: dropped from the pool, the query is retried on another one
+RETRIED_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, InvalidSqlStatementName)
+STREAM_FETCH_SIZE = 2000
+
+# hot queries of the DB steps, prepared once per pooled connection
+STATEMENTS = OrderedDict([
+    ('task_status', 'select status from task where id = $1'),
+    ('task_statuses', 'select id, status from task where id = any($1)'),
+    ('catalog_by_code', 'select * from catalog where code = $1'),
+    ('active_catalogs', 'select code from catalog where terminated_at is NULL AND NOT activated_at '
+                        'is NULL and ctype = $1'),
+])
+
+
+class QueryTimings(object):
+    """
+    Latencies of queries by name, shared by all threads using the pool
+    """
+
+    def __init__(self):
+        self._histograms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._histograms.setdefault(name, LatencyHistogram()).record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def as_dict(self, percentiles=DEFAULT_PERCENTILES):
+        with self._lock:
+            return OrderedDict((name, OrderedDict([
+                ('count', histogram.total_count),
+                ('mean', histogram.mean()),
+                ('percentiles', histogram.percentiles(percentiles)),
+            ])) for name, histogram in self._histograms.items())
+
+
+class PreparedConnection(Connection):
+    """
+    Connection remembering the statements prepared on it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PreparedConnection, self).__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class ConnectionPool(object):
+    """
+    Up to `max_connections` connections opened on demand and kept open; callers beyond that wait
+    for a free one instead of failing
+    """
+
+    def __init__(self, db_url, max_connections=POOL_MAX_CONNECTIONS):
+        self.db_url = db_url
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            return psycopg2.connect(self.db_url, connection_factory=PreparedConnection)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            if close or connection.closed:
+                if not connection.closed:
+                    connection.close()
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            if not connection.closed:
+                connection.close()
+
+
+class PreparedStatementPool(object):
+    """
+    Thread-safe pool of autocommit connections with server-side prepared statements.
+
+    Every statement is prepared on a connection the first time it runs there, so polling a query
+    costs one round trip without connecting and parsing. Connections broken by the server (restart,
+    snapshot restore) or missing a statement they prepared are dropped from the pool and the query is
+    retried once on another one.
+    """
+
+    def __init__(self, db_url, statements=STATEMENTS, max_connections=POOL_MAX_CONNECTIONS):
+        self.db_url = db_url
+        self.statements = statements
+        self.timings = QueryTimings()
+        self._pool = ConnectionPool(db_url, max_connections)
+        self._cursor_numbers = itertools.count()
+
+    def _prepare(self, connection, cursor, name):
+        if name not in connection.prepared:
+            cursor.execute('prepare {} as {}'.format(name, self.statements[name]))
+            connection.prepared.add(name)
+
+    def _run(self, name, query, params):
+        connection = self._pool.getconn()
+        if not connection.autocommit:
+            connection.autocommit = True
+        broken = False
+        try:
+            with connection.cursor() as cursor:
+                self._prepare(connection, cursor, name)
+                started = time.perf_counter()
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if cursor.description is not None else []
+                self.timings.record(name, time.perf_counter() - started)
+                return rows
+        except RETRIED_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._pool.putconn(connection, close=broken)
+
+    def _retrying(self, name, query, params):
+        try:
+            return self._run(name, query, params)
+        except RETRIED_ERRORS:
+            return self._run(name, query, params)
+
+    def execute(self, name, *params):
+        """
+        Runs a prepared statement, returns all rows
+        """
+        query = 'execute {}'.format(name)
+        if params:
+            query += '({})'.format(', '.join(['%s'] * len(params)))
+        return self._retrying(name, query, params)
+
+    def stream(self, name, sql, params=None, fetch_size=STREAM_FETCH_SIZE):
+        """
+        Yields rows of text SQL from a named server-side cursor, `fetch_size` rows per round trip.
+
+        The connection is held in a transaction until the generator is exhausted or closed; the time
+        to the last row is recorded under `name`.
+        """
+        connection = self._pool.getconn()
+        broken = False
+        try:
+            connection.autocommit = False
+            cursor = connection.cursor(name='{}_{}'.format(name, next(self._cursor_numbers)))
+            cursor.itersize = fetch_size
+            started = time.perf_counter()
+            try:
+                cursor.execute(sql, params)
+                for row in cursor:
+                    yield row
+                self.timings.record(name, time.perf_counter() - started)
+            finally:
+                if not connection.closed:
+                    cursor.close()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if not broken and not connection.closed:
+                connection.rollback()
+                connection.autocommit = True
+            self._pool.putconn(connection, close=broken)
+
+    def close(self):
+        self._pool.closeall()
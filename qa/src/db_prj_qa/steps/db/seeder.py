@@ -0,0 +1,281 @@
+import csv
+import io
+import json
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import chain, count, islice
+
+import psycopg2
+from psycopg2 import sql
+
+from np_cats_qa.constants import PublishStatus
+from np_cats_qa.sequences import ulids
+
+INTEGER_TYPES = ('smallint', 'integer', 'bigint')
+COPY_BATCH_ROWS = 100000
+CSV_NULL = '\\N'
+
+
+class TableColumn(object):
+    def __init__(self, name, data_type, nullable, has_default):
+        self.name = name
+        self.data_type = data_type
+        self.nullable = nullable
+        self.has_default = has_default
+
+    @property
+    def required(self):
+        return not self.nullable and not self.has_default
+
+
+class CsvStream(object):
+    """
+    File-like object COPY reads rows from, rendered to CSV only as they are requested
+    """
+
+    def __init__(self, rows, columns):
+        self.rows = iter(rows)
+        self.columns = columns
+        self.count = 0
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text, lineterminator='\n')
+        self._buffer = ''
+
+    def _value(self, value):
+        if value is None:
+            return CSV_NULL
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self._writer.writerow([self._value(row.get(column)) for column in self.columns])
+            self.count += 1
+            self._buffer += self._text.getvalue()
+            self._text.seek(0)
+            self._text.truncate()
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+class BulkSeeder(object):
+    """
+    Loads generated rows straight into cats tables with COPY, bypassing the publish pipeline.
+
+    Rows are dicts; columns a table does not have are ignored and columns it requires (not null
+    without default) have to be present, so generators survive schema changes of cats. Every batch
+    of `batch_rows` rows is one COPY and one commit, nothing but the current row is kept in memory.
+
+    Row triggers are off while copying (`session_replication_role = replica`), which takes a superuser
+    or, on Postgres 15+, a role granted the `session_replication_role` parameter; the `cats` role of the
+    docker environment is the superuser of its database.
+    """
+
+    def __init__(self, db_url, batch_rows=COPY_BATCH_ROWS):
+        self.db_url = db_url
+        self.batch_rows = batch_rows
+        self._columns = {}
+
+    def _connect(self):
+        connection = psycopg2.connect(self.db_url)
+        with connection.cursor() as cursor:
+            # seeded rows can be generated again, durability of every commit is not needed
+            cursor.execute('set synchronous_commit to off')
+            # no row triggers for this session: the task status listener would get a NOTIFY per copied task,
+            # foreign keys are consistent by construction
+            cursor.execute('set session_replication_role = replica')
+        return connection
+
+    def columns(self, table):
+        if table not in self._columns:
+            connection = self._connect()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('select column_name, data_type, is_nullable, column_default '
+                                   'from information_schema.columns '
+                                   'where table_schema = current_schema() and table_name = %s '
+                                   'order by ordinal_position', (table,))
+                    self._columns[table] = OrderedDict(
+                        (name, TableColumn(name, data_type, is_nullable == 'YES', default is not None))
+                        for name, data_type, is_nullable, default in cursor.fetchall())
+            finally:
+                connection.close()
+            assert self._columns[table], 'table {} does not exist'.format(table)
+        return self._columns[table]
+
+    def copy_columns(self, table, row):
+        """
+        Columns of `table` the row has values for
+        """
+        columns = self.columns(table)
+        missing = [column.name for column in columns.values() if column.required and column.name not in row]
+        assert not missing, 'rows of {} have no values for required columns {}'.format(table, missing)
+        return [name for name in columns if name in row]
+
+    def copy(self, table, rows):
+        """
+        Streams rows into the table, returns {'table', 'rows', 'seconds', 'rows_per_second'}
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        started = time.perf_counter()
+        total = 0
+        if first is not None:
+            columns = self.copy_columns(table, first)
+            statement = sql.SQL('copy {} ({}) from stdin with (format csv, null {})').format(
+                sql.Identifier(table), sql.SQL(', ').join(sql.Identifier(column) for column in columns),
+                sql.Literal(CSV_NULL))
+            connection = self._connect()
+            try:
+                batch = [first]
+                while batch:
+                    stream = CsvStream(chain(batch, islice(rows, self.batch_rows - len(batch))), columns)
+                    with connection.cursor() as cursor:
+                        cursor.copy_expert(statement, stream)
+                    connection.commit()
+                    total += stream.count
+                    batch = list(islice(rows, 1))
+                with connection.cursor() as cursor:
+                    self._advance_sequences(cursor, table, columns)
+                    cursor.execute(sql.SQL('analyze {}').format(sql.Identifier(table)))
+                connection.commit()
+            finally:
+                connection.close()
+        seconds = time.perf_counter() - started
+        return OrderedDict([('table', table), ('rows', total), ('seconds', seconds),
+                            ('rows_per_second', total / seconds if seconds else 0.0)])
+
+    def _advance_sequences(self, cursor, table, columns):
+        # COPY writes ids of serial and identity columns itself, their sequences would hand them out again
+        for column in columns:
+            if self.columns(table)[column].data_type not in INTEGER_TYPES:
+                continue
+            cursor.execute('select pg_get_serial_sequence(%s, %s)', (table, column))
+            sequence = cursor.fetchone()[0]
+            if sequence is not None:
+                cursor.execute(sql.SQL('select setval(%s, max({})) from {}').format(
+                    sql.Identifier(column), sql.Identifier(table)), (sequence,))
+
+    def copy_related(self, tables, rows):
+        """
+        Streams tuples of rows, one per table (e.g. a catalog and its publish task): the first table is
+        copied while rows of the others are spooled to temporary files, then they are copied in order
+        """
+        spools = [tempfile.TemporaryFile() for _ in tables[1:]]
+        try:
+            def first_rows():
+                for related in rows:
+                    for spool, row in zip(spools, related[1:]):
+                        pickle.dump(row, spool)
+                    yield related[0]
+
+            reports = [self.copy(tables[0], first_rows())]
+            for table, spool in zip(tables[1:], spools):
+                reports.append(self.copy(table, _spooled_rows(spool)))
+            return reports
+        finally:
+            for spool in spools:
+                spool.close()
+
+    def ids(self, table, column='id'):
+        """
+        Endless new ids of the column: numbers after the largest one for integer columns, ULIDs otherwise.
+        `copy` moves the sequence of a serial or identity column past the copied ids.
+        """
+        if self.columns(table)[column].data_type not in INTEGER_TYPES:
+            return iter(ulids.next, None)
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql.SQL('select coalesce(max({}), 0) from {}').format(
+                    sql.Identifier(column), sql.Identifier(table)))
+                return count(cursor.fetchone()[0] + 1)
+        finally:
+            connection.close()
+
+
+def _spooled_rows(spool):
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def entity_data_rows(entities, etype, entity_ids, code_prefix='seeded'):
+    """
+    :param entity_ids: iterator of publisher ids, e.g. `BulkSeeder.ids('entity_data', 'entity_id')`
+    """
+    for index, entity_id in zip(range(entities), entity_ids):
+        yield {
+            'entity_id': entity_id,
+            'code': '{}_{}_{}'.format(code_prefix, etype, index),
+            'etype': etype,
+            'fields': {'code': '{}_{}_{}'.format(code_prefix, etype, index), 'index': index},
+            'metadata': {},
+        }
+
+
+def title_rows(codes, title_ids, full_title_ids):
+    """
+    Titles with the given codes, e.g. `ru.history_1000`
+    """
+    for code, title_id, full_title_id in zip(codes, title_ids, full_title_ids):
+        yield {
+            'id': title_id,
+            'code': code,
+            'full_title_id': full_title_id,
+        }
+
+
+def publication_history_rows(title_id, catalog_code_prefix, publications, catalog_ids, catalog_type='main',
+                             finished_at=None, interval=timedelta(hours=1)):
+    """
+    `publications` catalogs published one after another every `interval` until `finished_at`:
+    every one terminated by the next, the last one active. Yields (catalog row, task row) pairs.
+    """
+    finished_at = finished_at or datetime.utcnow()
+    started_at = finished_at - interval * publications
+    for index, catalog_id in zip(range(publications), catalog_ids):
+        created_at = started_at + interval * index
+        activated_at = created_at + timedelta(seconds=30)
+        terminated_at = activated_at + interval if index < publications - 1 else None
+        catalog_code = '{}_{}'.format(catalog_code_prefix, index + 1)
+        catalog = {
+            'id': catalog_id,
+            'code': catalog_code,
+            'title_id': title_id,
+            'ctype': catalog_type,
+            'created_at': created_at,
+            'activated_at': activated_at,
+            'terminated_at': terminated_at,
+        }
+        task = {
+            'id': ulids.next(),
+            'title_id': title_id,
+            'catalog_id': catalog_id,
+            'catalog_code': catalog_code,
+            'publisher': 'catool',
+            'status': PublishStatus.COMPLETED,
+            'created_at': created_at,
+            'started_at': created_at,
+            'finished_at': activated_at,
+            'tracking_id': ulids.next(),
+            'url': 'http://wiremock:8080/seeded/{}.zip'.format(catalog_code),
+            'node': None,
+        }
+        yield catalog, task
@@ -0,0 +1,87 @@
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT, parse_dsn
+
+DEFAULT_SNAPSHOT = 'cats_snapshot'
+MAINTENANCE_DB = 'postgres'
+
+
+class DatabaseSnapshot(object):
+    """
+    Freezes a database as a Postgres template and clones it back.
+
+    Cloning copies data files, so a restore takes seconds whatever was published. Both operations need
+    the database without connections: new ones are refused and existing ones (the service pool, listeners)
+    are terminated, clients have to reconnect.
+    """
+
+    def __init__(self, db_url, snapshot=DEFAULT_SNAPSHOT):
+        self.db_url = db_url
+        self.database = parse_dsn(db_url)['dbname']
+        self.snapshot = snapshot
+
+    def _connect(self):
+        connection = psycopg2.connect(self.db_url, dbname=MAINTENANCE_DB)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    def _database_exists(self, cursor, database):
+        cursor.execute('select 1 from pg_database where datname = %s', (database,))
+        return cursor.fetchone() is not None
+
+    def _disconnect(self, cursor, database):
+        cursor.execute(sql.SQL('alter database {} allow_connections false').format(sql.Identifier(database)))
+        cursor.execute('select pg_terminate_backend(pid) from pg_stat_activity '
+                       'where datname = %s and pid <> pg_backend_pid()', (database,))
+
+    def _drop(self, cursor, database):
+        cursor.execute(sql.SQL('alter database {} is_template false').format(sql.Identifier(database)))
+        # waits a few seconds for terminated backends to exit
+        cursor.execute(sql.SQL('drop database {}').format(sql.Identifier(database)))
+
+    def _clone(self, cursor, database, template):
+        cursor.execute(sql.SQL('create database {} template {}').format(
+            sql.Identifier(database), sql.Identifier(template)))
+
+    def exists(self):
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                return self._database_exists(cursor, self.snapshot)
+        finally:
+            connection.close()
+
+    def take(self):
+        """
+        Replaces the snapshot with a copy of the database
+        """
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                if self._database_exists(cursor, self.snapshot):
+                    self._drop(cursor, self.snapshot)
+                self._disconnect(cursor, self.database)
+                try:
+                    self._clone(cursor, self.snapshot, self.database)
+                finally:
+                    cursor.execute(sql.SQL('alter database {} allow_connections true').format(
+                        sql.Identifier(self.database)))
+                cursor.execute(sql.SQL('alter database {} is_template true allow_connections false').format(
+                    sql.Identifier(self.snapshot)))
+        finally:
+            connection.close()
+
+    def restore(self):
+        """
+        Replaces the database with a copy of the snapshot
+        """
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                assert self._database_exists(cursor, self.snapshot), \
+                    'snapshot {} of {} is not taken'.format(self.snapshot, self.database)
+                self._disconnect(cursor, self.database)
+                self._drop(cursor, self.database)
+                self._clone(cursor, self.database, self.snapshot)
+        finally:
+            connection.close()
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+
+from waiting.exceptions import TimeoutExpired
+
+from np_cats_qa.constants import PublishStatus
+from np_cats_qa.helpers import wait_timer
+
+FINISHED_STATUSES = (PublishStatus.COMPLETED, PublishStatus.FAILED)
+
+
+class TaskTimings(object):
+    """
+    Unix times when the waiter first saw each status of a publish task
+    """
+
+    def __init__(self, publish_id, started_at):
+        self.publish_id = publish_id
+        self.started_at = started_at
+        self.status = None
+        self.seen = OrderedDict()
+
+    def observe(self, status, at):
+        self.status = status
+        self.seen.setdefault(status, at)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def pending_at(self):
+        return self.seen.get(PublishStatus.PENDING)
+
+    @property
+    def in_progress_at(self):
+        return self.seen.get(PublishStatus.IN_PROGRESS)
+
+    @property
+    def finished_at(self):
+        return self.seen.get(self.status) if self.finished else None
+
+    def elapsed(self, status):
+        """
+        Seconds from the start of waiting until `status` was seen, None if it was not seen
+        """
+        at = self.seen.get(status)
+        return None if at is None else at - self.started_at
+
+    def as_dict(self):
+        return OrderedDict([
+            ('publish_id', self.publish_id),
+            ('status', self.status),
+            ('seen', OrderedDict((status, self.elapsed(status)) for status in self.seen)),
+        ])
+
+
+class BatchTaskStatusWaiter(object):
+    """
+    Tracks a set of publish tasks with a single `task` query per tick until all of them are finished
+    """
+
+    def __init__(self, is_db, sleep_seconds=0.1, timeout_seconds=30):
+        self.is_db = is_db
+        self.sleep_seconds = sleep_seconds
+        self.timeout_seconds = timeout_seconds
+
+    def wait(self, publish_ids, started_at=None):
+        with wait_timer.measure():
+            return self._wait(publish_ids, started_at)
+
+    def _wait(self, publish_ids, started_at):
+        started_at = started_at or time.time()
+        timings = OrderedDict((publish_id, TaskTimings(publish_id, started_at)) for publish_id in publish_ids)
+        unfinished = set(timings)
+        deadline = time.monotonic() + self.timeout_seconds
+        while unfinished:
+            statuses = self.is_db.get_publish_task_statuses(unfinished)
+            observed_at = time.time()
+            for publish_id, status in statuses.items():
+                timings[publish_id].observe(status, observed_at)
+                if status in FINISHED_STATUSES:
+                    unfinished.discard(publish_id)
+            if not unfinished:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutExpired(self.timeout_seconds,
+                                     '{} of {} tasks finished, waiting for {}'.format(
+                                         len(timings) - len(unfinished), len(timings), sorted(unfinished)))
+            time.sleep(self.sleep_seconds)
+        return timings
@@ -1,6 +1,13 @@
 from .cats import CatalogServiceSteps
+from .cats_async import AsyncCatalogServiceSteps
 
 
 class CatalogServiceHttpSteps(object):
     def __init__(self, base_url):
         self.cats = CatalogServiceSteps(base_url)
+
+
+class AsyncCatalogServiceHttpSteps(object):
+    def __init__(self, base_url, max_connections=100, max_concurrency=1000):
+        self.cats = AsyncCatalogServiceSteps(base_url, max_connections=max_connections,
+                                             max_concurrency=max_concurrency)
@@ -0,0 +1,287 @@
+import asyncio
+import json
+
+import aiohttp
+from ulid2 import generate_ulid_as_base32
+
+from np_cats_qa.steps.http.cats import get_headers
+
+
+class AsyncResponse(object):
+    """
+    Fully read response with the subset of `requests.Response` interface used by verifications
+    """
+
+    def __init__(self, method, url, status_code, headers, content):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def build_params(params):
+    # requests skips None values and expands lists, aiohttp accepts only str/int/float
+    result = []
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            result.append((key, item if isinstance(item, (str, int, float)) and not isinstance(item, bool)
+                           else str(item)))
+    return result
+
+
+class AsyncCatalogServiceSteps(object):
+    """
+    Asyncio counterpart of :class:`np_cats_qa.steps.http.cats.CatalogServiceSteps`.
+
+    All calls share one keep-alive connection pool of `max_connections` sockets and at most
+    `max_concurrency` requests are in flight at once, the rest wait for a free slot.
+    Methods are not reported as allure steps: thousands of concurrent calls would flood the report.
+    """
+
+    def __init__(self, base_url, max_connections=100, max_concurrency=1000, timeout_seconds=30):
+        self.base_url = base_url.rstrip('/')
+        self.default_headers = {
+            'Content-type': 'application/json',
+            'x-np-tracking-id': generate_ulid_as_base32()
+        }
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers=self.default_headers,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout_seconds))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    async def _request(self, method, url, params=None, json=None, headers=None):
+        await self.open()
+        async with self._semaphore:
+            async with self._session.request(method, self.base_url + url, params=build_params(params), json=json,
+                                             headers=headers) as response:
+                content = await response.read()
+                return AsyncResponse(method, str(response.url), response.status, response.headers, content)
+
+    async def _checked_request(self, method, url, params=None, json=None, headers=None):
+        response = await self._request(method, url, params=params, json=json, headers=headers)
+        assert 'x-np-tracking-id' in response.headers
+        return response
+
+    async def ping(self):
+        return await self._request('GET', '/ping')
+
+    async def healthy(self):
+        return await self._request('GET', '/healthy')
+
+    async def metrics(self):
+        return await self._request('GET', '/metrics')
+
+    async def swagger(self):
+        return await self._request('GET', '/swagger')
+
+    async def ignite_info(self):
+        return await self._request('GET', '/ignite/info')
+
+    async def publish(self, catalog_url=None, catalog_code=None, publish_id=None, data=None, tracking_id=None,
+                      emitter_id=None):
+        url = '/api/v1/catalog/publish'
+        if data is None:
+            data = dict(
+                url=catalog_url,
+                catalog_code=catalog_code,
+                publish_id=publish_id
+            )
+        return await self._checked_request('POST', url, json=data,
+                                           headers=get_headers(tracking_id=tracking_id, emitter_id=emitter_id))
+
+    async def publisher_catalog_publish(self, catalog_url=None, tool_name=None, catalog_code=None, publish_id=None,
+                                        data=None):
+        url = '/api/v1/{tool_name}/catalog/publish'.format(tool_name=tool_name)
+        if data is None:
+            data = dict(
+                url=catalog_url,
+                catalog_code=catalog_code,
+                publish_id=publish_id
+            )
+        return await self._checked_request('POST', url, json=data)
+
+    async def v2_catalog_publish(self, catalog_url=None, tool_name=None, title_code=None, catalog_type=None,
+                                 publish_id=None, data=None):
+        url = '/api/v2/{tool_name}/catalog/publish'.format(tool_name=tool_name)
+        if data is None:
+            data = dict(
+                url=catalog_url,
+                title_code=title_code,
+                catalog_type=catalog_type,
+                publish_id=publish_id
+            )
+        return await self._checked_request('POST', url, json=data)
+
+    async def v2_catalog_republish(self, tool_name=None, catalog_code=None, publish_id=None, data=None):
+        url = '/api/v2/{tool_name}/catalog/republish'.format(tool_name=tool_name)
+        if data is None:
+            data = dict(
+                catalog_code=catalog_code,
+                publish_id=publish_id
+            )
+        return await self._checked_request('POST', url, json=data)
+
+    async def migrate(self, catalog_url, catalog_code, activated_at, terminated_at=None):
+        url = '/api/v1/catalog/migrate'
+        data = dict(
+            url=catalog_url,
+            catalog_code=catalog_code,
+            activated_at=activated_at,
+            terminated_at=terminated_at
+        )
+        return await self._checked_request('POST', url, json=data)
+
+    async def get_active_catalog_by_title_code(self, title_code, type, tracking_id=None, emitter_id=None):
+        url = "/api/v1/titles/{title_code}/active_catalogs/{type}".format(title_code=title_code, type=type)
+        return await self._checked_request('GET', url,
+                                           headers=get_headers(tracking_id=tracking_id, emitter_id=emitter_id))
+
+    async def get_active_catalogs_by_title_code(self, title_code, type=None):
+        url = "/api/v1/titles/{title_code}/active_catalogs".format(title_code=title_code)
+        return await self._checked_request('GET', url, params={'type': type})
+
+    async def get_active_catalog(self, type=None, headers=None):
+        url = "/api/v1/titles/active_catalogs"
+        return await self._checked_request('GET', url, params={'type': type}, headers=headers)
+
+    async def get_catalog_publish_status(self, publish_id):
+        url = "/api/v1/catalog/publish/{publish_id}/status".format(publish_id=publish_id)
+        return await self._checked_request('GET', url)
+
+    async def get_entities_by_type_and_title_code(self, title_code, entity_type, tags=None, language=None):
+        url = "/api/v1/titles/{title_code}/entities/{entity_type}".format(title_code=title_code,
+                                                                          entity_type=entity_type)
+        return await self._checked_request('GET', url, params={'tags': tags, 'language': language})
+
+    async def get_entities_by_type_and_catalog_code(self, catalog_code, entity_type, language=None):
+        url = "/api/v1/catalogs/{catalog_code}/entities/{entity_type}".format(catalog_code=catalog_code,
+                                                                              entity_type=entity_type)
+        return await self._checked_request('GET', url, params={'language': language})
+
+    async def get_product_with_applied_promo(self, catalog_code, product_code, promo_code, storefront_code):
+        url = "/api/v1/catalog/{catalog_code}/product/{product_code}".format(catalog_code=catalog_code,
+                                                                             product_code=product_code)
+        params = {
+            'promo_code': promo_code,
+            'storefront_code': storefront_code
+        }
+        return await self._checked_request('GET', url, params=params)
+
+    async def get_initial_diff_by_type_and_catalog_code(self, destination_catalog_code, entity_type,
+                                                        fields=None, last_id=None, limit=None):
+        url = "/api/v1/catalogs/{destination_catalog_code}/entities/{entity_type}/diff/initial".format(
+            destination_catalog_code=destination_catalog_code,
+            entity_type=entity_type
+        )
+        params = {
+            'fields': fields,
+            'last_id': last_id,
+            'limit': limit
+        }
+        return await self._checked_request('GET', url, params=params)
+
+    async def get_diff_by_type_and_catalog_code(self, destination_catalog_code, entity_type, source_catalog_code,
+                                                fields=None, last_id=None, limit=None):
+        url = "/api/v1/catalogs/{destination_catalog_code}/entities/{entity_type}/diff/{source_catalog_code}".format(
+            destination_catalog_code=destination_catalog_code,
+            entity_type=entity_type,
+            source_catalog_code=source_catalog_code
+        )
+        params = {
+            'fields': fields,
+            'last_id': last_id,
+            'limit': limit
+        }
+        return await self._checked_request('GET', url, params=params)
+
+    async def get_entities_by_type_code_and_title_code(self, title_code, entity_type, code, language=None):
+        url = "/api/v1/titles/{title_code}/entities/{entity_type}/{code}".format(title_code=title_code,
+                                                                                 entity_type=entity_type,
+                                                                                 code=code)
+        return await self._checked_request('GET', url, params={'language': language})
+
+    async def get_catalog_by_code(self, catalog_code):
+        url = "/api/v1/catalogs/{catalog_code}".format(catalog_code=catalog_code)
+        return await self._checked_request('GET', url)
+
+    async def get_entitiy_by_id(self, entity_id, language=None):
+        url = "/api/v1/entities/{entity_id}".format(entity_id=entity_id)
+        return await self._checked_request('GET', url, params={'language': language})
+
+    async def get_entities_by_type_code_and_catalog_code(self, catalog_code, entity_type, code):
+        url = "/api/v1/catalogs/{catalog_code}/entities/{entity_type}/{code}".format(catalog_code=catalog_code,
+                                                                                     entity_type=entity_type,
+                                                                                     code=code)
+        return await self._checked_request('GET', url)
+
+    async def get_catalog_publications(self, title_code, limit=None):
+        url = "/api/v1/titles/{title_code}/catalog/publications".format(title_code=title_code)
+        return await self._checked_request('GET', url, params={'limit': limit})
+
+    async def get_currencies(self):
+        return await self._checked_request('GET', "/api/v1/currencies")
+
+    async def get_titles_by_entity_id(self, id):
+        url = "/api/v1/entities/{id}/titles".format(id=id)
+        return await self._checked_request('GET', url)
+
+    async def get_entities_by_id(self, id):
+        url = "/api/v1/entities/{id}".format(id=id)
+        return await self._checked_request('GET', url)
+
+    async def get_catalogs_by_entity_id(self, id):
+        url = "/api/v1/entities/{id}/catalogs".format(id=id)
+        return await self._checked_request('GET', url)
+
+    async def get_entities_by_code(self, code):
+        url = "/api/v1/entities/{code}/list".format(code=code)
+        return await self._checked_request('GET', url)
+
+    async def get_currencies_map(self):
+        return await self._checked_request('GET', "/api/v1/currencies/map")
+
+    async def get_entitlements(self):
+        return await self._checked_request('GET', "/api/v1/entitlements")
+
+    async def get_entitlements_map(self):
+        return await self._checked_request('GET', "/api/v1/entitlements/map")
+
+    async def delete_active_catalog_by_title_code(self, title_code, type, tracking_id=None, emitter_id=None):
+        url = "/api/v1/titles/{title_code}/active_catalogs/{type}".format(title_code=title_code, type=type)
+        return await self._checked_request('DELETE', url,
+                                           headers=get_headers(tracking_id=tracking_id, emitter_id=emitter_id))
+
+    async def update_titles(self):
+        return await self._checked_request('GET', "/api/v1/titles/update")
@@ -0,0 +1,188 @@
+import json
+import re
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+import requests
+from npqa_mock.wiremock.misc import process_body
+
+JOURNAL_INDEX_SIZE = 100000
+# wiremock can log a request after a later one was already pulled, every pull looks this far back
+JOURNAL_OVERLAP_MS = 5000
+ULID_IN_PATH = re.compile(r'/([0-9A-HJKMNP-TV-Z]{26})(?:/|$)')
+TRACKING_HEADER = 'x-np-tracking-id'
+
+
+def _deep_value(document, key):
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node and not isinstance(node[key], (dict, list)):
+                return node[key]
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None
+
+
+def _header(request, name):
+    for key, value in (request.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def correlation_keys(request):
+    """
+    Keys a journal request can be found by: method and path, `catalog_code` and `publish_id` from the body
+    (the publish id also from the path, e.g. `/catalog_publish/<id>/set_status/`) and the tracking header
+    """
+    path = request['url'].split('?')[0]
+    keys = [('url', request['method'], path)]
+    body = request.get('body')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = None
+    catalog_code = _deep_value(body, 'catalog_code')
+    if catalog_code is not None:
+        keys.append(('catalog_code', catalog_code))
+    publish_id = _deep_value(body, 'publish_id')
+    if publish_id is None:
+        match = ULID_IN_PATH.search(path)
+        publish_id = match.group(1) if match else None
+    if publish_id is not None:
+        keys.append(('publish_id', publish_id))
+    tracking_id = _header(request, TRACKING_HEADER)
+    if tracking_id is not None:
+        keys.append(('tracking_id', tracking_id))
+    return keys
+
+
+def received_at(request):
+    """
+    When the mock received the journal request, epoch seconds
+    """
+    return request['loggedDate'] / 1000.0
+
+
+def _since(logged_date):
+    # wiremock returns requests logged strictly after `since`, milliseconds precision
+    since = datetime.fromtimestamp(logged_date / 1000.0, tz=timezone.utc)
+    return since.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(since.microsecond // 1000)
+
+
+class IndexedJournal(object):
+    """
+    Local copy of the wiremock journal, pulled incrementally and indexed by correlation keys.
+
+    Every `sync` asks wiremock only for requests logged since the newest one already pulled, minus
+    `overlap_ms` (requests handled concurrently are not logged in order of their `loggedDate`); the
+    overlapping ones are told apart by serve event ids. Finding requests costs the number of recent
+    ones instead of the journal size. The last `size` requests are kept.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, base_url, size=JOURNAL_INDEX_SIZE, overlap_ms=JOURNAL_OVERLAP_MS):
+        self.base_url = base_url.rstrip('/')
+        self.size = size
+        self.overlap_ms = overlap_ms
+        self.requests = deque()
+        self.index = defaultdict(deque)
+        self.cursor = None
+        # serve event id -> loggedDate of requests pulled within the overlap window
+        self._recent_ids = {}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    @classmethod
+    def shared(cls, base_url):
+        """
+        One journal per wiremock in the process, so mock steps of every test continue from the same cursor
+        """
+        with cls._shared_lock:
+            if base_url not in cls._shared:
+                cls._shared[base_url] = cls(base_url)
+            return cls._shared[base_url]
+
+    def _pull(self):
+        params = {'since': _since(self.cursor - self.overlap_ms)} if self.cursor is not None else {}
+        response = self._session.get(self.base_url + '/__admin/requests', params=params)
+        response.raise_for_status()
+        # newest first
+        return list(reversed(response.json()['requests']))
+
+    def _add(self, request):
+        self.requests.append(request)
+        for key in request['correlation_keys']:
+            self.index[key].append(request)
+        while len(self.requests) > self.size:
+            oldest = self.requests.popleft()
+            for key in oldest['correlation_keys']:
+                queue = self.index[key]
+                queue.popleft()
+                if not queue:
+                    del self.index[key]
+
+    def sync(self):
+        """
+        Pulls requests logged since the last sync, returns how many were new
+        """
+        with self._lock:
+            new = 0
+            for event in self._pull():
+                if event['id'] in self._recent_ids:
+                    continue
+                request = process_body(event['request'])
+                request['serve_event_id'] = event['id']
+                request['correlation_keys'] = correlation_keys(request)
+                self._add(request)
+                new += 1
+                self._recent_ids[event['id']] = request['loggedDate']
+                if self.cursor is None or request['loggedDate'] > self.cursor:
+                    self.cursor = request['loggedDate']
+            if self.cursor is not None:
+                horizon = self.cursor - self.overlap_ms
+                self._recent_ids = {serve_event_id: logged_date
+                                    for serve_event_id, logged_date in self._recent_ids.items()
+                                    if logged_date > horizon}
+            return new
+
+    def find(self, method=None, url=None, catalog_code=None, publish_id=None, tracking_id=None, sync=True):
+        """
+        Requests matching all given keys, oldest first
+        """
+        if sync:
+            self.sync()
+        path = url.split('?')[0] if url is not None else None
+        keys = []
+        if path is not None and method is not None:
+            keys.append(('url', method.upper(), path))
+        if catalog_code is not None:
+            keys.append(('catalog_code', catalog_code))
+        if publish_id is not None:
+            keys.append(('publish_id', publish_id))
+        if tracking_id is not None:
+            keys.append(('tracking_id', tracking_id))
+        with self._lock:
+            if keys:
+                # the shortest queue is scanned, the other keys are checked on its requests
+                candidates = list(min((self.index.get(key, ()) for key in keys), key=len))
+            else:
+                candidates = list(self.requests)
+        return [request for request in candidates
+                if all(key in request['correlation_keys'] for key in keys)
+                and (method is None or request['method'] == method.upper())
+                and (url is None or request['url'] == url or path == url and request['url'].split('?')[0] == path)]
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.index.clear()
+            self.cursor = None
+            self._recent_ids = {}
@@ -0,0 +1,153 @@
+"""
+The part of JsonPath wiremock mappings of cats use: `$.a.b`, `$..a`, `$[0]`, `$.*` and filters
+`[?(@.a.b)]`, `[?(@.a OP value)]` with ==, !=, <, <=, >, >= and =~ /regex/flags.
+"""
+import json
+import re
+
+TOKEN = re.compile(r"""
+    (?P<deep>\.\.)
+  | (?P<dot>\.)
+  | \[\?\((?P<filter>.*?)\)\]
+  | \[(?P<index>-?\d+)\]
+  | \[['"](?P<quoted>[^'"]+)['"]\]
+  | (?P<wildcard>\*|\[\*\])
+  | (?P<name>[^.\[\]]+)
+""", re.VERBOSE)
+
+FILTER = re.compile(r"""
+    ^\s*@(?P<path>(?:\.[^\s=!<>~]+)*)\s*
+    (?:(?P<op>==|!=|<=|>=|<|>|=~)\s*(?P<value>.+?))?\s*$
+""", re.VERBOSE)
+
+MISSING = object()
+
+
+class JsonPathError(ValueError):
+    pass
+
+
+def _children(node):
+    if isinstance(node, dict):
+        return list(node.values())
+    if isinstance(node, list):
+        return list(node)
+    return []
+
+
+def _descendants(node):
+    # the node itself and everything below it, depth first
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(_children(current)))
+
+
+def _field(node, path):
+    for name in path:
+        if not isinstance(node, dict) or name not in node:
+            return MISSING
+        node = node[name]
+    return node
+
+
+def _literal(text):
+    if text.startswith('/'):
+        end = text.rfind('/')
+        flags = re.IGNORECASE if 'i' in text[end + 1:] else 0
+        return re.compile(text[1:end], flags)
+    if text[0] in '\'"' and text[-1] == text[0]:
+        return text[1:-1]
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise JsonPathError('unsupported filter value {}'.format(text))
+
+
+def _compile_filter(expression):
+    match = FILTER.match(expression)
+    if match is None:
+        raise JsonPathError('unsupported filter {}'.format(expression))
+    path = [name for name in match.group('path').split('.') if name]
+    op = match.group('op')
+    if op is None:
+        return lambda node: _field(node, path) is not MISSING
+    value = _literal(match.group('value'))
+
+    def test(node):
+        field = _field(node, path)
+        if field is MISSING:
+            return False
+        if op == '=~':
+            return isinstance(field, str) and value.fullmatch(field) is not None
+        if op == '==':
+            return field == value
+        if op == '!=':
+            return field != value
+        try:
+            return {'<': field < value, '<=': field <= value, '>': field > value, '>=': field >= value}[op]
+        except TypeError:
+            return False
+    return test
+
+
+class JsonPath(object):
+    def __init__(self, expression):
+        self.expression = expression
+        if not expression.startswith('$'):
+            raise JsonPathError('JsonPath has to start with $: {}'.format(expression))
+        self.steps = []
+        deep = False
+        position = 1
+        while position < len(expression):
+            match = TOKEN.match(expression, position)
+            if match is None:
+                raise JsonPathError('unsupported JsonPath {}'.format(expression))
+            position = match.end()
+            if match.group('deep'):
+                deep = True
+                continue
+            if match.group('dot'):
+                continue
+            if match.group('filter') is not None:
+                step = ('filter', _compile_filter(match.group('filter')))
+            elif match.group('index') is not None:
+                step = ('index', int(match.group('index')))
+            elif match.group('wildcard'):
+                step = ('wildcard', None)
+            else:
+                step = ('name', match.group('quoted') or match.group('name'))
+            self.steps.append((deep, step))
+            deep = False
+
+    def find(self, document):
+        nodes = [document]
+        for deep, (kind, argument) in self.steps:
+            if deep:
+                nodes = [descendant for node in nodes for descendant in _descendants(node)]
+            found = []
+            for node in nodes:
+                if kind == 'name':
+                    if isinstance(node, dict) and argument in node:
+                        found.append(node[argument])
+                elif kind == 'index':
+                    if isinstance(node, list) and -len(node) <= argument < len(node):
+                        found.append(node[argument])
+                elif kind == 'wildcard':
+                    found.extend(_children(node))
+                elif deep:
+                    # a deep scan tests every object below, items of arrays included
+                    if isinstance(node, dict) and argument(node):
+                        found.append(node)
+                elif isinstance(node, list):
+                    found.extend(item for item in node if argument(item))
+                elif isinstance(node, dict):
+                    # filters on objects test the object itself, as Jayway JsonPath does
+                    if argument(node):
+                        found.append(node)
+            nodes = found
+        return nodes
+
+    def matches(self, document):
+        return bool(self.find(document))
@@ -0,0 +1,13 @@
+from os import listdir, path
+
+from np_cats_qa.steps.mock.template import RequestTemplate
+
+
+def load_templates():
+    folder = path.dirname(__file__)
+    return {filename: RequestTemplate.from_file(path.join(folder, filename))
+            for filename in sorted(listdir(folder)) if filename.endswith('.json')}
+
+
+# compiled once, verifications only substitute and compare
+REQUEST_TEMPLATES = load_templates()
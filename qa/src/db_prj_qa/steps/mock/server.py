@@ -0,0 +1,499 @@
+"""
+Asyncio stand-in for wiremock serving the stubs of `docker/wiremock`.
+
+Supported mappings: request `method`, `url`, `urlPattern`, `urlPath`, `urlPathPattern`, `headers` and
+`bodyPatterns` (equalTo, contains, matches, doesNotMatch, equalToJson, matchesJsonPath), `priority`,
+scenarios, response `status`, `headers`, `body`, `jsonBody`, `base64Body`, `bodyFileName` and
+`fixedDelayMilliseconds`. The admin API is the subset of wiremock's one the tests use
+(`/__admin/mappings`, `/__admin/requests`, `/__admin/requests/find`, `/__admin/requests/count`,
+`/__admin/scenarios/reset`, `/__admin/reset`), so `CatalogServiceMockSteps` talks to it as to wiremock.
+
+The request journal keeps the last `journal_size` requests, indexed by method and path.
+
+    $ python -m np_cats_qa.steps.mock.server --root ../docker/wiremock --port 8080
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from np_cats_qa.steps.mock.jsonpath import JsonPath
+
+DEFAULT_PRIORITY = 5
+STARTED_STATE = 'Started'
+JOURNAL_SIZE = 100000
+ADMIN_PREFIX = '/__admin'
+
+
+def _path(url):
+    return urlsplit(url).path
+
+
+def _json_or_none(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class ValuePattern(object):
+    """
+    One wiremock string matcher: {"equalTo": ...}, {"contains": ...}, {"matches": ...}, ...
+    """
+
+    def __init__(self, definition):
+        if isinstance(definition, str):
+            definition = {'equalTo': definition}
+        self.definition = definition
+        self.kind, self.expected = next((key, value) for key, value in definition.items()
+                                        if key in ('equalTo', 'contains', 'matches', 'doesNotMatch', 'absent',
+                                                   'equalToJson', 'matchesJsonPath'))
+        self.case_insensitive = definition.get('caseInsensitive', False)
+        if self.kind in ('matches', 'doesNotMatch'):
+            self._regex = re.compile(self.expected, re.DOTALL)
+        elif self.kind == 'matchesJsonPath':
+            expression = self.expected if isinstance(self.expected, str) else self.expected['expression']
+            self._json_path = JsonPath(expression)
+        elif self.kind == 'equalToJson':
+            self._json = json.loads(self.expected) if isinstance(self.expected, str) else self.expected
+
+    def matches(self, value, parsed_json=None):
+        if self.kind == 'absent':
+            return value is None
+        if value is None:
+            return False
+        if self.kind == 'equalTo':
+            if self.case_insensitive:
+                return value.lower() == self.expected.lower()
+            return value == self.expected
+        if self.kind == 'contains':
+            return self.expected in value
+        if self.kind == 'matches':
+            return self._regex.fullmatch(value) is not None
+        if self.kind == 'doesNotMatch':
+            return self._regex.fullmatch(value) is None
+        document = parsed_json if parsed_json is not None else _json_or_none(value)
+        if document is None:
+            return False
+        if self.kind == 'equalToJson':
+            return document == self._json
+        return self._json_path.matches(document)
+
+
+class RequestPattern(object):
+    """
+    Request part of a mapping, also the body of `/__admin/requests/find`
+    """
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.method = definition.get('method', 'ANY').upper()
+        self.url = definition.get('url')
+        self.url_path = definition.get('urlPath')
+        self._url_regex = re.compile(definition['urlPattern']) if 'urlPattern' in definition else None
+        self._path_regex = re.compile(definition['urlPathPattern']) if 'urlPathPattern' in definition else None
+        self.headers = [(name.lower(), ValuePattern(pattern))
+                        for name, pattern in (definition.get('headers') or {}).items()]
+        self.body_patterns = [ValuePattern(pattern) for pattern in definition.get('bodyPatterns') or []]
+
+    @property
+    def exact_path(self):
+        """
+        Path every matching request has, if the pattern fixes it
+        """
+        if self.url is not None:
+            return _path(self.url)
+        return self.url_path
+
+    def matches(self, request):
+        """
+        :type request: LoggedRequest
+        """
+        if self.method != 'ANY' and self.method != request.method:
+            return False
+        if self.url is not None and self.url != request.url:
+            return False
+        if self.url_path is not None and self.url_path != request.path:
+            return False
+        if self._url_regex is not None and self._url_regex.fullmatch(request.url) is None:
+            return False
+        if self._path_regex is not None and self._path_regex.fullmatch(request.path) is None:
+            return False
+        for name, pattern in self.headers:
+            if not pattern.matches(request.header(name)):
+                return False
+        for pattern in self.body_patterns:
+            if not pattern.matches(request.body, request.json):
+                return False
+        return True
+
+
+class StubMapping(object):
+    def __init__(self, definition, sequence):
+        self.definition = definition
+        self.id = definition.setdefault('id', str(uuid.uuid4()))
+        self.sequence = sequence
+        self.priority = definition.get('priority', DEFAULT_PRIORITY)
+        self.request = RequestPattern(definition.get('request', {}))
+        self.response = definition.get('response', {})
+        self.scenario = definition.get('scenarioName')
+        self.required_state = definition.get('requiredScenarioState')
+        self.new_state = definition.get('newScenarioState')
+
+    @property
+    def order(self):
+        # lower priority first, the latest added first among equal ones, as wiremock does
+        return self.priority, -self.sequence
+
+
+class LoggedRequest(object):
+    def __init__(self, sequence, method, url, headers, body, client_ip, logged_at):
+        self.sequence = sequence
+        self.method = method
+        self.url = url
+        self.path = _path(url)
+        self.headers = headers
+        self.body = body
+        self.client_ip = client_ip
+        self.logged_at = logged_at
+        self.was_matched = False
+        self.stub_id = None
+        self._json = None
+
+    @property
+    def json(self):
+        if self._json is None:
+            self._json = _json_or_none(self.body)
+        return self._json
+
+    def header(self, name):
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+    @property
+    def logged_date_string(self):
+        logged = datetime.fromtimestamp(self.logged_at, tz=timezone.utc)
+        return logged.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(logged.microsecond // 1000)
+
+    def as_dict(self, host):
+        return OrderedDict([
+            ('url', self.url),
+            ('absoluteUrl', 'http://{}{}'.format(host, self.url)),
+            ('method', self.method),
+            ('clientIp', self.client_ip),
+            ('headers', dict(self.headers)),
+            ('cookies', {}),
+            ('browserProxyRequest', False),
+            ('loggedDate', int(self.logged_at * 1000)),
+            ('bodyAsBase64', base64.b64encode(self.body.encode('utf-8')).decode('ascii')),
+            ('body', self.body),
+            ('loggedDateString', self.logged_date_string),
+        ])
+
+    def serve_event(self, host):
+        return OrderedDict([
+            ('id', str(uuid.UUID(int=self.sequence))),
+            ('request', self.as_dict(host)),
+            ('wasMatched', self.was_matched),
+        ])
+
+
+class RequestJournal(object):
+    """
+    The last `size` requests; requests by method and path are kept in their own queues,
+    so finding them by a pattern with a fixed url does not scan the rest of the journal
+    """
+
+    def __init__(self, size=JOURNAL_SIZE):
+        self.size = size
+        self.requests = deque()
+        self.by_path = defaultdict(deque)
+        self._sequence = itertools.count(1)
+
+    def add(self, method, url, headers, body, client_ip):
+        request = LoggedRequest(next(self._sequence), method, url, headers, body, client_ip, time.time())
+        self.requests.append(request)
+        self.by_path[(method, request.path)].append(request)
+        while len(self.requests) > self.size:
+            oldest = self.requests.popleft()
+            queue = self.by_path[(oldest.method, oldest.path)]
+            queue.popleft()
+            if not queue:
+                del self.by_path[(oldest.method, oldest.path)]
+        return request
+
+    def _candidates(self, pattern):
+        path = pattern.exact_path
+        if path is None:
+            return self.requests
+        if pattern.method != 'ANY':
+            return self.by_path.get((pattern.method, path), ())
+        return sorted((request for (method, request_path), queue in self.by_path.items() if request_path == path
+                       for request in queue), key=lambda request: request.sequence)
+
+    def find(self, pattern):
+        return [request for request in self._candidates(pattern) if pattern.matches(request)]
+
+    def since(self, logged_after=None, limit=None):
+        """
+        Requests newest first, as `GET /__admin/requests` returns them; requests are added in the order
+        they are logged, so only the ones after `logged_after` are visited
+        """
+        requests = []
+        for request in reversed(self.requests):
+            if logged_after is not None and request.logged_at <= logged_after:
+                break
+            if limit is not None and len(requests) >= limit:
+                break
+            requests.append(request)
+        return requests
+
+    def clear(self):
+        self.requests.clear()
+        self.by_path.clear()
+
+
+class MockServer(object):
+    """
+    :param root: wiremock root with `mappings/` and `__files/`
+    """
+
+    def __init__(self, root, host='0.0.0.0', port=8080, journal_size=JOURNAL_SIZE):
+        self.root = root
+        self.host = host
+        self.port = port
+        self.journal = RequestJournal(journal_size)
+        self.stubs = []
+        self.by_path = {}
+        self.pattern_stubs = []
+        self.scenarios = {}
+        self._sequence = itertools.count()
+        self._runner = None
+        self.load_mappings()
+
+    @property
+    def files_path(self):
+        return os.path.join(self.root, '__files')
+
+    def load_mappings(self):
+        self.stubs = []
+        mappings_path = os.path.join(self.root, 'mappings')
+        for file_name in sorted(os.listdir(mappings_path)) if os.path.isdir(mappings_path) else []:
+            if file_name.endswith('.json'):
+                with open(os.path.join(mappings_path, file_name)) as f:
+                    definition = json.load(f)
+                for mapping in definition.get('mappings', [definition]):
+                    self.stubs.append(StubMapping(mapping, next(self._sequence)))
+        self.reset_scenarios()
+        self._index()
+
+    def add_stub(self, definition):
+        stub = StubMapping(definition, next(self._sequence))
+        self.stubs = [existing for existing in self.stubs if existing.id != stub.id] + [stub]
+        if stub.scenario is not None:
+            self.scenarios.setdefault(stub.scenario, STARTED_STATE)
+        self._index()
+        return stub
+
+    def remove_stub(self, stub_id):
+        stubs = [stub for stub in self.stubs if stub.id != stub_id]
+        removed = len(stubs) != len(self.stubs)
+        self.stubs = stubs
+        self._index()
+        return removed
+
+    def reset_scenarios(self):
+        self.scenarios = {stub.scenario: STARTED_STATE for stub in self.stubs if stub.scenario is not None}
+
+    def _index(self):
+        # stubs with a fixed path are looked up by it, the rest are tried for every request
+        by_path = defaultdict(list)
+        pattern_stubs = []
+        for stub in self.stubs:
+            path = stub.request.exact_path
+            if path is not None:
+                by_path[path].append(stub)
+            else:
+                pattern_stubs.append(stub)
+        self.by_path = dict(by_path)
+        self.pattern_stubs = pattern_stubs
+
+    def match(self, request):
+        candidates = sorted(self.by_path.get(request.path, []) + self.pattern_stubs, key=lambda stub: stub.order)
+        for stub in candidates:
+            if stub.scenario is not None and stub.required_state is not None and \
+                    self.scenarios.get(stub.scenario, STARTED_STATE) != stub.required_state:
+                continue
+            if stub.request.matches(request):
+                if stub.scenario is not None and stub.new_state is not None:
+                    self.scenarios[stub.scenario] = stub.new_state
+                return stub
+        return None
+
+    async def _respond(self, stub):
+        response = stub.response
+        delay = response.get('fixedDelayMilliseconds')
+        if delay:
+            await asyncio.sleep(int(delay) / 1000.0)
+        headers = {}
+        for name, value in (response.get('headers') or {}).items():
+            headers[name] = ', '.join(value) if isinstance(value, list) else str(value)
+        status = response.get('status', 200)
+        if 'bodyFileName' in response:
+            path = os.path.join(self.files_path, response['bodyFileName'])
+            if not os.path.isfile(path):
+                return web.Response(status=500, text='body file {} is not found'.format(response['bodyFileName']))
+            return web.FileResponse(path, status=status, headers=headers)
+        if 'jsonBody' in response:
+            body = json.dumps(response['jsonBody']).encode('utf-8')
+        elif 'base64Body' in response:
+            body = base64.b64decode(response['base64Body'])
+        else:
+            body = response.get('body', '').encode('utf-8')
+        return web.Response(status=status, headers=headers, body=body)
+
+    async def handle_stub(self, http_request):
+        body = (await http_request.read()).decode('utf-8', errors='replace')
+        request = self.journal.add(http_request.method, http_request.path_qs, dict(http_request.headers), body,
+                                   http_request.remote)
+        stub = self.match(request)
+        if stub is None:
+            return web.Response(status=404, text='No response could be served as there are no stub mappings '
+                                                 'which match the request')
+        request.was_matched = True
+        request.stub_id = stub.id
+        return await self._respond(stub)
+
+    # admin API
+
+    async def admin_root(self, http_request):
+        return web.json_response({'status': 'ok'})
+
+    async def get_mappings(self, http_request):
+        mappings = [stub.definition for stub in sorted(self.stubs, key=lambda stub: stub.order)]
+        return web.json_response({'mappings': mappings, 'meta': {'total': len(mappings)}})
+
+    async def create_mapping(self, http_request):
+        stub = self.add_stub(await http_request.json())
+        return web.json_response(stub.definition, status=201)
+
+    async def delete_mappings(self, http_request):
+        self.stubs = []
+        self._index()
+        return web.json_response({})
+
+    async def get_mapping(self, http_request):
+        for stub in self.stubs:
+            if stub.id == http_request.match_info['id']:
+                return web.json_response(stub.definition)
+        return web.Response(status=404)
+
+    async def delete_mapping(self, http_request):
+        if self.remove_stub(http_request.match_info['id']):
+            return web.json_response({})
+        return web.Response(status=404)
+
+    async def reset_mappings(self, http_request):
+        self.load_mappings()
+        return web.json_response({})
+
+    async def get_requests(self, http_request):
+        since = http_request.query.get('since')
+        logged_after = None
+        if since:
+            logged_after = datetime.strptime(since.replace('Z', '+0000'), '%Y-%m-%dT%H:%M:%S.%f%z').timestamp()
+        limit = int(http_request.query['limit']) if 'limit' in http_request.query else None
+        requests = self.journal.since(logged_after, limit)
+        return web.json_response({
+            'requests': [request.serve_event(http_request.host) for request in requests],
+            'meta': {'total': len(self.journal.requests)},
+            'requestJournalDisabled': False,
+        })
+
+    async def find_requests(self, http_request):
+        pattern = RequestPattern(await http_request.json())
+        requests = self.journal.find(pattern)
+        return web.json_response({'requests': [request.as_dict(http_request.host) for request in requests]})
+
+    async def count_requests(self, http_request):
+        pattern = RequestPattern(await http_request.json())
+        return web.json_response({'count': len(self.journal.find(pattern))})
+
+    async def clear_requests(self, http_request):
+        self.journal.clear()
+        return web.json_response({})
+
+    async def reset_scenarios_handler(self, http_request):
+        self.reset_scenarios()
+        return web.json_response({})
+
+    async def reset(self, http_request):
+        self.load_mappings()
+        self.journal.clear()
+        return web.json_response({})
+
+    def app(self):
+        app = web.Application(client_max_size=1024 ** 3)
+        admin = [
+            ('GET', '', self.admin_root),
+            ('GET', '/', self.admin_root),
+            ('GET', '/mappings', self.get_mappings),
+            ('POST', '/mappings', self.create_mapping),
+            ('DELETE', '/mappings', self.delete_mappings),
+            ('POST', '/mappings/reset', self.reset_mappings),
+            ('GET', '/mappings/{id}', self.get_mapping),
+            ('DELETE', '/mappings/{id}', self.delete_mapping),
+            ('GET', '/requests', self.get_requests),
+            ('DELETE', '/requests', self.clear_requests),
+            ('POST', '/requests/reset', self.clear_requests),
+            ('POST', '/requests/find', self.find_requests),
+            ('POST', '/requests/count', self.count_requests),
+            ('POST', '/scenarios/reset', self.reset_scenarios_handler),
+            ('POST', '/reset', self.reset),
+        ]
+        for method, path, handler in admin:
+            app.router.add_route(method, ADMIN_PREFIX + path, handler)
+        app.router.add_route('*', '/{tail:.*}', self.handle_stub)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def run(self):
+        web.run_app(self.app(), host=self.host, port=self.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve wiremock mappings with the native mock server')
+    parser.add_argument('--root', default=os.path.join('..', 'docker', 'wiremock'),
+                        help='directory with mappings/ and __files/')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--journal-size', type=int, default=JOURNAL_SIZE,
+                        help='number of requests kept in the journal')
+    args = parser.parse_args()
+    MockServer(args.root, host=args.host, port=args.port, journal_size=args.journal_size).run()
+
+
+if __name__ == '__main__':
+    main()
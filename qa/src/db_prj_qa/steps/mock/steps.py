@@ -12,12 +12,15 @@ from npqa_mock.wiremock.misc import process_body
 from npqa_mock.wiremock.patterns import Request, Response
 from npqa_report.decorators import step
 
+from np_cats_qa.catalog.generator import wiremock_mapping
 from np_cats_qa.constants import CatalogZIP
+from np_cats_qa.steps.mock.journal import IndexedJournal
 
 
 class CatalogServiceMockSteps(object):
     def __init__(self, host, port):
         self.client = CustomWiremockClient(host, port)
+        self.journal = IndexedJournal.shared('http://{}:{}'.format(host, port))
 
     @step
     def setup_prepare(self, catalog_code, body):
@@ -35,6 +38,13 @@ class CatalogServiceMockSteps(object):
         self.client.create_stub(stub)
         return stub
 
+    @step
+    def setup_catalog_file(self, catalog_file):
+        # catalog_file has to be present in wiremock __files/catalogs, e.g. written by catalog.generator
+        mapping = wiremock_mapping(catalog_file)
+        self.client.create_mapping(mapping)
+        return mapping
+
     @step
     def journal_get_all_requests(self):
         return self.client.get_all_requests()
@@ -43,8 +53,17 @@ class CatalogServiceMockSteps(object):
     def journal_get_requests_by_pattern(self, request_pattern):
         return self.client.get_requests_by_pattern(request_pattern)
 
+    @step
+    def journal_find(self, method=None, url=None, catalog_code=None, publish_id=None, tracking_id=None):
+        """
+        Journal requests by correlation keys, pulling only requests logged since the previous call
+        """
+        return self.journal.find(method=method, url=url, catalog_code=catalog_code, publish_id=publish_id,
+                                 tracking_id=tracking_id)
+
     @step
     def journal_clear_history(self):
+        self.journal.reset()
         return self.client.clear_history()
 
 
@@ -59,10 +78,16 @@ class CustomWiremockClient(WiremockClient):
         # process_body(rq) instead of process_body(rq['request'])
         return [process_body(rq) for rq in json.loads(response.content)['requests']]
 
+    def create_mapping(self, mapping):
+        response = requests.post(self.__get_base_url() + '/__admin/mappings', json=mapping)
+        response.raise_for_status()
+        return response.json()
+
 
 class WiremockHttpSteps(object):
 
     def __init__(self, base_url):
+        self.base_url = base_url
         self.client = HttpClient(base_url)
         self.mock_client = WiremockClient(base_url)
 
@@ -71,3 +96,13 @@ class WiremockHttpSteps(object):
         response = self.client.get("/{catalog_file}".format(catalog_file=catalog_file))
         catalog_zipped = zipfile.ZipFile(io.BytesIO(response.content))
         catalog_zipped.extractall(extract_path)
+
+    @step
+    def download_catalog_to(self, target_path, catalog_file=CatalogZIP.DEFAULT_CATALOG, chunk_size=1024 * 1024):
+        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+        with requests.get("{}/{}".format(self.base_url, catalog_file), stream=True) as response:
+            response.raise_for_status()
+            with open(target_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        return target_path
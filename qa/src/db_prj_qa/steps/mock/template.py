@@ -0,0 +1,147 @@
+"""
+Request templates compiled into structural matchers.
+
+A template is JSON with `$name` placeholders in string values, e.g. `{"catalog_code": "$catalog_code"}`.
+It is parsed once; matching substitutes placeholders of the compared strings only and never changes
+the matched document.
+
+Ignored fields are given as paths: a single name (`published_at`) is ignored at any depth, items of
+arrays included; a dotted path (`body.items.*.id`) is anchored at the root, `*` stands for any key
+or array index.
+"""
+import json
+from functools import lru_cache
+from string import Template
+
+ANY = '*'
+
+
+class _IgnoredPaths(object):
+    def __init__(self, paths):
+        self.names = frozenset(path for path in paths if '.' not in path)
+        self.anchored = [tuple(path.split('.')) for path in paths if '.' in path]
+
+    def __call__(self, location, key):
+        if key in self.names:
+            return True
+        path = location + (key,)
+        return any(len(anchored) == len(path) and all(part in (ANY, str(step)) for part, step in zip(anchored, path))
+                   for anchored in self.anchored)
+
+
+@lru_cache(maxsize=None)
+def _ignored_paths(paths):
+    return _IgnoredPaths(paths)
+
+
+def _path(location):
+    return '.'.join(str(step) for step in location) or '$'
+
+
+class _Literal(object):
+    def __init__(self, value):
+        self.value = value
+
+    def render(self, params, ignored, location):
+        return self.value
+
+    def compare(self, actual, params, ignored, location, mismatches):
+        if actual != self.value:
+            mismatches.append('{}: expected {!r}, got {!r}'.format(_path(location), self.value, actual))
+
+
+class _Placeholder(_Literal):
+    def __init__(self, text):
+        super(_Placeholder, self).__init__(text)
+        self.template = Template(text)
+
+    def render(self, params, ignored, location):
+        return self.template.substitute(params)
+
+    def compare(self, actual, params, ignored, location, mismatches):
+        expected = self.render(params, ignored, location)
+        if actual != expected:
+            mismatches.append('{}: expected {!r}, got {!r}'.format(_path(location), expected, actual))
+
+
+class _Object(object):
+    def __init__(self, fields):
+        self.fields = fields
+
+    def render(self, params, ignored, location):
+        return {key: node.render(params, ignored, location + (key,))
+                for key, node in self.fields.items() if not ignored(location, key)}
+
+    def compare(self, actual, params, ignored, location, mismatches):
+        if not isinstance(actual, dict):
+            mismatches.append('{}: expected an object, got {!r}'.format(_path(location), actual))
+            return
+        for key, node in self.fields.items():
+            if ignored(location, key):
+                continue
+            if key not in actual:
+                mismatches.append('{}: missing'.format(_path(location + (key,))))
+            else:
+                node.compare(actual[key], params, ignored, location + (key,), mismatches)
+        for key in actual:
+            if key not in self.fields and not ignored(location, key):
+                mismatches.append('{}: unexpected {!r}'.format(_path(location + (key,)), actual[key]))
+
+
+class _Array(object):
+    def __init__(self, items):
+        self.items = items
+
+    def render(self, params, ignored, location):
+        return [node.render(params, ignored, location + (index,))
+                for index, node in enumerate(self.items) if not ignored(location, index)]
+
+    def compare(self, actual, params, ignored, location, mismatches):
+        if not isinstance(actual, list):
+            mismatches.append('{}: expected an array, got {!r}'.format(_path(location), actual))
+            return
+        kept = [(index, node) for index, node in enumerate(self.items) if not ignored(location, index)]
+        actual_kept = [(index, item) for index, item in enumerate(actual) if not ignored(location, index)]
+        if len(kept) != len(actual_kept):
+            mismatches.append('{}: expected {} items, got {}'.format(_path(location), len(kept), len(actual_kept)))
+            return
+        for (index, node), (_, item) in zip(kept, actual_kept):
+            node.compare(item, params, ignored, location + (index,), mismatches)
+
+
+def _compile(document):
+    if isinstance(document, dict):
+        return _Object({key: _compile(value) for key, value in document.items()})
+    if isinstance(document, list):
+        return _Array([_compile(item) for item in document])
+    if isinstance(document, str) and '$' in document:
+        return _Placeholder(document)
+    return _Literal(document)
+
+
+class RequestTemplate(object):
+    def __init__(self, name, document):
+        self.name = name
+        self.root = _compile(document)
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename) as f:
+            return cls(filename, json.load(f))
+
+    def render(self, params, ignore=()):
+        """
+        Expected document for the params, without ignored fields
+        """
+        return self.root.render(params, _ignored_paths(tuple(ignore)), ())
+
+    def mismatches(self, actual, params, ignore=()):
+        """
+        Differences of `actual` from the template, one line per field
+        """
+        mismatches = []
+        self.root.compare(actual, params, _ignored_paths(tuple(ignore)), (), mismatches)
+        return mismatches
+
+    def matches(self, actual, params, ignore=()):
+        return not self.mismatches(actual, params, ignore)
@@ -1,24 +1,28 @@
-import io
 import json
 import os
 import re
-import zipfile
-from pathlib import Path
-from string import Template
+from collections import OrderedDict
 
+import allure
 from hamcrest import equal_to, has_property, all_of
 from hamcrest import has_entry, has_entries, empty, matches_regexp
 from npqa_matchers.http import has_status_code
 from npqa_matchers.jsonschema import has_valid_schema
-from npqa_mock.wiremock.patterns import Request
 from npqa_report import assert_that
 from requests import codes
 from waiting import wait
+from waiting.exceptions import TimeoutExpired
 
+from np_cats_qa.catalog.compare import CATALOG_FILE_KEYS, ENTITY_TYPE_FILES, compare_catalog_zips
+from np_cats_qa.catalog.diff_oracle import compare_diff, expected_diff, iter_diff_items
+from np_cats_qa.catalog.merkle import api_entities, catalog_zip_entities, digest_catalog_api, digest_catalog_zip, \
+    drill_down
 from np_cats_qa.constants import PublishStatus, CatalogStatus, SERVICE_REALM
 from np_cats_qa.data.schemas import FAILED_RESPONSE
-from np_cats_qa.helpers import wait, delete_keys_from_dict
+from np_cats_qa.helpers import wait
 from np_cats_qa.matchers import not_empty
+from np_cats_qa.steps.db.waiter import BatchTaskStatusWaiter
+from np_cats_qa.steps.mock.request_templates import REQUEST_TEMPLATES
 
 
 def verify_catools_notification_sent(mock_steps, status, publish_id, catalog_code, reason=None):
@@ -31,8 +35,9 @@ def verify_catools_notification_sent(mock_steps, status, publish_id, catalog_cod
     headers = [{'name': 'toolscontext', 'value': '{{"environment":"{0}","title":"{1}"}}'.format(SERVICE_REALM, title)},
                {'name': 'x-auth-secret', 'value': 'test-secret_key'}]
 
-    verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id), "put_request.json",
-                            params, ['reason'] if reason is None else [], 'PUT', headers=headers)
+    return verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id),
+                                   "put_request.json", params, ['reason'] if reason is None else [], 'PUT',
+                                   headers=headers)
 
 
 def verify_coupons_notification_sent(mock_steps, status, publish_id, catalog_code, reason=None):
@@ -44,8 +49,9 @@ def verify_coupons_notification_sent(mock_steps, status, publish_id, catalog_cod
     )
     headers = [{'name': 'toolscontext', 'value': '{{"environment":"{0}","title":"{1}"}}'.format(SERVICE_REALM, title)}]
 
-    verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id), "put_request.json",
-                            params, ['reason'] if reason is None else [], 'PUT', headers=headers)
+    return verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id),
+                                   "put_request.json", params, ['reason'] if reason is None else [], 'PUT',
+                                   headers=headers)
 
 
 def verify_common_notification_sent(mock_steps, status, publish_id, reason=None):
@@ -54,8 +60,8 @@ def verify_common_notification_sent(mock_steps, status, publish_id, reason=None)
         reason=reason
     )
 
-    verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id), "put_request.json",
-                            params, ['reason'] if reason is None else [], 'PUT')
+    return verify_wiremock_request(mock_steps, "/api/v1/catalog_publish/{}/set_status/".format(publish_id),
+                                   "put_request.json", params, ['reason'] if reason is None else [], 'PUT')
 
 
 def has_valid_catalog_publications_info(status, publish_id, catalog_code, failure_reason=None):
@@ -81,7 +87,7 @@ def verify_prepare_method_called(mock_steps, catalog_code):
     params = dict(
         catalog_code=catalog_code
     )
-    verify_wiremock_request(mock_steps, "/catalog/api/v1/prepare", "prepare_activated_request.json", params, )
+    return verify_wiremock_request(mock_steps, "/catalog/api/v1/prepare", "prepare_activated_request.json", params, )
 
 
 def verify_prepare_method_called_n_times(mock_steps, catalog_code, nTimes):
@@ -89,7 +95,8 @@ def verify_prepare_method_called_n_times(mock_steps, catalog_code, nTimes):
         catalog_code=catalog_code
     )
     verify_wiremock_request(mock_steps, "/catalog/api/v1/prepare", "prepare_activated_request.json", params, )
-    assert_that(len(get_request(mock_steps, "/catalog/api/v1/prepare", 'POST')), equal_to(nTimes))
+    assert_that(len(mock_steps.journal_find(method='POST', url="/catalog/api/v1/prepare", catalog_code=catalog_code)),
+                equal_to(nTimes))
 
 
 def verify_franz_event_sent(mock_steps, catalog_code, title_code):
@@ -97,23 +104,21 @@ def verify_franz_event_sent(mock_steps, catalog_code, title_code):
         catalog_code=catalog_code,
         title_code=title_code
     )
-    verify_wiremock_request(mock_steps,
-                            "/streams/api/v1/pushEvent/{}.np.catalogs.catalog_publish_v1".format(SERVICE_REALM),
-                            "np.catalogs.catalog_publish_v1.json", params, ignore_params=["header", "published_at"])
+    return verify_wiremock_request(mock_steps,
+                                   "/streams/api/v1/pushEvent/{}.np.catalogs.catalog_publish_v1".format(SERVICE_REALM),
+                                   "np.catalogs.catalog_publish_v1.json", params,
+                                   ignore_params=["header", "published_at"])
 
 
 def verify_activated_method_called(mock_steps, catalog_code):
     params = dict(
         catalog_code=catalog_code
     )
-    verify_wiremock_request(mock_steps, "/catalog/api/v1/activated", "prepare_activated_request.json", params)
+    return verify_wiremock_request(mock_steps, "/catalog/api/v1/activated", "prepare_activated_request.json", params)
 
 
 def get_request(mock_steps, request_url, request_method='POST'):
-    request = Request() \
-        .with_method(request_method) \
-        .with_url(url=request_url)
-    return mock_steps.journal_get_requests_by_pattern(request)
+    return mock_steps.journal_find(method=request_method, url=request_url)
 
 
 def findMetricValue(is_http, label, flow=None, critical_service=None):
@@ -144,40 +149,53 @@ def findVersionMetricValue(is_http, label):
 
 
 def verify_wiremock_request(mock_steps, request_url, template_file, template_params, ignore_params=[],
-                            request_method='POST', request_json_schema=None, headers=None):
-    wait(lambda: len(get_request(mock_steps, request_url, request_method)) > 0,
-         waiting_for='Appropriate request',
-         timeout_seconds=30,
-         sleep_seconds=0.1)
-
-    wiremock_requests_found = get_request(mock_steps, request_url, request_method)
-
-    wiremock_request_url = wiremock_requests_found[0]["url"]
-    assert_that(wiremock_request_url, equal_to(request_url))
-
-    wiremock_request_body = wiremock_requests_found[0]["body"]
+                            request_method='POST', request_json_schema=None, headers=None, publish_id=None,
+                            tracking_id=None):
+    """
+    Finds the request cats sent for this publish and checks it against the template.
+
+    Requests to the url are correlated by `catalog_code` of `template_params` (the publish id is part
+    of set_status urls), by `publish_id` and `tracking_id` if given, so concurrent publishes calling the same url do not
+    interfere; it waits for the first correlated request matching the template, so retries and later
+    calls for the same publish are waited for as well.
+    Returns the journal request, `np_cats_qa.steps.mock.journal.received_at(request)` is the time the mock got it.
+    """
+    catalog_code = template_params.get('catalog_code')
+    request_template = REQUEST_TEMPLATES[template_file]
+    correlated = []
+
+    def matching_request():
+        # keeps waiting through correlated requests that do not match (yet), e.g. an earlier set_status
+        correlated[:] = mock_steps.journal_find(method=request_method, url=request_url, catalog_code=catalog_code,
+                                                publish_id=publish_id, tracking_id=tracking_id)
+        return next((journal_request for journal_request in correlated
+                     if request_template.matches(journal_request["body"], template_params, ignore_params)), None)
+
+    try:
+        wiremock_request = wait(matching_request,
+                                waiting_for='Appropriate request',
+                                timeout_seconds=30,
+                                sleep_seconds=0.1)
+    except TimeoutExpired:
+        if not correlated:
+            raise
+        # the latest correlated request explains the mismatch in the assertions below
+        wiremock_request = correlated[-1]
+
+    assert_that(wiremock_request["url"], equal_to(request_url))
 
     if headers:
-        request_headers = wiremock_requests_found[0]["headers"]
+        request_headers = wiremock_request["headers"]
         for header in headers:
             assert_that(request_headers[header['name']], equal_to(header['value']), allure_name='Should contain header')
 
     if request_json_schema is not None:
-        assert_that(wiremock_request_body, has_valid_schema(request_json_schema),
+        assert_that(wiremock_request["body"], has_valid_schema(request_json_schema),
                     'Different request to JSON schema is expected (schema is {})'.format(request_json_schema))
 
-    data_folder = Path(os.getcwd().split('src')[0])
-    file = data_folder / ("src/db_prj_qa/steps/mock/request_templates/" + template_file)
-    with open(file) as f:
-        request_template = Template(f.read()).substitute(template_params)
-    wiremock_expected_request_body = json.loads(request_template)
-
-    if ignore_params:
-        delete_keys_from_dict(wiremock_request_body, ignore_params)
-        delete_keys_from_dict(wiremock_expected_request_body, ignore_params)
-
-    assert_that(wiremock_request_body, equal_to(wiremock_expected_request_body),
+    assert_that(request_template.mismatches(wiremock_request["body"], template_params, ignore_params), empty(),
                 'Different request to wiremock is expected (template is {})'.format(template_file))
+    return wiremock_request
 
 
 def verify_failed_response(response, error_code):
@@ -186,27 +204,44 @@ def verify_failed_response(response, error_code):
     assert_that(response['error'], has_entry('code', error_code), allure_name='response has expected error_code')
 
 
-def wait_until_task_finished_in_db(is_db, publish_id):
-    wait(lambda: is_db.get_publish_task_status(publish_id) in [PublishStatus.COMPLETED, PublishStatus.FAILED],
-         waiting_for='Status COMPLETED or FAILED',
-         timeout_seconds=30,
+def wait_for_task_status_in_db(is_db, publish_id, statuses, waiting_for, seen=False, timeout_seconds=30):
+    # status transitions are pushed by Postgres when the listener is running, otherwise DB is polled
+    if is_db.task_listener is not None:
+        return is_db.task_listener.wait_for_status(
+            publish_id, statuses, timeout_seconds=timeout_seconds, seen=seen,
+            current_status=lambda: is_db.get_publish_task_status(publish_id))
+    wait(lambda: is_db.get_publish_task_status(publish_id) in statuses,
+         waiting_for=waiting_for,
+         timeout_seconds=timeout_seconds,
          sleep_seconds=0.1)
+    return is_db.get_publish_task_status(publish_id)
+
+
+def wait_until_task_finished_in_db(is_db, publish_id, timeout_seconds=30):
+    return wait_for_task_status_in_db(is_db, publish_id, [PublishStatus.COMPLETED, PublishStatus.FAILED],
+                                      waiting_for='Status COMPLETED or FAILED', timeout_seconds=timeout_seconds)
 
 
 def verify_publish_completed_with_status_in_db(is_db, publish_id, status):
     # waiting FAILED or COMPLETED status to do not fail with Timeout issue
-    wait(lambda: is_db.get_publish_task_status(publish_id) in [PublishStatus.COMPLETED, PublishStatus.FAILED],
-         waiting_for='Status COMPLETED or FAILED',
-         timeout_seconds=30,
-         sleep_seconds=0.1)
-    assert_that(is_db.get_publish_task_status(publish_id), equal_to(status), allure_name='must be equal status')
+    finished_status = wait_until_task_finished_in_db(is_db, publish_id)
+    assert_that(finished_status, equal_to(status), allure_name='must be equal status')
+
+
+def wait_until_tasks_finished_in_db(is_db, publish_ids, timeout_seconds=30):
+    return BatchTaskStatusWaiter(is_db, timeout_seconds=timeout_seconds).wait(publish_ids)
+
+
+def verify_publishes_completed_with_status_in_db(is_db, publish_ids, status, timeout_seconds=30):
+    timings = wait_until_tasks_finished_in_db(is_db, publish_ids, timeout_seconds=timeout_seconds)
+    assert_that({publish_id: timing.status for publish_id, timing in timings.items()},
+                equal_to({publish_id: status for publish_id in publish_ids}), allure_name='must be equal statuses')
+    return timings
 
 
 def verify_publish_status_in_db(is_db, publish_id, status):
-    wait(lambda: is_db.get_publish_task_status(publish_id) == status,
-         waiting_for='Status was changed to %s' % status,
-         timeout_seconds=30,
-         sleep_seconds=0.1)
+    wait_for_task_status_in_db(is_db, publish_id, [status], waiting_for='Status was changed to %s' % status,
+                               seen=True)
 
 
 def verify_publish_states_in_db(is_db, catalog_publish_id):
@@ -246,30 +281,87 @@ def verify_terminated_catalog_in_db(is_db, catalog_code):
          sleep_seconds=0.1)
 
 
-def compare_downloaded_and_original_catalogs(mock_http, catalog, catalog_file, download_path, original_path):
-    catalog_instances = [
-        {'file': 'currencies.json', 'key': 'currency_code'},
-        {'file': 'entitlements.json', 'key': 'entitlement_code'},
-        {'file': 'products.json', 'key': 'code'},
-        {'file': 'storefronts.json', 'key': 'code'},
-        {'file': 'overrides.json', 'key': 'code'},
-        {'file': 'promotions.json', 'key': 'code'}
-    ]
-
-    catalog_zipped = zipfile.ZipFile(io.BytesIO(catalog))
-    catalog_zipped.extractall(download_path)
-
-    mock_http.extract_catalog_by_catalog_code_to(catalog_file=catalog_file, extract_path=original_path)
-
-    for items in catalog_instances:
-        with open(download_path + items['file'], 'r+', encoding="utf-8") as downloaded_file:
-            downloaded_catalog = sorted(json.load(downloaded_file), key=lambda k: k[items['key']])[0]
-
-        with open(original_path + items['file'], 'r+', encoding="utf-8") as original_file:
-            original_catalog = sorted(json.load(original_file), key=lambda k: k[items['key']])[0]
-
-        assert_that([key for key in downloaded_catalog if downloaded_catalog[key] != original_catalog[key]],
-                    empty(), allure_name='Catalog entities are same')
+def verify_active_catalogs_in_db(is_db, catalog_type, catalog_codes):
+    """
+    Active catalogs of the type in DB are exactly `catalog_codes`; DB rows are streamed, not loaded at once
+    """
+    expected = set(catalog_codes)
+    unexpected = []
+    for catalog_code in is_db.iter_active_catalogs(catalog_type):
+        if catalog_code in expected:
+            expected.discard(catalog_code)
+        else:
+            unexpected.append(catalog_code)
+    assert_that(unexpected[:20], empty(), allure_name='no other active catalogs in db')
+    assert_that(sorted(expected)[:20], empty(), allure_name='all active catalogs are in db')
+
+
+def compare_downloaded_and_original_catalogs(mock_http, catalog, catalog_file, download_path, original_path,
+                                             strict=False):
+    catalog_files = OrderedDict((file_name, CATALOG_FILE_KEYS[file_name]) for file_name in
+                                ['currencies.json', 'entitlements.json', 'products.json', 'storefronts.json',
+                                 'overrides.json', 'promotions.json'])
+
+    os.makedirs(download_path, exist_ok=True)
+    downloaded_zip = os.path.join(download_path, catalog_file)
+    with open(downloaded_zip, 'wb') as f:
+        f.write(catalog)
+
+    original_zip = mock_http.download_catalog_to(os.path.join(original_path, catalog_file), catalog_file=catalog_file)
+
+    entity_types = [entity_type for entity_type, file_name in ENTITY_TYPE_FILES.items() if file_name in catalog_files]
+    original_digest = digest_catalog_zip(original_zip, entity_types)
+    downloaded_digest = digest_catalog_zip(downloaded_zip, entity_types)
+    allure.attach(json.dumps(downloaded_digest.as_dict(), indent=2), name='catalog digest')
+    if original_digest.root == downloaded_digest.root:
+        return
+
+    comparison = compare_catalog_zips(original_zip, downloaded_zip, file_keys=catalog_files, strict=strict)
+    allure.attach(json.dumps(comparison.as_dict(), indent=2), name='catalog comparison')
+
+    assert_that(comparison.differences(), empty(), allure_name='Catalog entities are same')
+
+
+def verify_catalog_entities_match_source(is_http, catalog_code, catalog_zip, entity_types, ignore_fields=()):
+    """
+    Compares digests of entities returned by cats with the source catalog, only differing buckets are read twice
+    """
+    source_digest = digest_catalog_zip(catalog_zip, entity_types, ignore_fields=ignore_fields)
+    api_digest = digest_catalog_api(is_http, catalog_code, entity_types, ignore_fields=ignore_fields)
+    allure.attach(json.dumps(api_digest.as_dict(), indent=2), name='catalog digest')
+
+    differences = OrderedDict()
+    for entity_type in source_digest.different_types(api_digest):
+        differences[entity_type] = drill_down(catalog_zip_entities(catalog_zip, entity_type),
+                                              api_entities(is_http, catalog_code, entity_type),
+                                              source_digest.types[entity_type], api_digest.types[entity_type],
+                                              ignore_fields=ignore_fields)
+    assert_that(differences, empty(), allure_name='Catalog entities are same as in source catalog')
+
+
+def verify_diff_matches_catalogs(is_http, entity_type, destination_catalog_code, destination_zip,
+                                 source_catalog_code=None, source_zip=None, fields=None, limit=None):
+    """
+    Pages through the diff (initial one without source) and compares it item by item with the diff
+    computed from catalog zips
+    """
+    def get_page(last_id, page_limit):
+        if source_catalog_code is None:
+            return is_http.cats.get_initial_diff_by_type_and_catalog_code(
+                destination_catalog_code=destination_catalog_code, entity_type=entity_type, fields=fields,
+                last_id=last_id, limit=page_limit)
+        return is_http.cats.get_diff_by_type_and_catalog_code(
+            destination_catalog_code=destination_catalog_code, entity_type=entity_type,
+            source_catalog_code=source_catalog_code, fields=fields, last_id=last_id, limit=page_limit)
+
+    source_entities = None if source_catalog_code is None else catalog_zip_entities(source_zip, entity_type)
+
+    expected = expected_diff(source_entities, catalog_zip_entities(destination_zip, entity_type), entity_type,
+                             fields=fields)
+    comparison = compare_diff(expected, iter_diff_items(get_page, limit), entity_type)
+    allure.attach(json.dumps(comparison.as_dict(), indent=2), name='{} diff comparison'.format(entity_type))
+
+    assert_that(comparison.equal, equal_to(True), allure_name='Diff is same as computed from catalogs')
 
 
 def verify_audit(response, clickhouse_client,
@@ -23,8 +23,6 @@ def test_success_event(is_http, is_db, catalog_url, title_code, catalog_code, pu
     :type catalog_code: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     # publish catalog
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
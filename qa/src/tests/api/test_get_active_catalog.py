@@ -7,6 +7,7 @@ from requests import codes
 
 from np_cats_qa.constants import CatalogTypes, Regex
 from np_cats_qa.matchers import not_empty
+from np_cats_qa.verifications import verify_active_catalogs_in_db
 
 
 @allure.feature('cats')
@@ -38,9 +39,7 @@ def test_get_active_catalog_default(is_http, is_db, get_active_catalog_code_by_t
     assert_that(len(response.json()), equal_to(len(set([catalog['catalog_code'] for catalog in response.json()]))),
                 allure_name='response has unique catalog codes')
 
-    assert_that(sorted(is_db.get_active_catalogs(catalog_type=CatalogTypes.MAIN)),
-                equal_to(sorted([catalog['catalog_code'] for catalog in response.json()])),
-                allure_name='same catalog codes like in db')
+    verify_active_catalogs_in_db(is_db, CatalogTypes.MAIN, [catalog['catalog_code'] for catalog in response.json()])
 
 
 @allure.feature('cats')
@@ -68,9 +67,7 @@ def test_get_active_catalog_filter_by_type(is_http, is_db, catalog_type, ctype,
 
     assert_that(len(response.json()), equal_to(len(set([catalog['catalog_code'] for catalog in response.json()]))),
                 allure_name='response has unique catalog codes')
-    assert_that(sorted(is_db.get_active_catalogs(catalog_type=ctype)),
-                equal_to(sorted([catalog['catalog_code'] for catalog in response.json()])),
-                allure_name='same catalog codes like in db')
+    verify_active_catalogs_in_db(is_db, ctype, [catalog['catalog_code'] for catalog in response.json()])
 
 
 @allure.feature('cats')
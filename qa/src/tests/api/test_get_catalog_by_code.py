@@ -49,7 +49,7 @@ def test_get_catalog_by_code(is_http, is_db, mock_http, clear_tmp, catalog_url,
 @allure.feature('cats')
 @allure.story('get_catalog_by_code')
 def test_get_catalog_by_code_when_catalog_updated(is_http, is_db, catalog_url, catalog_code, publish_id, mock_http,
-                                                  yaml_config):
+                                                  yaml_config, title_code):
     """
     :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
     :type is_db: db_prj_qa.steps.db.steps.CatalogServiceDBSteps
@@ -65,7 +65,7 @@ def test_get_catalog_by_code_when_catalog_updated(is_http, is_db, catalog_url, c
 
     # publish catalog for the same title with different zip
     new_publish_id = ulid()
-    new_catalog_code = generate_catalog_code(yaml_config.data.TITLE_CODE)
+    new_catalog_code = generate_catalog_code(title_code)
     new_catalog_url = generate_catalog_url(yaml_config, CatalogZIP.UPDATED_CATALOG)
     response = is_http.cats.publish(new_catalog_url, new_catalog_code, new_publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
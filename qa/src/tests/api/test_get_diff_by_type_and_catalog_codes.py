@@ -13,7 +13,7 @@ from np_cats_qa.constants import PublishStatus, ChangeType, EntitiesBy
 from np_cats_qa.data_generators import generate_catalog_url, generate_catalog_code
 from np_cats_qa.helpers import ulid
 from np_cats_qa.matchers import not_empty
-from np_cats_qa.verifications import verify_publish_completed_with_status_in_db
+from np_cats_qa.verifications import verify_publish_completed_with_status_in_db, verify_diff_matches_catalogs
 
 
 @pytest.fixture
@@ -23,10 +23,10 @@ def clear_tmp():
 
 
 @pytest.fixture(scope='session')
-def source_catalog_code(is_http, yaml_config, is_db):
+def source_catalog_code(is_http, yaml_config, worker_title_code, is_db):
     # publish catalog for the same title with different zip
     publish_id = ulid()
-    catalog_code = generate_catalog_code(yaml_config.data.TITLE_CODE)
+    catalog_code = generate_catalog_code(worker_title_code)
     catalog_url = generate_catalog_url(yaml_config, CatalogZIP.DEFAULT_CATALOG)
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
@@ -37,10 +37,10 @@ def source_catalog_code(is_http, yaml_config, is_db):
 
 
 @pytest.fixture(scope='session')
-def destination_catalog_code(is_http, yaml_config, is_db):
+def destination_catalog_code(is_http, yaml_config, worker_title_code, is_db):
     # publish catalog for the same title with different zip
     publish_id = ulid()
-    catalog_code = generate_catalog_code(yaml_config.data.TITLE_CODE)
+    catalog_code = generate_catalog_code(worker_title_code)
     catalog_url = generate_catalog_url(yaml_config, CatalogZIP.UPDATED_CATALOG)
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
@@ -307,6 +307,29 @@ def test_get_diff_with_paging(is_http, entity_type, yaml_config, destination_cat
     assert_that(total_count, equal_to(entity_count))
 
 
+@allure.feature('cats')
+@allure.story('get_diff')
+@pytest.mark.parametrize('entity_type', [
+    'CURRENCY', 'ENTITLEMENT', 'PRODUCT', 'STOREFRONT', 'OVERRIDE', 'PROMOTION', 'FILTER_PROPERTY'])
+@pytest.mark.parametrize('fields', [None, 'active,metadata'])
+@pytest.mark.parametrize('diff_type', ['initial', 'diff'])
+def test_diff_is_same_as_computed_from_catalogs(is_http, entity_type, mock_http, clear_tmp, fields, diff_type,
+                                                destination_catalog_code, source_catalog_code):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    """
+    destination_zip = mock_http.download_catalog_to('tmp/destination.zip', catalog_file=CatalogZIP.UPDATED_CATALOG)
+
+    if diff_type == 'initial':
+        verify_diff_matches_catalogs(is_http, entity_type, destination_catalog_code, destination_zip,
+                                     fields=fields, limit=5)
+    else:
+        source_zip = mock_http.download_catalog_to('tmp/source.zip', catalog_file=CatalogZIP.DEFAULT_CATALOG)
+        verify_diff_matches_catalogs(is_http, entity_type, destination_catalog_code, destination_zip,
+                                     source_catalog_code=source_catalog_code, source_zip=source_zip,
+                                     fields=fields, limit=5)
+
+
 @allure.feature('cats')
 @allure.story('get_diff_with_paging')
 @pytest.mark.parametrize('last_id, code, entity_type_id, entity_type', [
@@ -8,7 +8,8 @@ from npqa_matchers.http import has_status_code
 from npqa_report import assert_that
 from requests import codes
 
-from np_cats_qa.constants import CatalogZIP
+from np_cats_qa.constants import CatalogZIP, EntityType
+from np_cats_qa.verifications import verify_catalog_entities_match_source
 
 
 @pytest.fixture
@@ -75,6 +76,11 @@ def test_get_filter_property_by_type_and_catalog_code(is_http, mock_http, clear_
     assert_that(sorted_filter_properties, equal_to(sorted_expected_filter_properties),
                 allure_name='response has expected entities')
 
+    catalog_zip = mock_http.download_catalog_to(extract_path + CatalogZIP.DEFAULT_CATALOG,
+                                                catalog_file=CatalogZIP.DEFAULT_CATALOG)
+    verify_catalog_entities_match_source(is_http, get_active_catalog_code_by_title_code, catalog_zip,
+                                         [EntityType.FILTER_PROPERTY])
+
 
 @allure.feature('cats')
 @allure.story('get_entity_by_type')
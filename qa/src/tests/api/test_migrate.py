@@ -124,8 +124,6 @@ def test_publish_new_catalog_and_check_old_terminated(is_http, is_db, catalog_ur
     :type is_db: db_prj_qa.steps.db.steps.CatalogServiceDBSteps
     :type catalog_url: str
     """
-    mock_steps.journal_clear_history()
-
     new_title_code = TitleCode.PUBLISH_NEW_CATALOG
     new_catalog_code = generate_catalog_code(title_code=new_title_code)
 
@@ -13,7 +13,7 @@ from np_cats_qa.verifications import verify_failed_response, verify_catools_noti
     verify_publish_completed_with_status_in_db, verify_prepare_method_called_n_times, \
     verify_publish_status_in_db, verify_publish_states_in_db, verify_prepare_method_called, \
     verify_activated_method_called, \
-    has_valid_catalog_publish_info
+    has_valid_catalog_publish_info, verify_publishes_completed_with_status_in_db
 
 new_catalog_id = random_id()
 
@@ -30,8 +30,6 @@ def test_publish(is_http, is_db, catalog_url, title_code, catalog_code, publish_
     :type catalog_code: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     # publish catalog
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
@@ -140,8 +138,6 @@ def test_publish_new_catalog_and_check_old_terminated(is_http, is_db, catalog_ur
     :type catalog_code_next: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     # publish first catalog
     publish_response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(publish_response, has_status_code(codes.created), allure_name='response has expected code')
@@ -150,7 +146,6 @@ def test_publish_new_catalog_and_check_old_terminated(is_http, is_db, catalog_ur
     verify_publish_completed_with_status_in_db(is_db, publish_id, PublishStatus.COMPLETED)
     verify_catools_notification_sent(mock_steps, status=CatalogStatus.ACTIVATED, publish_id=publish_id,
                                      catalog_code=catalog_code)
-    mock_steps.journal_clear_history()
 
     new_publish_id = ulid()
     # publish second catalog
@@ -258,7 +253,8 @@ def test_publish_several_catalogs_for_one_title(is_http, is_db, catalog_url):
                 allure_name='catalog2 and catalog3 status should be PENDING, catalog1 only should be IN_PROGRESS')
 
     # wait for all catalogs processed
-    verify_publish_completed_with_status_in_db(is_db, publish_id_3, PublishStatus.COMPLETED)
+    verify_publishes_completed_with_status_in_db(is_db, [publish_id_1, publish_id_2, publish_id_3],
+                                                 PublishStatus.COMPLETED)
 
     # verify processing time
     catalog_1_time = is_db.get_task_processing_time(publish_id_1)
@@ -332,8 +328,6 @@ def test_3_retry_on_prepare_timeout(is_http, is_db, catalog_url, mock_steps, pub
     :type mock_steps: db_prj_qa.steps.mock.steps.CatalogServiceMockSteps
     :type catalog_url: str
     """
-    mock_steps.journal_clear_history()
-
     catalog_code = generate_catalog_code(title_code)
     # publish catalog
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
@@ -409,7 +403,6 @@ def test_publish_when_entity_was_changed_but_same_id(is_http, is_db, catalog_cod
     """
 
     catalog_url = generate_catalog_url(yaml_config, 'catalog_invalid_entities.zip')
-    mock_steps.journal_clear_history()
 
     # publish catalog
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
@@ -439,8 +432,6 @@ def test_publish_with_the_same_code_but_different_content(is_http, is_db, catalo
     :type publish_id: str
     """
 
-    mock_steps.journal_clear_history()
-
     catalog_url = generate_catalog_url(yaml_config, 'catalog_with_the_same_code_first.zip')
     response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
@@ -594,8 +585,6 @@ def test_publish_v2_twice(is_http, is_db, catalog_url, title_code, mock_steps,
     :type catalog_code_next: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     # publish first catalog
     publish_response_v2 = is_http.cats.v2_catalog_publish(
         catalog_url=catalog_url,
@@ -669,8 +658,6 @@ def test_publish_v2_invalid_catalog_url(is_http, is_db, catalog_url, title_code,
     :type catalog_code_next: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     publish_response_v2 = is_http.cats.v2_catalog_publish(
         catalog_url=catalog_url,
         title_code=title_code,
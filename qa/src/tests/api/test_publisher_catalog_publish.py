@@ -39,8 +39,6 @@ def test_publisher_catalog_publish(is_http, is_db, catalog_url, publish_catalog_
     """
     # Publish test for main and coupons catalogs
 
-    mock_steps.journal_clear_history()
-
     # publish catalog
     response = is_http.cats.publisher_catalog_publish(catalog_url, tool_name, publish_catalog_code, publish_id)
     assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
@@ -144,8 +142,6 @@ def test_publisher_catalog_publish_new_catalog_and_check_old_terminated(is_http,
     :type catalog_code_next: str
     :type publish_id: str
     """
-    mock_steps.journal_clear_history()
-
     # publish first catalog
     publish_response = is_http.cats.publisher_catalog_publish(catalog_url, tool_name, catalog_code, publish_id)
     assert_that(publish_response, has_status_code(codes.created), allure_name='response has expected code')
@@ -160,8 +156,6 @@ def test_publisher_catalog_publish_new_catalog_and_check_old_terminated(is_http,
         verify_coupons_notification_sent(mock_steps, status=CatalogStatus.ACTIVATED, publish_id=publish_id,
                                          catalog_code=catalog_code)
 
-    mock_steps.journal_clear_history()
-
     new_publish_id = ulid()
     # publish second catalog
     publish_response_2 = is_http.cats.publisher_catalog_publish(catalog_url, tool_name, nxt_catalog_code,
@@ -329,8 +323,6 @@ def test_publisher_catalog_publish_truncated_error_message(is_http, is_db, catal
 def test_publisher_catalog_publish_big_cat_redirect_fail(is_http, is_db, wowp_title_catalog_code, publish_id,
                                                          mock_steps,
                                                          catalog_domain):
-    mock_steps.journal_clear_history()
-
     # publish catalog
     response = is_http.cats.publisher_catalog_publish(catalog_domain + "/get_301.zip", "catool",
                                                       wowp_title_catalog_code,
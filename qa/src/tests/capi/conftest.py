@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def title_code(yaml_config):
+    """
+    CAPI data of these scenarios (currencies, storefronts, filter properties) is seeded for the prepared title
+    only, so xdist workers share it instead of using their own titles
+    """
+    return yaml_config.data.TITLE_CODE
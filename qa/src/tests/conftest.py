@@ -1,29 +1,64 @@
+import asyncio
+import os
 import shutil
 
 import pytest
+from npqa_matchers.http import has_status_code
+from npqa_report import assert_that
+from requests import codes
 
-from np_cats_qa.constants import EntitiesBy
+from np_cats_qa.catalog.generator import generate_catalog
+from np_cats_qa.constants import EntitiesBy, PublishStatus
 from np_cats_qa.data_generators import generate_catalog_code, generate_coupon_catalog_code, \
-    generate_catalog_code_next, generate_coupon_catalog_code_next
+    generate_catalog_code_next, generate_coupon_catalog_code_next, generate_catalog_url, generate_worker_title_code
 from np_cats_qa.helpers import random_id, ulid
+from np_cats_qa.sequences import WORKER_COUNT_ENV
 from np_cats_qa.steps import CatalogServiceHttpSteps
+from np_cats_qa.steps.http import AsyncCatalogServiceHttpSteps
 from np_cats_qa.steps.capi import CapiSteps
 from np_cats_qa.steps.db.cats import CatalogServiceDBSteps
 from np_cats_qa.steps.mock.steps import CatalogServiceMockSteps, WiremockHttpSteps
+from np_cats_qa.verifications import verify_publish_completed_with_status_in_db
 from tests import load_capi_from_artifactory_and_path
 from paudit_qa.clients import ClickHouseClient
 
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    # pytest-xdist 1.x does not tell workers how many of them run, catalog versions and timestamps need it
+    node.slaveinput['workercount'] = len(node.nodemanager.specs)
+
+
+def pytest_configure(config):
+    slaveinput = getattr(config, 'slaveinput', None)
+    if slaveinput and 'workercount' in slaveinput:
+        os.environ.setdefault(WORKER_COUNT_ENV, str(slaveinput['workercount']))
+
+
 @pytest.fixture(scope='session')
 def is_http(yaml_config):
     base_url = 'http://{host}:{port}'.format(**yaml_config.cats.http)
     return CatalogServiceHttpSteps(base_url)
 
 
+@pytest.fixture
+def is_async_http(yaml_config):
+    base_url = 'http://{host}:{port}'.format(**yaml_config.cats.http)
+    steps = AsyncCatalogServiceHttpSteps(base_url,
+                                         max_connections=yaml_config.data.PERF.ASYNC_MAX_CONNECTIONS,
+                                         max_concurrency=yaml_config.data.PERF.ASYNC_MAX_CONCURRENCY)
+    yield steps
+    asyncio.get_event_loop().run_until_complete(steps.cats.close())
+
+
 @pytest.fixture(scope='session')
 def is_db(yaml_config):
     db_url = 'postgres://{user}:{password}@{host}:{port}/{db}'.format(**yaml_config.cats.db)
-    return CatalogServiceDBSteps(db_url)
+    steps = CatalogServiceDBSteps(db_url)
+    steps.start_task_status_listener()
+    yield steps
+    steps.stop_task_status_listener()
+    steps.close()
 
 
 @pytest.fixture
@@ -40,13 +75,43 @@ def mock_http(yaml_config):
     return WiremockHttpSteps(base_url)
 
 
+@pytest.fixture(scope='session')
+def worker_title_code(yaml_config):
+    """
+    Title owned by the current xdist worker, so workers do not change catalogs of each other
+    """
+    return generate_worker_title_code(yaml_config.data.TITLE_CODE)
+
+
+@pytest.fixture(scope='session')
+def worker_catalog_code(is_http, is_db, yaml_config, worker_title_code):
+    """
+    Active MAIN catalog of the worker title; titles of other than the first worker get the default catalog
+    on first use, the first one is seeded by test_prepare_catalog
+    """
+    response = is_http.cats.get_active_catalog_by_title_code(worker_title_code, 'MAIN')
+    if worker_title_code == yaml_config.data.TITLE_CODE:
+        assert_that(response, has_status_code(codes.ok), allure_name='prepared title has an active catalog')
+    if response.status_code == codes.ok:
+        return response.json().get('catalog_code')
+
+    publish_id = ulid()
+    catalog_code = generate_catalog_code(worker_title_code)
+    catalog_url = generate_catalog_url(yaml_config, yaml_config.data.DEFAULT_CATALOG)
+    response = is_http.cats.publish(catalog_url, catalog_code, publish_id)
+    assert_that(response, has_status_code(codes.created), allure_name='worker catalog is published')
+    verify_publish_completed_with_status_in_db(is_db, publish_id, PublishStatus.COMPLETED)
+    return catalog_code
+
+
 @pytest.fixture
-def title_code(yaml_config):
-    return yaml_config.data.TITLE_CODE
+def title_code(worker_title_code, worker_catalog_code):
+    return worker_title_code
 
 
 @pytest.fixture
 def coupon_title_code(yaml_config):
+    # worker titles get a MAIN catalog only, coupon scenarios stay on the prepared title
     return yaml_config.data.TITLE_CODE
 
 
@@ -80,6 +145,21 @@ def catalog_domain(yaml_config):
     return yaml_config.data.CATALOG_DOMAIN
 
 
+@pytest.fixture(scope='session')
+def generated_catalog(yaml_config):
+    """
+    Factory writing a generated catalog into wiremock files and returning its url
+    """
+    mock = CatalogServiceMockSteps(**yaml_config.wiremock)
+
+    def generate(catalog_file, spec):
+        generate_catalog(yaml_config.data.WIREMOCK_FILES_PATH, catalog_file, spec)
+        mock.setup_catalog_file(catalog_file)
+        return generate_catalog_url(yaml_config, catalog_file)
+
+    return generate
+
+
 @pytest.fixture(scope='session')
 def clickhouse_client(yaml_config):
     return ClickHouseClient(host='localhost')
@@ -101,18 +181,18 @@ def publish_id():
 
 
 @pytest.fixture
-def catalog_code(yaml_config):
-    return generate_catalog_code(yaml_config.data.TITLE_CODE)
+def catalog_code(title_code):
+    return generate_catalog_code(title_code)
 
 
 @pytest.fixture
-def catalog_code_next(yaml_config):
-    return generate_catalog_code_next(yaml_config.data.TITLE_CODE)
+def catalog_code_next(title_code):
+    return generate_catalog_code_next(title_code)
 
 
 @pytest.fixture
-def main_catalog_code(yaml_config):
-    return generate_catalog_code(yaml_config.data.TITLE_CODE)
+def main_catalog_code(title_code):
+    return generate_catalog_code(title_code)
 
 
 @pytest.fixture
@@ -126,13 +206,13 @@ def wowp_title_catalog_code_next(yaml_config):
 
 
 @pytest.fixture
-def coupon_catalog_code(yaml_config):
-    return generate_coupon_catalog_code(yaml_config.data.TITLE_CODE)
+def coupon_catalog_code(coupon_title_code):
+    return generate_coupon_catalog_code(coupon_title_code)
 
 
 @pytest.fixture
-def coupon_catalog_code_next(yaml_config):
-    return generate_coupon_catalog_code_next(yaml_config.data.TITLE_CODE)
+def coupon_catalog_code_next(coupon_title_code):
+    return generate_coupon_catalog_code_next(coupon_title_code)
 
 
 @pytest.fixture
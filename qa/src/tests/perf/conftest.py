@@ -0,0 +1,76 @@
+import os
+import subprocess
+
+import pytest
+from hamcrest import equal_to
+from npqa_report import assert_that
+from requests import codes
+from requests.exceptions import RequestException
+
+from np_cats_qa.catalog.generator import CatalogSpec
+from np_cats_qa.constants import PublishStatus, TitleCode
+from np_cats_qa.data_generators import generate_catalog_code, generate_catalog_code_next
+from np_cats_qa.helpers import ulid, wait
+from np_cats_qa.verifications import wait_until_task_finished_in_db
+
+
+@pytest.fixture(scope='session')
+def restore_database(is_http, is_db, yaml_config):
+    """
+    Brings the database back to the snapshot named by PERF.DB_SNAPSHOT and restarts cats, whose caches
+    and connections belong to the replaced database; None when no snapshot is configured
+    """
+    perf = yaml_config.data.PERF
+    if not perf.DB_SNAPSHOT:
+        return None
+    if not perf.CATS_RESTART_COMMAND:
+        pytest.fail('PERF.DB_SNAPSHOT is set without PERF.CATS_RESTART_COMMAND, '
+                    'cats would keep serving the replaced database')
+
+    def restore():
+        is_db.restore_snapshot(perf.DB_SNAPSHOT)
+        subprocess.run(perf.CATS_RESTART_COMMAND, shell=True, check=True)
+        wait(lambda: is_http.cats.healthy().status_code == codes.ok,
+             timeout_seconds=perf.CATS_RESTART_TIMEOUT_SECONDS, expected_exceptions=RequestException,
+             waiting_for='cats is restarted')
+
+    return restore
+
+
+@pytest.fixture(scope='session', autouse=True)
+def restored_database(restore_database):
+    """
+    Starts perf runs from the same data when PERF.DB_SNAPSHOT is set
+    """
+    if restore_database is not None:
+        restore_database()
+
+
+@pytest.fixture(scope='session')
+def generated_catalog_pair(is_http, is_db, generated_catalog, yaml_config):
+    """
+    Publishes two generated catalogs: the destination one has other content, more entities of
+    most types and less promotions, so its diff has every change type
+    """
+    perf = yaml_config.data.PERF
+    entities = perf.DIFF_ENTITIES
+    specs = [
+        CatalogSpec.with_total_entities(TitleCode.PERF, entities,
+                                        catalog_code=generate_catalog_code(TitleCode.PERF)),
+        CatalogSpec.with_total_entities(TitleCode.PERF, int(entities * 1.1), seed=1,
+                                        promotions=int(entities * 0.1),
+                                        catalog_code=generate_catalog_code_next(TitleCode.PERF)),
+    ]
+    catalogs = []
+    for name, spec in zip(['source', 'destination'], specs):
+        catalog_file = 'generated_diff_{}.zip'.format(name)
+        catalog_url = generated_catalog(catalog_file, spec)
+        publish_id = ulid()
+        response = is_http.cats.publish(catalog_url, spec.catalog_code, publish_id)
+        assert_that(response.status_code, equal_to(codes.created), allure_name='response has expected code')
+        status = wait_until_task_finished_in_db(is_db, publish_id,
+                                                timeout_seconds=perf.SCALING_PUBLISH_TIMEOUT_SECONDS)
+        assert_that(status, equal_to(PublishStatus.COMPLETED), allure_name='generated catalog is published')
+        catalogs.append((spec.catalog_code,
+                         os.path.join(yaml_config.data.WIREMOCK_FILES_PATH, 'catalogs', catalog_file)))
+    return catalogs
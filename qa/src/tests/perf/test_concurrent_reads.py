@@ -0,0 +1,53 @@
+import asyncio
+from collections import Counter
+
+import allure
+import pytest
+from hamcrest import equal_to
+from npqa_report import assert_that
+from requests import codes
+
+from np_cats_qa.constants import EntityType, CatalogTypes
+
+
+@allure.feature('cats')
+@allure.story('load')
+@pytest.mark.perf
+@pytest.mark.parametrize('entity_type', [EntityType.PRODUCT, EntityType.STOREFRONT])
+def test_concurrent_entities_reads(is_async_http, yaml_config, title_code, entity_type):
+    """
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    :type title_code: str
+    """
+    requests_count = yaml_config.data.PERF.ASYNC_REQUESTS
+
+    async def read_all():
+        return await asyncio.gather(
+            *[is_async_http.cats.get_entities_by_type_and_title_code(title_code, entity_type)
+              for _ in range(requests_count)])
+
+    responses = asyncio.get_event_loop().run_until_complete(read_all())
+
+    statuses = Counter(response.status_code for response in responses)
+    assert_that(dict(statuses), equal_to({codes.ok: requests_count}), allure_name='all responses are successful')
+
+
+@allure.feature('cats')
+@allure.story('load')
+@pytest.mark.perf
+def test_concurrent_active_catalog_reads(is_async_http, yaml_config, title_code):
+    """
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    :type title_code: str
+    """
+    requests_count = yaml_config.data.PERF.ASYNC_REQUESTS
+
+    async def read_all():
+        return await asyncio.gather(
+            *[is_async_http.cats.get_active_catalog_by_title_code(title_code, CatalogTypes.MAIN_TYPE)
+              for _ in range(requests_count)])
+
+    responses = asyncio.get_event_loop().run_until_complete(read_all())
+
+    catalog_codes = Counter(response.json()['catalog_code'] for response in responses)
+    assert_that(len(catalog_codes), equal_to(1), allure_name='all responses return the same active catalog')
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+
+import allure
+import pytest
+from hamcrest import equal_to, empty, less_than
+from npqa_report import assert_that
+
+from np_cats_qa.catalog.diff_oracle import expected_diff
+from np_cats_qa.catalog.merkle import catalog_zip_entities
+from np_cats_qa.constants import EntityType
+from np_cats_qa.perf.diff_crawler import DiffCrawler, sweep_limits
+
+ENTITY_TYPES = [EntityType.CURRENCY, EntityType.ENTITLEMENT, EntityType.PRODUCT, EntityType.STOREFRONT,
+                EntityType.OVERRIDE, EntityType.PROMOTION, EntityType.FILTER_PROPERTY]
+
+
+@allure.feature('cats')
+@allure.story('get_diff_with_paging')
+@pytest.mark.perf
+def test_crawl_generated_catalogs_diff(is_async_http, generated_catalog_pair, yaml_config):
+    """
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    """
+    perf = yaml_config.data.PERF
+    (source_code, source_zip), (destination_code, destination_zip) = generated_catalog_pair
+    crawler = DiffCrawler(is_async_http.cats, destination_code, source_code, limit=perf.DIFF_PAGE_LIMIT,
+                          concurrency=perf.CRAWL_CONCURRENCY, keep_items=False)
+
+    results = asyncio.get_event_loop().run_until_complete(crawler.crawl(ENTITY_TYPES))
+    allure.attach(json.dumps([result.as_dict() for result in results.values()], indent=2), name='diff crawl')
+
+    for entity_type, result in results.items():
+        expected_codes = {code for code, _, _ in expected_diff(catalog_zip_entities(source_zip, entity_type),
+                                                               catalog_zip_entities(destination_zip, entity_type),
+                                                               entity_type)}
+        assert_that(result.errors, equal_to(0), allure_name='{} pages are returned'.format(entity_type))
+        assert_that(result.duplicates, empty(), allure_name='{} pages have no duplicates'.format(entity_type))
+        assert_that(result.out_of_order, empty(), allure_name='{} ids grow page by page'.format(entity_type))
+        assert_that(result.gaps(expected_codes), empty(), allure_name='{} pages have no gaps'.format(entity_type))
+        assert_that(result.count, equal_to(len(expected_codes)),
+                    allure_name='{} change stream is complete'.format(entity_type))
+        if perf.CRAWL_MAX_PAGE_GROWTH:
+            assert_that(result.late_page_growth(), less_than(perf.CRAWL_MAX_PAGE_GROWTH),
+                        allure_name='{} late pages are not slower than first ones'.format(entity_type))
+
+
+@allure.feature('cats')
+@allure.story('get_diff_with_paging')
+@pytest.mark.perf
+def test_diff_page_limit_sweep(is_async_http, generated_catalog_pair, yaml_config):
+    """
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    """
+    perf = yaml_config.data.PERF
+    (source_code, _), (destination_code, _) = generated_catalog_pair
+
+    rows = asyncio.get_event_loop().run_until_complete(
+        sweep_limits(is_async_http.cats, destination_code, ENTITY_TYPES, perf.CRAWL_LIMITS,
+                     source_catalog_code=source_code, concurrency=perf.CRAWL_CONCURRENCY))
+
+    os.makedirs(perf.RESULTS_PATH, exist_ok=True)
+    with open(os.path.join(perf.RESULTS_PATH, 'diff_limit_sweep.json'), 'w') as f:
+        json.dump(rows, f, indent=2)
+    allure.attach(json.dumps(rows, indent=2), name='diff page limit sweep')
+
+    assert_that([row['items'] for row in rows], equal_to([rows[0]['items']] * len(rows)),
+                allure_name='every page limit returns the same change stream')
@@ -0,0 +1,23 @@
+import allure
+import pytest
+
+from np_cats_qa.constants import EntityType
+from np_cats_qa.verifications import verify_diff_matches_catalogs
+
+
+@allure.feature('cats')
+@allure.story('get_diff')
+@pytest.mark.perf
+@pytest.mark.parametrize('entity_type', [
+    EntityType.CURRENCY, EntityType.ENTITLEMENT, EntityType.PRODUCT, EntityType.STOREFRONT,
+    EntityType.OVERRIDE, EntityType.PROMOTION, EntityType.FILTER_PROPERTY])
+@pytest.mark.parametrize('fields', [None, 'metadata'])
+def test_generated_catalogs_diff(is_http, generated_catalog_pair, yaml_config, entity_type, fields):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    """
+    (source_code, source_zip), (destination_code, destination_zip) = generated_catalog_pair
+
+    verify_diff_matches_catalogs(is_http, entity_type, destination_code, destination_zip,
+                                 source_catalog_code=source_code, source_zip=source_zip, fields=fields,
+                                 limit=yaml_config.data.PERF.DIFF_PAGE_LIMIT)
@@ -0,0 +1,59 @@
+import json
+
+import allure
+import pytest
+from hamcrest import less_than_or_equal_to
+from npqa_report import assert_that
+
+from np_cats_qa.perf.load import OpenLoopLoadGenerator, catalog_read_operations, publish_operation
+
+
+@allure.feature('cats')
+@allure.story('load')
+@pytest.mark.perf
+def test_catalog_reads_at_fixed_rate(is_http, yaml_config, title_code, get_active_catalog_code_by_title_code):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    :type title_code: str
+    """
+    perf = yaml_config.data.PERF
+    generator = OpenLoopLoadGenerator(rate=perf.LOAD_RATE,
+                                      duration_seconds=perf.LOAD_DURATION_SECONDS,
+                                      warmup_seconds=perf.LOAD_WARMUP_SECONDS,
+                                      max_workers=perf.LOAD_WORKERS)
+    for name, func in catalog_read_operations(is_http.cats, title_code, get_active_catalog_code_by_title_code):
+        generator.add_operation(name, func)
+
+    report = generator.run()
+    allure.attach(report.format_table(), name='latency percentiles')
+    allure.attach(json.dumps(report.as_dict(), indent=2), name='load report')
+
+    assert_that(report.error_rate, less_than_or_equal_to(perf.LOAD_MAX_ERROR_RATE),
+                allure_name='error rate is acceptable')
+
+
+@allure.feature('cats')
+@allure.story('load')
+@pytest.mark.perf
+def test_catalog_reads_during_publishing(is_http, yaml_config, title_code, catalog_url,
+                                         get_active_catalog_code_by_title_code):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    :type title_code: str
+    :type catalog_url: str
+    """
+    perf = yaml_config.data.PERF
+    generator = OpenLoopLoadGenerator(rate=perf.LOAD_RATE,
+                                      duration_seconds=perf.LOAD_DURATION_SECONDS,
+                                      warmup_seconds=perf.LOAD_WARMUP_SECONDS,
+                                      max_workers=perf.LOAD_WORKERS)
+    for name, func in catalog_read_operations(is_http.cats, title_code, get_active_catalog_code_by_title_code):
+        generator.add_operation(name, func, weight=10)
+    generator.add_operation(*publish_operation(is_http.cats, catalog_url, title_code))
+
+    report = generator.run()
+    allure.attach(report.format_table(), name='latency percentiles')
+    allure.attach(json.dumps(report.as_dict(), indent=2), name='load report')
+
+    assert_that(report.error_rate, less_than_or_equal_to(perf.LOAD_MAX_ERROR_RATE),
+                allure_name='error rate is acceptable')
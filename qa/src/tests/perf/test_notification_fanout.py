@@ -0,0 +1,43 @@
+import asyncio
+import json
+import os
+
+import allure
+import pytest
+from hamcrest import equal_to, empty
+from npqa_report import assert_that
+
+from np_cats_qa.constants import PublishStatus
+from np_cats_qa.data_generators import generate_catalog_url
+from np_cats_qa.perf.notification_fanout import NotificationFanoutBenchmark
+
+
+@allure.feature('cats')
+@allure.story('notification_fanout')
+@pytest.mark.perf
+def test_notification_fanout_latency(is_db, is_async_http, mock_steps, yaml_config):
+    """
+    :type is_db: db_prj_qa.steps.db.steps.CatalogServiceDBSteps
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    :type mock_steps: db_prj_qa.steps.mock.steps.CatalogServiceMockSteps
+    """
+    perf = yaml_config.data.PERF
+    title_codes = [yaml_config.data.TITLE_CODE] + ['{}_{}'.format(yaml_config.data.TITLE_CODE, index)
+                                                   for index in range(1, perf.FANOUT_TITLES)]
+    benchmark = NotificationFanoutBenchmark(is_db, is_async_http.cats, mock_steps.journal,
+                                            generate_catalog_url(yaml_config, yaml_config.data.DEFAULT_CATALOG),
+                                            generate_catalog_url(yaml_config, yaml_config.data.DEFAULT_COUPON_CATALOG),
+                                            timeout_seconds=perf.FANOUT_TIMEOUT_SECONDS)
+
+    report = asyncio.get_event_loop().run_until_complete(
+        benchmark.run(title_codes, perf.FANOUT_TOOLS, rounds=perf.FANOUT_ROUNDS))
+
+    os.makedirs(perf.RESULTS_PATH, exist_ok=True)
+    report.write_csv(os.path.join(perf.RESULTS_PATH, 'notification_fanout.csv'))
+    report.write_json(os.path.join(perf.RESULTS_PATH, 'notification_fanout.json'))
+    allure.attach(json.dumps(report.as_dict(), indent=2), name='notification fan-out latency')
+
+    assert_that([publish.status for publish in report.publishes],
+                equal_to([PublishStatus.COMPLETED] * len(report.publishes)),
+                allure_name='all concurrent publishes are completed')
+    assert_that(report.missing_required(), empty(), allure_name='every consumer got its call')
@@ -0,0 +1,39 @@
+import asyncio
+import json
+import os
+
+import allure
+import pytest
+from hamcrest import equal_to, empty
+from npqa_report import assert_that
+
+from np_cats_qa.perf.publication_history import PublicationHistoryBenchmark
+
+
+@allure.feature('cats')
+@allure.story('get_catalog_publications')
+@pytest.mark.perf
+def test_catalog_publications_history_scaling(is_db, is_async_http, yaml_config):
+    """
+    :type is_db: db_prj_qa.steps.db.steps.CatalogServiceDBSteps
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    """
+    perf = yaml_config.data.PERF
+    benchmark = PublicationHistoryBenchmark(is_db, is_async_http.cats, requests=perf.HISTORY_REQUESTS)
+
+    curve = asyncio.get_event_loop().run_until_complete(benchmark.run(perf.HISTORY_DEPTHS, perf.HISTORY_LIMITS))
+
+    os.makedirs(perf.RESULTS_PATH, exist_ok=True)
+    curve.write_csv(os.path.join(perf.RESULTS_PATH, 'publication_history.csv'))
+    curve.write_json(os.path.join(perf.RESULTS_PATH, 'publication_history.json'))
+    allure.attach(json.dumps(curve.as_dict(), indent=2), name='publication history curve')
+
+    assert_that([point.errors for point in curve.points], equal_to([0] * len(curve.points)),
+                allure_name='publications of every seeded title are returned')
+    assert_that([point.returned for point in curve.points],
+                equal_to([min(point.limit, point.depth) for point in curve.points]),
+                allure_name='every limit is applied')
+    allure.attach(json.dumps(curve.growing_limits(), indent=2), name='limits growing with the history depth')
+    if perf.HISTORY_MAX_GROWTH:
+        assert_that(curve.growing_limits(perf.HISTORY_MAX_GROWTH), empty(),
+                    allure_name='latency does not grow with the history depth')
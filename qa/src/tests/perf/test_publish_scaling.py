@@ -0,0 +1,38 @@
+import json
+import os
+
+import allure
+import pytest
+from hamcrest import equal_to, empty
+from npqa_report import assert_that
+
+from np_cats_qa.constants import PublishStatus, TitleCode
+from np_cats_qa.perf.publish_scaling import PublishScalingBenchmark
+
+
+@allure.feature('cats')
+@allure.story('publish_scaling')
+@pytest.mark.perf
+def test_publish_pipeline_scaling(is_http, is_db, generated_catalog, restore_database, yaml_config):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    :type is_db: db_prj_qa.steps.db.steps.CatalogServiceDBSteps
+    """
+    perf = yaml_config.data.PERF
+    benchmark = PublishScalingBenchmark(is_http, is_db, generated_catalog, TitleCode.PERF,
+                                        timeout_seconds=perf.SCALING_PUBLISH_TIMEOUT_SECONDS,
+                                        restore=restore_database)
+
+    curve = benchmark.run(perf.SCALING_SIZES, repeat=perf.SCALING_REPEAT)
+
+    os.makedirs(perf.RESULTS_PATH, exist_ok=True)
+    curve.write_csv(os.path.join(perf.RESULTS_PATH, 'publish_scaling.csv'))
+    curve.write_json(os.path.join(perf.RESULTS_PATH, 'publish_scaling.json'))
+    allure.attach(json.dumps(curve.as_dict(), indent=2), name='publish scaling curve')
+
+    assert_that([run.status for run in curve.runs], equal_to([PublishStatus.COMPLETED] * len(curve.runs)),
+                allure_name='all generated catalogs are published')
+    allure.attach(json.dumps(curve.superlinear_stages(), indent=2), name='superlinear stages')
+    if perf.SCALING_MAX_SLOPE:
+        assert_that(curve.superlinear_stages(perf.SCALING_MAX_SLOPE), empty(),
+                    allure_name='no pipeline stage grows superlinearly')
@@ -0,0 +1,58 @@
+import json
+import os
+
+import allure
+import pytest
+from hamcrest import equal_to, less_than
+from npqa_report import assert_that
+
+from np_cats_qa.catalog.diff_oracle import entity_key
+from np_cats_qa.catalog.generator import CatalogSpec
+from np_cats_qa.catalog.merkle import catalog_zip_entities
+from np_cats_qa.constants import EntityType, TitleCode
+from np_cats_qa.data_generators import generate_catalog_code, generate_catalog_code_next
+from np_cats_qa.helpers import ulid
+from np_cats_qa.perf.sync_consumer import SyncConsumer
+
+ENTITY_TYPES = [EntityType.CURRENCY, EntityType.ENTITLEMENT, EntityType.PRODUCT, EntityType.STOREFRONT,
+                EntityType.OVERRIDE, EntityType.PROMOTION, EntityType.FILTER_PROPERTY]
+
+
+@allure.feature('cats')
+@allure.story('sync')
+@pytest.mark.perf
+def test_publish_to_synced_replica(is_http, is_async_http, mock_steps, generated_catalog, yaml_config):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    :type mock_steps: db_prj_qa.steps.mock.steps.CatalogServiceMockSteps
+    """
+    perf = yaml_config.data.PERF
+    consumer = SyncConsumer(is_http, is_async_http.cats, mock_steps, ENTITY_TYPES, limit=perf.DIFF_PAGE_LIMIT,
+                            concurrency=perf.CRAWL_CONCURRENCY, timeout_seconds=perf.SCALING_PUBLISH_TIMEOUT_SECONDS)
+    specs = [
+        CatalogSpec.with_total_entities(TitleCode.PERF, perf.DIFF_ENTITIES,
+                                        catalog_code=generate_catalog_code(TitleCode.PERF)),
+        CatalogSpec.with_total_entities(TitleCode.PERF, int(perf.DIFF_ENTITIES * 1.1), seed=1,
+                                        catalog_code=generate_catalog_code_next(TitleCode.PERF)),
+    ]
+
+    for index, spec in enumerate(specs):
+        catalog_file = 'generated_sync_{}.zip'.format(index)
+        catalog_url = generated_catalog(catalog_file, spec)
+        run = consumer.sync(catalog_url, spec.catalog_code, ulid())
+
+        catalog_zip = os.path.join(yaml_config.data.WIREMOCK_FILES_PATH, 'catalogs', catalog_file)
+        for entity_type in ENTITY_TYPES:
+            key = entity_key(entity_type)
+            expected_codes = {entity[key] for entity in catalog_zip_entities(catalog_zip, entity_type)}
+            assert_that(consumer.replica.codes(entity_type), equal_to(expected_codes),
+                        allure_name='{} replica is synced to {}'.format(entity_type, spec.catalog_code))
+        assert_that(run.end_to_end_seconds, less_than(perf.SYNC_MAX_SECONDS),
+                    allure_name='replica is synced in time')
+
+    runs = [run.as_dict() for run in consumer.runs]
+    os.makedirs(perf.RESULTS_PATH, exist_ok=True)
+    with open(os.path.join(perf.RESULTS_PATH, 'publish_to_sync.json'), 'w') as f:
+        json.dump(runs, f, indent=2)
+    allure.attach(json.dumps(runs, indent=2), name='publish to synced replica')
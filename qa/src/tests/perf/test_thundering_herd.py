@@ -0,0 +1,50 @@
+import json
+
+import allure
+import pytest
+from hamcrest import less_than_or_equal_to
+from npqa_matchers.http import has_status_code
+from npqa_report import assert_that
+from requests import codes
+
+from np_cats_qa.catalog.generator import CatalogSpec
+from np_cats_qa.constants import EntityType, TitleCode
+from np_cats_qa.data_generators import generate_catalog_code
+from np_cats_qa.helpers import ulid
+from np_cats_qa.perf.sync_consumer import ACTIVATED_URL, PREPARE_URL
+from np_cats_qa.perf.thundering_herd import ThunderingHerd, active_cache_enabled, compare_herd_reports, \
+    read_herd_report, write_herd_report
+
+
+@allure.feature('cats')
+@allure.story('thundering_herd')
+@pytest.mark.perf
+@pytest.mark.parametrize('trigger', [PREPARE_URL, ACTIVATED_URL])
+def test_thundering_herd_on_activation(is_http, is_async_http, mock_steps, generated_catalog, yaml_config, trigger):
+    """
+    :type is_http: db_prj_qa.steps.http.CatalogServiceHttpSteps
+    :type is_async_http: db_prj_qa.steps.http.AsyncCatalogServiceHttpSteps
+    :type mock_steps: db_prj_qa.steps.mock.steps.CatalogServiceMockSteps
+    """
+    perf = yaml_config.data.PERF
+    cache_enabled = active_cache_enabled(perf.CATS_CONFIG_PATH)
+    spec = CatalogSpec.with_total_entities(TitleCode.PERF, perf.HERD_ENTITIES,
+                                           catalog_code=generate_catalog_code(TitleCode.PERF))
+    catalog_url = generated_catalog('generated_herd.zip', spec)
+    herd = ThunderingHerd(is_async_http.cats, perf.HERD_CONSUMERS,
+                          [EntityType.CURRENCY, EntityType.PRODUCT, EntityType.STOREFRONT])
+
+    response = is_http.cats.publish(catalog_url, spec.catalog_code, ulid())
+    assert_that(response, has_status_code(codes.created), allure_name='response has expected code')
+    report = herd.on_callback(mock_steps, trigger, TitleCode.PERF, spec.catalog_code, cache_enabled,
+                              timeout_seconds=perf.SCALING_PUBLISH_TIMEOUT_SECONDS)
+
+    write_herd_report(perf.RESULTS_PATH, report)
+    allure.attach(report.format_table(), name='thundering herd, cache {}'.format('on' if cache_enabled else 'off'))
+    other = read_herd_report(perf.RESULTS_PATH, trigger, not cache_enabled)
+    if other is not None:
+        on, off = (report.as_dict(), other) if cache_enabled else (other, report.as_dict())
+        allure.attach(json.dumps(compare_herd_reports(on, off), indent=2), name='cache on/off comparison')
+
+    assert_that(report.error_rate, less_than_or_equal_to(perf.LOAD_MAX_ERROR_RATE),
+                allure_name='error rate during the burst is acceptable')
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def title_code(yaml_config):
+    """
+    Negative scenarios send invalid requests around valid ones built from the prepared title: its catalog
+    and the storefronts, categories and entity ids of the test config exist for that title only, so xdist
+    workers share it instead of using their own titles
+    """
+    return yaml_config.data.TITLE_CODE